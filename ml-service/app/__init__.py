@@ -1,9 +1,12 @@
 """
 Flask Application Factory for NilaSense ML Service
 """
-from flask import Flask
+import time
+
+from flask import Flask, Response, g, request
 from flask_cors import CORS
 from config.config import Config
+from utils import metrics
 
 
 def create_app(config_class=Config):
@@ -33,9 +36,58 @@ def create_app(config_class=Config):
             print("   The service will start but predictions may use fallback logic.")
     
     # Register blueprints
-    from app.routes import api_bp
+    from app.routes import admin_token_valid, api_bp
     app.register_blueprint(api_bp)
     
+    # Pay lazy imports and engine set-up before the first request;
+    # /api/health/ready stays 503 until this succeeds
+    from app.health import get_readiness
+    get_readiness().warm_up(app)
+    
+    # Model watcher, started lazily on the first request; under gunicorn,
+    # post_worker_init starts it in each worker. Not started here, since
+    # under preload_app this runs in the master, which then forks
+    from utils.model_watcher import start_model_watcher
+    
+    @app.before_request
+    def ensure_model_watcher():
+        start_model_watcher()
+    
+    # Per-route request counts and latency for /metrics; admin requests
+    # with an X-Debug-Timing header also get their stage times in X-Timing
+    @app.before_request
+    def start_request_timer():
+        g.request_started_at = time.perf_counter()
+        if 'X-Debug-Timing' in request.headers and admin_token_valid():
+            g.timing_token = metrics.start_request_timing()
+    
+    @app.after_request
+    def record_request_metrics(response):
+        started_at = g.pop('request_started_at', None)
+        if started_at is not None:
+            elapsed = time.perf_counter() - started_at
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            metrics.record_request(route, request.method, response.status_code, elapsed)
+            timing_token = g.pop('timing_token', None)
+            if timing_token is not None:
+                response.headers['X-Timing'] = metrics.finish_request_timing(timing_token, elapsed)
+        return response
+    
+    @app.teardown_request
+    def stop_request_timing(error=None):
+        # after_request is skipped when a request fails before a response exists
+        timing_token = g.pop('timing_token', None)
+        if timing_token is not None:
+            metrics.finish_request_timing(timing_token, 0.0)
+    
+    @app.route('/metrics')
+    def prometheus_metrics():
+        exposition = metrics.render()
+        if exposition is None:
+            return {'error': 'Metrics disabled (METRICS_ENABLED=false or prometheus_client not installed)'}, 404
+        body, content_type = exposition
+        return Response(body, content_type=content_type)
+    
     # Root endpoint
     @app.route('/')
     def index():
@@ -45,9 +97,20 @@ def create_app(config_class=Config):
             'status': 'running',
             'endpoints': {
                 'health': '/api/health',
+                'health_live': '/api/health/live',
+                'health_ready': '/api/health/ready',
                 'predict': '/api/predict',
                 'batch_predict': '/api/predict/batch',
-                'model_info': '/api/model/info'
+                'stream_predict': '/api/predict/stream',
+                'columnar_predict': '/api/predict/columnar',
+                'model_info': '/api/model/info',
+                'model_reload': '/api/model/reload',
+                'admin_profile': '/api/admin/profile',
+                'pond_readings': '/api/ponds/<pond_id>/readings',
+                'pond_trend': '/api/ponds/<pond_id>/trend',
+                'pond_forecast': '/api/ponds/<pond_id>/forecast',
+                'stats': '/api/stats',
+                'metrics': '/metrics'
             }
         }
     
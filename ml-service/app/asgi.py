@@ -0,0 +1,290 @@
+"""
+ASGI adapter for the Flask application
+
+Serves the existing Flask app (same routes and responses) under an ASGI
+server such as uvicorn. Request bodies up to ``SPOOL_BYTES`` are read and
+responses are sent on the event loop, so slow clients never hold a worker
+thread; the Flask handlers (validation, CPU-bound inference,
+serialization) run in a bounded thread pool. Larger bodies are handed to
+the app as a stream that pulls the rest from the client as the handler
+reads it, so e.g. /api/predict/stream keeps its flat memory use.
+A declared Content-Length above ``max_body_bytes`` gets 413 before the
+app is called; a body that grows past it while streaming fails the read
+with werkzeug's ``RequestEntityTooLarge``.
+"""
+import asyncio
+import contextvars
+import io
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+
+# Bodies up to this size are read completely before the app is called
+SPOOL_BYTES = 1024 * 1024
+
+
+class ASGIAdapter:
+    """Run a WSGI app behind ASGI with a bounded executor"""
+    
+    def __init__(self, wsgi_app, max_workers=4, max_body_bytes=None):
+        """
+        Initialize the adapter
+        
+        Args:
+            wsgi_app: Flask (or any WSGI) application
+            max_workers (int): Maximum number of requests executing the
+                WSGI app at once; further requests wait on the event loop
+            max_body_bytes (int): Largest request body accepted (None or 0
+                for no limit)
+        """
+        self.wsgi_app = wsgi_app
+        self.max_workers = max_workers
+        self.max_body_bytes = max_body_bytes or None
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='asgi-worker')
+        self._slots = None
+    
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+    
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    
+    async def _http(self, scope, receive, send):
+        declared = _content_length(scope)
+        if self.max_body_bytes and declared is not None and declared > self.max_body_bytes:
+            await self._send_too_large(send)
+            return
+        
+        head = await self._read_head(receive)
+        if head is None:
+            return  # client disconnected
+        head, more_body = head
+        if self.max_body_bytes and len(head) > self.max_body_bytes:
+            await self._send_too_large(send)
+            return
+        
+        # Created lazily so it binds to the server's running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        
+        loop = asyncio.get_running_loop()
+        body = io.BufferedReader(_RequestBody(head, more_body, receive, loop, self.max_body_bytes))
+        response = _WSGIResponse()
+        environ = self._build_environ(scope, body, None if more_body else len(head))
+        # The slot bounds concurrent WSGI calls; it is released once the
+        # call returns, not while chunks go out to a slow client. The first
+        # chunk is produced before sending headers, since a WSGI app may
+        # defer start_response until it is iterated
+        async with self._slots:
+            chunk = await loop.run_in_executor(
+                self.executor, response.start, self.wsgi_app, environ
+            )
+        
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': response.headers,
+        })
+        
+        # Pull chunks one at a time so streaming responses stay streaming
+        try:
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(self.executor, response.next_chunk)
+        finally:
+            await loop.run_in_executor(self.executor, response.close)
+        
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    
+    @staticmethod
+    async def _read_head(receive):
+        """
+        Read the body up to SPOOL_BYTES on the event loop
+        
+        Returns:
+            tuple: (bytes read, whether more body follows), or None if
+                   the client disconnected
+        """
+        parts = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            part = message.get('body', b'')
+            parts.append(part)
+            size += len(part)
+            more_body = message.get('more_body', False)
+            if not more_body or size >= SPOOL_BYTES:
+                return b''.join(parts), more_body
+    
+    @staticmethod
+    async def _send_too_large(send):
+        body = json.dumps({'success': False, 'error': 'Request body too large'}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body, 'more_body': False})
+    
+    @staticmethod
+    def _build_environ(scope, body, content_length=None):
+        """
+        Translate an ASGI HTTP scope into a PEP 3333 environ
+        
+        Args:
+            scope: ASGI HTTP scope
+            body: File-like request body (``wsgi.input``)
+            content_length (int): Body size when fully read, else the
+                client's Content-Length header is passed on (if any)
+        """
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+            'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1] or 80),
+            'REMOTE_ADDR': client[0],
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            # The body stream ends where the request body ends
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin1').upper().replace('-', '_')
+            value = raw_value.decode('latin1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'CONTENT_LENGTH':
+                if content_length is None:
+                    environ['CONTENT_LENGTH'] = value
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        
+        if content_length is not None:
+            environ['CONTENT_LENGTH'] = str(content_length)
+        return environ
+
+
+def _content_length(scope):
+    """Content-Length header of a scope as int, None if absent or invalid"""
+    for name, value in scope.get('headers', []):
+        if name.lower() == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+class _RequestBody(io.RawIOBase):
+    """
+    ``wsgi.input`` reading the spooled head of the body, then the rest
+    
+    The rest is pulled from the ASGI ``receive`` channel on demand from
+    the executor thread running the app, by scheduling ``receive`` on the
+    event loop.
+    """
+    
+    def __init__(self, head, more_body, receive, loop, max_bytes=None):
+        self._buffer = memoryview(head)
+        self._more_body = more_body
+        self._receive = receive
+        self._loop = loop
+        self._max_bytes = max_bytes
+        self._received = len(head)
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        while not self._buffer and self._more_body:
+            self._buffer = memoryview(self._next_part())
+        count = min(len(buffer), len(self._buffer))
+        buffer[:count] = self._buffer[:count]
+        self._buffer = self._buffer[count:]
+        return count
+    
+    def _next_part(self):
+        message = asyncio.run_coroutine_threadsafe(self._receive(), self._loop).result()
+        if message['type'] == 'http.disconnect':
+            self._more_body = False
+            raise ClientDisconnected()
+        part = message.get('body', b'')
+        self._more_body = message.get('more_body', False)
+        self._received += len(part)
+        if self._max_bytes and self._received > self._max_bytes:
+            self._more_body = False
+            raise RequestEntityTooLarge()
+        return part
+
+
+class _WSGIResponse:
+    """
+    Drives one WSGI call and collects its status and headers
+    
+    Every step runs in the same ``contextvars`` context, although the
+    executor may run them on different threads, so context-bound state
+    (e.g. Flask's ``stream_with_context``) follows the response.
+    """
+    
+    def __init__(self):
+        self.status_code = 500
+        self.headers = []
+        self._app_iter = None
+        self._chunks = None
+        self._context = contextvars.copy_context()
+    
+    def start(self, wsgi_app, environ):
+        """Call the WSGI app and return its first body chunk (None if empty)"""
+        return self._context.run(self._start, wsgi_app, environ)
+    
+    def _start(self, wsgi_app, environ):
+        self._app_iter = wsgi_app(environ, self._start_response)
+        self._chunks = iter(self._app_iter)
+        return next(self._chunks, None)
+    
+    def next_chunk(self):
+        """Next body chunk, or None when the body is exhausted"""
+        return self._context.run(next, self._chunks, None)
+    
+    def close(self):
+        if hasattr(self._app_iter, 'close'):
+            self._context.run(self._app_iter.close)
+    
+    def _start_response(self, status, headers, exc_info=None):
+        self.status_code = int(status.split(' ', 1)[0])
+        self.headers = [
+            (name.lower().encode('latin1'), value.encode('latin1'))
+            for name, value in headers
+        ]
@@ -0,0 +1,113 @@
+"""
+Columnar binary format for bulk scoring
+
+Request body (little-endian)::
+
+    offset 0   4 bytes   magic b'NSC1'
+    offset 4   uint32    n_rows
+    offset 8   uint32    n_columns (4)
+    offset 12  uint32    reserved (0)
+    offset 16  float64   n_columns x n_rows values, one contiguous column
+                         per feature: ph, temperature, turbidity,
+                         dissolved_oxygen
+
+Response body (little-endian)::
+
+    offset 0   4 bytes   magic b'NSR1'
+    offset 4   uint32    n_rows
+    offset 8   uint32    n_classes
+    offset 12  uint32    n_invalid
+    offset 16  int8      n_rows class column indices (-1 = invalid row),
+                         zero-padded to a multiple of 8 bytes
+    then       float64   n_classes x n_rows probabilities, one contiguous
+                         column per class (NaN for invalid rows)
+
+Class names for the column indices are sent in the X-Class-Labels header.
+"""
+import struct
+
+import numpy as np
+
+REQUEST_MAGIC = b'NSC1'
+RESPONSE_MAGIC = b'NSR1'
+HEADER = struct.Struct('<4sIII')
+COLUMNS = ('ph', 'temperature', 'turbidity', 'dissolved_oxygen')
+CONTENT_TYPE = 'application/vnd.nilasense.columnar'
+
+
+class ColumnarFormatError(ValueError):
+    """Raised when a columnar payload is malformed"""
+
+
+def decode_readings(payload):
+    """
+    Wrap a columnar request body as an N x 4 array without copying
+    
+    Args:
+        payload: bytes-like request body
+        
+    Returns:
+        np.ndarray: read-only N x 4 float64 view (column-major)
+    """
+    if len(payload) < HEADER.size:
+        raise ColumnarFormatError("Payload shorter than header")
+    
+    magic, n_rows, n_columns, _ = HEADER.unpack_from(payload)
+    if magic != REQUEST_MAGIC:
+        raise ColumnarFormatError(f"Bad magic {magic!r}, expected {REQUEST_MAGIC!r}")
+    if n_columns != len(COLUMNS):
+        raise ColumnarFormatError(f"Expected {len(COLUMNS)} columns, got {n_columns}")
+    
+    expected_size = HEADER.size + n_rows * n_columns * 8
+    if len(payload) != expected_size:
+        raise ColumnarFormatError(f"Expected {expected_size} bytes, got {len(payload)}")
+    
+    columns = np.frombuffer(payload, dtype='<f8', count=n_rows * n_columns, offset=HEADER.size)
+    return columns.reshape(n_columns, n_rows).T
+
+
+def encode_readings(features):
+    """Encode an N x 4 array as a columnar request body (client helper)"""
+    features = np.asarray(features, dtype='<f8')
+    n_rows, n_columns = features.shape
+    return HEADER.pack(REQUEST_MAGIC, n_rows, n_columns, 0) + features.T.tobytes()
+
+
+def encode_predictions(class_indices, probabilities):
+    """
+    Encode predictions as a columnar response body
+    
+    Args:
+        class_indices: int array of class column indices (-1 for invalid)
+        probabilities: N x n_classes float array (NaN rows for invalid)
+        
+    Returns:
+        bytes: Response body
+    """
+    n_rows, n_classes = probabilities.shape
+    n_invalid = int(np.count_nonzero(class_indices < 0))
+    padding = (-n_rows) % 8
+    
+    return b''.join([
+        HEADER.pack(RESPONSE_MAGIC, n_rows, n_classes, n_invalid),
+        np.asarray(class_indices, dtype=np.int8).tobytes(),
+        b'\0' * padding,
+        np.asarray(probabilities, dtype='<f8').T.tobytes(),
+    ])
+
+
+def decode_predictions(payload):
+    """
+    Decode a columnar response body (client helper)
+    
+    Returns:
+        tuple: (class_indices int8 array, N x n_classes probabilities)
+    """
+    magic, n_rows, n_classes, _ = HEADER.unpack_from(payload)
+    if magic != RESPONSE_MAGIC:
+        raise ColumnarFormatError(f"Bad magic {magic!r}, expected {RESPONSE_MAGIC!r}")
+    
+    class_indices = np.frombuffer(payload, dtype=np.int8, count=n_rows, offset=HEADER.size)
+    offset = HEADER.size + n_rows + (-n_rows) % 8
+    probabilities = np.frombuffer(payload, dtype='<f8', count=n_rows * n_classes, offset=offset)
+    return class_indices, probabilities.reshape(n_classes, n_rows).T
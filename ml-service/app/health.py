@@ -0,0 +1,216 @@
+"""
+Liveness and readiness of the service
+
+A worker is ready once the default model is loaded and a warm-up batch has
+gone through every prediction path (single, batch, compact, columnar and
+the rule-based fallback) plus JSON serialization, so lazy imports, engine
+initialisation and thread pools are paid before the first real request.
+It stops being ready while predictions are served by the fallback.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+import numpy as np
+from flask import current_app
+
+from app import columnar
+from app.predict import (
+    RESPONSE_FIELDS, _fallback_predictions, get_degraded_mode, predict_batch, predict_columns,
+    predict_compact, predict_water_quality
+)
+from config.config import Config
+from utils.model_utils import CANARY_READING, DEFAULT_MODEL, get_model_instance, get_models
+
+MODEL_USED = 'Random Forest Classifier'
+
+
+class Readiness:
+    """
+    Warm-up state of this process
+
+    ``warm_up`` runs at app start and again in every gunicorn worker after
+    fork. ``status`` repeats it while the process is not warm (including
+    a forked child of a warm parent) or the default model is serving
+    fallback predictions, at most once per ``retry_seconds``
+    and never for two probes at once, so a flood of probes against a
+    failing worker does not keep it busy warming up.
+    """
+
+    def __init__(self, retry_seconds=5.0):
+        """
+        Initialize the readiness state
+
+        Args:
+            retry_seconds (float): Minimum time between warm-up attempts
+                started by ``status``
+        """
+        self.retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._attempt_pid = None
+        self._retry_at = 0.0
+        self.started_at = time.time()
+        self.app = None
+        self.warmed = False
+        self.warmed_at = None
+        self.warmed_pid = None
+        self.checks = {}
+        self.error = None
+
+    def warm_up(self, app=None) -> bool:
+        """
+        Run the warm-up batch through every prediction path
+
+        Args:
+            app: Flask app used for serialization (default: the app of
+                the previous warm-up)
+
+        Returns:
+            bool: True when every path succeeded with the model
+        """
+        self.app = app or self.app
+        with self._lock:
+            return self._warm_up()
+
+    def _retry_warm_up(self):
+        """Warm up again from a probe unless one ran (or runs) just now"""
+        if not self._lock.acquire(blocking=False):
+            return  # another probe is warming up
+        try:
+            if self._attempt_pid != os.getpid() or time.monotonic() >= self._retry_at:
+                self._warm_up()
+        finally:
+            self._lock.release()
+
+    def _warm_up(self) -> bool:
+        """Run the checks; the caller holds the lock"""
+        self._attempt_pid = os.getpid()
+        self._retry_at = time.monotonic() + self.retry_seconds
+        checks = {}
+        error = None
+        name = 'app'
+        try:
+            with self.app.app_context():
+                for name, check in self._checks():
+                    started_at = time.perf_counter()
+                    check()
+                    checks[name] = round((time.perf_counter() - started_at) * 1000, 3)
+        except Exception as e:
+            error = f"{name}: {e}"
+
+        self.checks = checks
+        self.error = error
+        self.warmed = error is None
+        self.warmed_pid = os.getpid()
+        self.warmed_at = datetime.utcnow().isoformat() + 'Z' if self.warmed else None
+
+        if self.warmed:
+            print(f"[OK] Warm-up finished in {sum(checks.values()):.1f}ms")
+        else:
+            print(f"[WARNING] Warm-up failed, not ready: {error}")
+        return self.warmed
+
+    def _checks(self):
+        """(name, callable) pairs, each raising on failure"""
+        model = None
+
+        def load():
+            nonlocal model
+            model = get_model_instance()
+
+        def single():
+            _expect_model(predict_water_quality(CANARY_READING))
+
+        def batch():
+            # One row past the flat backend's limit also warms the large-batch engine
+            readings = [CANARY_READING] * (model.flat_max_rows + 1)
+            _expect_model(predict_batch(readings)[-1])
+
+        def compact():
+            columns = predict_compact([CANARY_READING], RESPONSE_FIELDS)
+            if columns['model_used'] != MODEL_USED:
+                raise RuntimeError(f"served by {columns['model_used']}")
+
+        def columnar_path():
+            features = np.array([[CANARY_READING[name] for name in columnar.COLUMNS]])
+            class_indices, probabilities, _, model_used = predict_columns(features, columnar.COLUMNS)
+            if model_used != MODEL_USED:
+                raise RuntimeError(f"served by {model_used}")
+            columnar.encode_predictions(class_indices, probabilities)
+
+        def fallback():
+            _fallback_predictions([CANARY_READING])
+
+        def serialize():
+            current_app.json.dumps(predict_water_quality(CANARY_READING))
+
+        return (
+            ('load', load), ('single', single), ('batch', batch), ('compact', compact),
+            ('columnar', columnar_path), ('fallback', fallback), ('serialize', serialize)
+        )
+
+    def status(self, warm=True) -> Dict[str, Any]:
+        """
+        Readiness of this worker
+
+        Args:
+            warm: Retry the warm-up first if this process is not warm or
+                the default model is degraded (rate-limited, see the class
+                docstring)
+
+        Returns:
+            dict: 'ready' plus the reason, model and warm-up details
+        """
+        # A degraded default model is only cleared by a successful model
+        # prediction, which no real request delivers once the load balancer
+        # stops routing here; the warm-up's canary predictions do
+        degraded = get_degraded_mode().model_stats(DEFAULT_MODEL)
+        if warm and self.app is not None and (
+                not self.warmed or self.warmed_pid != os.getpid() or degraded['active']):
+            self._retry_warm_up()
+
+        degraded = get_degraded_mode().model_stats(DEFAULT_MODEL)
+        model = get_models().registry(DEFAULT_MODEL).peek()
+        ready = self.warmed and self.warmed_pid == os.getpid() and model is not None \
+            and not degraded['active']
+
+        if ready:
+            reason = None
+        elif not self.warmed or self.warmed_pid != os.getpid():
+            reason = f"warm-up failed: {self.error}" if self.error else 'warm-up not run'
+        elif model is None:
+            reason = 'model not loaded'
+        else:
+            reason = f"serving fallback predictions: {degraded['last_error']}"
+
+        return {
+            'ready': ready,
+            'reason': reason,
+            'pid': os.getpid(),
+            'model': {
+                'name': model.name,
+                'version': model.version,
+                'variant': model.served_variant,
+                'inference_backend': model.active_backend
+            } if model is not None else None,
+            'warmed_at': self.warmed_at,
+            'warm_up_ms': self.checks
+        }
+
+    def uptime(self) -> float:
+        return time.time() - self.started_at
+
+
+def _expect_model(result):
+    if result.get('model_used') != MODEL_USED:
+        raise RuntimeError(f"served by {result.get('model_used')}")
+
+
+_readiness = Readiness(Config.READINESS_RETRY_SECONDS)
+
+
+def get_readiness() -> Readiness:
+    """Process-wide readiness state"""
+    return _readiness
@@ -2,10 +2,28 @@
 Machine Learning Prediction Logic
 """
 import os
+import json
+import threading
+import time
 import joblib
 import numpy as np
 from datetime import datetime
-from utils.model_utils import get_model_instance
+from utils.model_utils import DEFAULT_MODEL, FEATURE_ALIASES, get_model_instance
+from utils import metrics, water_rules
+from utils.batching import get_batcher
+from utils.prediction_cache import get_prediction_cache
+from utils.pond_state import (
+    PARAMETERS as POND_PARAMETERS, InvalidTimestampError, get_pond_store, parse_timestamp
+)
+from config.config import Config
+from app.validators import validate_sensor_array, validate_sensor_data
+
+# Per-row fields available in compact (column-oriented) responses
+RESPONSE_FIELDS = (
+    'class', 'quality', 'confidence', 'probabilities', 'issue_codes',
+    'description', 'issues', 'recommendations'
+)
+COMPACT_FIELDS = ('class', 'confidence', 'probabilities')
 
 
 def get_water_quality_description(quality, parameters):
@@ -96,12 +114,13 @@ def get_recommendations(quality, parameters):
     return recommendations
 
 
-def predict_water_quality(sensor_data):
+def predict_water_quality(sensor_data, model_name=None):
     """
     Predict water quality from sensor data using trained ML model
     
     Args:
         sensor_data: dict with keys: ph, temperature, turbidity, dissolved_oxygen
+        model_name: Registry name of the model to use (default model if None)
         
     Returns:
         dict: Prediction result with quality, description, and recommendations
@@ -115,26 +134,28 @@ def predict_water_quality(sensor_data):
         
         # Try to use trained ML model
         try:
-            model = get_model_instance()
+            model = get_model_instance(model_name)
             
             # Use trained model for prediction
-            result = model.predict(
-                ph=ph,
-                temperature=temperature,
-                turbidity=turbidity,
-                dissolved_oxygen=dissolved_oxygen
-            )
+            reading = {
+                'ph': ph,
+                'temperature': temperature,
+                'turbidity': turbidity,
+                'dissolved_oxygen': dissolved_oxygen
+            }
+            probabilities = _predict_probabilities(model, model.build_feature_matrix([reading]))
+            result = model.build_results([reading], probabilities)[0]
             
             # Add timestamp
             result['timestamp'] = datetime.utcnow().isoformat() + 'Z'
             result['model_used'] = 'Random Forest Classifier'
+            _degraded_mode.recovered(model_name=model_name)
             
             return result
             
         except Exception as model_error:
             # Fallback to rule-based classification if model fails
-            print(f"⚠️  Model prediction failed: {model_error}")
-            print("   Using fallback rule-based classification...")
+            _degraded_mode.record(model_error, model_name=model_name)
             
             return _fallback_prediction(ph, temperature, turbidity, dissolved_oxygen)
         
@@ -142,10 +163,33 @@ def predict_water_quality(sensor_data):
         raise Exception(f"Prediction error: {str(e)}")
 
 
+def _predict_probabilities(model, features):
+    """
+    Class probabilities for a feature matrix through the cache and batcher
+    
+    Only calls of up to PREDICTION_CACHE_MAX_ROWS rows use the cache; bulk
+    calls stay vectorized and would only flush the cache's entries.
+    
+    Args:
+        model: Loaded WaterQualityModel
+        features: N x 4 matrix in the model's feature order
+        
+    Returns:
+        np.ndarray: N x n_classes probabilities
+    """
+    compute = model.predict_proba_array
+    if Config.MICRO_BATCHING_ENABLED and len(features) == 1:
+        # Coalesced with concurrent requests into one forest call
+        compute = lambda rows: get_batcher().submit(model, rows)
+    
+    if Config.PREDICTION_CACHE_ENABLED and len(features) <= Config.PREDICTION_CACHE_MAX_ROWS:
+        return get_prediction_cache().predict_proba(model, features, compute)
+    return compute(features)
+
+
 def _fallback_prediction(ph, temperature, turbidity, dissolved_oxygen):
     """
     Fallback rule-based classification when ML model is not available
-    Uses the same logic as model_utils._generate_description for consistency
     
     Args:
         ph, temperature, turbidity, dissolved_oxygen: Water parameters
@@ -153,216 +197,479 @@ def _fallback_prediction(ph, temperature, turbidity, dissolved_oxygen):
     Returns:
         dict: Prediction result
     """
-    # Use the same logic as model_utils for consistency
-    IDEAL_PH_MIN, IDEAL_PH_MAX = 6.5, 8.5
-    IDEAL_TEMP_MIN, IDEAL_TEMP_MAX = 25, 30
-    IDEAL_TURBIDITY_MAX = 25
-    IDEAL_DO_MIN = 5.0
-    
-    # Initialize issues and recommendations (same as model_utils)
-    issues = []
-    recommendations = []
+    return _fallback_predictions([{
+        'ph': ph,
+        'temperature': temperature,
+        'turbidity': turbidity,
+        'dissolved_oxygen': dissolved_oxygen
+    }])[0]
+
+
+def _fallback_predictions(readings):
+    """
+    Rule-based classification of many readings in one vectorized pass
     
-    # Check pH
-    if ph < 6.0:
-        issues.append("pH terlalu rendah (asam)")
-        recommendations.append("Tambahkan kapur pertanian untuk menaikkan pH")
-    elif ph > 9.0:
-        issues.append("pH terlalu tinggi (basa)")
-        recommendations.append("Lakukan pergantian air secara bertahap")
-    elif ph < IDEAL_PH_MIN or ph > IDEAL_PH_MAX:
-        issues.append("pH di luar rentang optimal")
-        recommendations.append("Monitor pH secara rutin dan lakukan penyesuaian bertahap")
-    
-    # Check Temperature
-    if temperature < 20:
-        issues.append("suhu terlalu rendah")
-        recommendations.append("Pertimbangkan penggunaan pemanas air atau greenhouse")
-    elif temperature > 32:
-        issues.append("suhu terlalu tinggi")
-        recommendations.append("Tingkatkan aerasi dan pertimbangkan peneduh kolam")
-    elif temperature < IDEAL_TEMP_MIN or temperature > IDEAL_TEMP_MAX:
-        issues.append("suhu di luar rentang optimal")
-        recommendations.append("Monitor suhu dan sesuaikan dengan kondisi lingkungan")
-    
-    # Check Turbidity
-    if turbidity > 50:
-        issues.append("kekeruhan sangat tinggi")
-        recommendations.append("Kurangi pemberian pakan dan tingkatkan filtrasi air")
-    elif turbidity > IDEAL_TURBIDITY_MAX:
-        issues.append("kekeruhan cukup tinggi")
-        recommendations.append("Lakukan penggantian air parsial dan periksa sistem filtrasi")
-    
-    # Check Dissolved Oxygen
-    if dissolved_oxygen < 3.0:
-        issues.append("oksigen terlarut sangat rendah (berbahaya)")
-        recommendations.append("SEGERA tingkatkan aerasi dan kurangi kepadatan ikan")
-    elif dissolved_oxygen < IDEAL_DO_MIN:
-        issues.append("oksigen terlarut di bawah ideal")
-        recommendations.append("Tingkatkan aerasi dengan aerator atau kincir air")
-    
-    # Rule-based scoring for quality determination
-    score = 0
-    
-    # pH scoring (ideal: 6.5-8.5)
-    if 6.5 <= ph <= 8.5:
-        score += 25
-    elif 6.0 <= ph < 6.5 or 8.5 < ph <= 9.0:
-        score += 15
-    else:
-        score += 0
-    
-    # Temperature scoring (ideal: 25-30°C)
-    if 25 <= temperature <= 30:
-        score += 25
-    elif 22 <= temperature < 25 or 30 < temperature <= 32:
-        score += 15
-    else:
-        score += 0
-    
-    # Turbidity scoring (ideal: < 25 NTU)
-    if turbidity < 25:
-        score += 25
-    elif 25 <= turbidity < 40:
-        score += 15
-    else:
-        score += 0
-    
-    # Dissolved Oxygen scoring (ideal: > 5 mg/L)
-    if dissolved_oxygen >= 5:
-        score += 25
-    elif 4 <= dissolved_oxygen < 5:
-        score += 15
-    else:
-        score += 0
-    
-    # Determine quality based on score
-    if score >= 80:
-        quality = 'Baik'
-        confidence = min(0.95 + (score - 80) / 20 * 0.05, 0.99)  # 0.95-0.99
-    elif score >= 60:
-        quality = 'Normal'
-        confidence = 0.75 + (score - 60) / 20 * 0.10  # 0.75-0.85
-    else:
-        quality = 'Perlu Perhatian'
-        confidence = 0.85 + (score / 60) * 0.05  # 0.85-0.90
-    
-    # Calculate probabilities based on score (more realistic distribution)
-    if quality == 'Baik':
-        prob_baik = confidence
-        prob_normal = (1 - prob_baik) * 0.6
-        prob_perhatian = (1 - prob_baik) * 0.4
-    elif quality == 'Normal':
-        prob_normal = confidence
-        prob_baik = (1 - prob_normal) * 0.3
-        prob_perhatian = (1 - prob_normal) * 0.7
-    else:  # Perlu Perhatian
-        prob_perhatian = confidence
-        prob_baik = (1 - prob_perhatian) * 0.2
-        prob_normal = (1 - prob_perhatian) * 0.8
-    
-    # Normalize probabilities
-    total_prob = prob_baik + prob_normal + prob_perhatian
-    prob_baik = prob_baik / total_prob
-    prob_normal = prob_normal / total_prob
-    prob_perhatian = prob_perhatian / total_prob
-    
-    # Generate description based on quality (same format as model_utils)
-    if quality == 'Baik':
-        description = (
-            f"Kualitas air dalam kondisi OPTIMAL untuk budidaya ikan nila. "
-            f"Parameter pH ({ph:.2f}), suhu ({temperature:.1f}°C), kekeruhan ({turbidity:.1f} NTU), "
-            f"dan oksigen terlarut ({dissolved_oxygen:.2f} mg/L) berada dalam rentang ideal. "
-            f"Ikan nila dapat tumbuh dengan sehat, memiliki nafsu makan yang baik, dan sistem imun yang kuat. "
-            f"Pertumbuhan ikan optimal dengan tingkat stres minimal."
-        )
-        if not recommendations:
-            recommendations.extend([
-                "Pertahankan kualitas air saat ini",
-                "Lakukan monitoring rutin setiap hari",
-                "Berikan pakan berkualitas sesuai jadwal"
-            ])
+    Scores, classes and probabilities are computed over the whole N x 4
+    matrix by utils.water_rules, which also supplies the issue texts shared
+    with the model path.
     
-    elif quality == 'Normal':
-        description = (
-            f"Kualitas air dalam kondisi CUKUP BAIK untuk budidaya ikan nila. "
-            f"Terdapat beberapa parameter yang perlu diperhatikan: {', '.join(issues) if issues else 'parameter masih dalam batas toleransi'}. "
-            f"Ikan nila masih dapat bertahan dan tumbuh, namun mungkin mengalami sedikit stres. "
-            f"Nafsu makan ikan bisa menurun dan pertumbuhan tidak seoptimal kondisi ideal. "
-            f"Sistem kekebalan tubuh ikan mulai menurun, sehingga lebih rentan terhadap penyakit."
-        )
-        if not recommendations:
-            recommendations.extend([
-                "Monitor parameter air lebih sering (2-3x sehari)",
-                "Siapkan rencana perbaikan kualitas air",
-                "Kurangi pemberian pakan jika ikan terlihat lemas"
-            ])
-    
-    else:  # Perlu Perhatian
-        description = (
-            f"Kualitas air dalam kondisi BURUK dan MEMERLUKAN TINDAKAN SEGERA! "
-            f"Masalah yang terdeteksi: {', '.join(issues) if issues else 'beberapa parameter di luar batas toleransi'}. "
-            f"Dalam kondisi air seperti ini, ikan nila mengalami STRES BERAT dan kesehatan mereka terancam. "
-            f"Ikan akan menunjukkan gejala: nafsu makan menurun drastis atau tidak mau makan, "
-            f"bergerak lemah di permukaan air (gasping), warna tubuh memucat, "
-            f"sangat rentan terhadap penyakit dan infeksi, pertumbuhan terhenti, "
-            f"dan dapat menyebabkan KEMATIAN MASSAL jika tidak segera ditangani."
-        )
-        if not recommendations:
-            recommendations.extend([
-                "SEGERA lakukan pergantian air 30-50%",
-                "Hentikan pemberian pakan sementara",
-                "Tingkatkan aerasi secara maksimal"
-            ])
-        recommendations.append("Konsultasi dengan ahli budidaya ikan jika kondisi tidak membaik")
-    
-    # Prepare result
-    result = {
-        'quality': quality,
-        'description': description,
-        'parameters': {
-            'ph': ph,
-            'temperature': temperature,
-            'turbidity': turbidity,
-            'dissolved_oxygen': dissolved_oxygen
-        },
-        'recommendations': recommendations,
-        'confidence': round(confidence, 4),
-        'score': score,
-        'timestamp': datetime.utcnow().isoformat() + 'Z',
-        'model_used': 'Rule-based (Fallback)',
-        'issues': issues if issues else ['Tidak ada masalah signifikan'],
-        'probabilities': {
-            'Baik': round(prob_baik, 4),
-            'Normal': round(prob_normal, 4),
-            'Perlu Perhatian': round(prob_perhatian, 4)
-        }
-    }
+    Args:
+        readings: list of dicts with numeric sensor values
+        
+    Returns:
+        list: Prediction results in the same order as ``readings``
+    """
+    with metrics.stage('inference'):
+        features = water_rules.readings_to_features(readings)
+        scores = water_rules.score_features(features)
+        class_indices, confidences, probabilities = water_rules.classify_scores(scores)
+    
+    with metrics.stage('describe'):
+        return _render_fallback(readings, features, scores, class_indices, confidences, probabilities)
+
+
+def _render_fallback(readings, features, scores, class_indices, confidences, probabilities):
+    issue_codes = water_rules.evaluate_issue_codes(features)
+    
+    timestamp = datetime.utcnow().isoformat() + 'Z'
+    results = []
+    for reading, score, class_index, confidence, row_probabilities, code in zip(
+            readings, scores, class_indices, confidences, probabilities, issue_codes):
+        quality = water_rules.QUALITY_LABELS[class_index]
+        text = water_rules.render(code, quality, reading)
+        results.append({
+            'quality': quality,
+            'description': text['description'],
+            'parameters': reading,
+            'recommendations': text['recommendations'],
+            'confidence': round(float(confidence), 4),
+            'score': int(score),
+            'timestamp': timestamp,
+            'model_used': 'Rule-based (Fallback)',
+            'issues': text['issues'],
+            'probabilities': {
+                label: round(float(prob), 4)
+                for label, prob in zip(water_rules.QUALITY_LABELS, row_probabilities)
+            }
+        })
     
-    return result
+    return results
+
+
+class DegradedModeTracker:
+    """
+    Counts requests served by the rule-based fallback, per model
+    
+    Each registry name has its own state, so a broken variant neither
+    marks the default model degraded nor is cleared by the default
+    model answering. The first failure of a model after a healthy period
+    is logged once; further failures only bump its counters until that
+    model answers again.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._models = {}
+    
+    def _state(self, model_name):
+        name = model_name or DEFAULT_MODEL
+        state = self._models.get(name)
+        if state is None:
+            state = self._models.setdefault(name, {
+                'active': False, 'events': 0, 'requests': 0, 'rows': 0, 'last_error': None
+            })
+        return name, state
+    
+    def record(self, error, rows=1, model_name=None):
+        """Note a request of ``rows`` readings served by the fallback"""
+        metrics.record_predictions('fallback', rows)
+        with self._lock:
+            name, state = self._state(model_name)
+            state['requests'] += 1
+            state['rows'] += rows
+            state['last_error'] = str(error)
+            if state['active']:
+                return
+            state['active'] = True
+            state['events'] += 1
+        print(f"⚠️  Model prediction failed ({name}): {error}")
+        print("   Using fallback rule-based classification until the model recovers...")
+    
+    def recovered(self, rows=1, model_name=None):
+        """Note a successful prediction of ``rows`` readings by a model"""
+        metrics.record_predictions('model', rows)
+        state = self._models.get(model_name or DEFAULT_MODEL)
+        if state is None or not state['active']:
+            return
+        with self._lock:
+            if not state['active']:
+                return
+            state['active'] = False
+        print(f"[OK] Model '{model_name or DEFAULT_MODEL}' predictions restored "
+              f"({state['requests']} fallback requests so far)")
+    
+    def model_stats(self, model_name=None):
+        """Fallback state of one model"""
+        with self._lock:
+            return dict(self._state(model_name)[1])
+    
+    def stats(self):
+        """Totals over all models, the degraded ones and per-model state"""
+        with self._lock:
+            models = {name: dict(state) for name, state in self._models.items()}
+        return {
+            'active': any(state['active'] for state in models.values()),
+            'degraded_models': sorted(name for name, state in models.items() if state['active']),
+            'events': sum(state['events'] for state in models.values()),
+            'requests': sum(state['requests'] for state in models.values()),
+            'rows': sum(state['rows'] for state in models.values()),
+            'models': models
+        }
+
+
+_degraded_mode = DegradedModeTracker()
 
 
-def predict_batch(readings):
+def get_degraded_mode():
+    """Process-wide fallback tracker (per model)"""
+    return _degraded_mode
+
+
+def predict_batch(readings, model_name=None):
     """
     Batch prediction for multiple sensor readings
     
+    Valid readings are assembled into one feature matrix and evaluated with
+    a single model call; invalid readings are reported at their index.
+    
     Args:
         readings: list of dicts with sensor data
+        model_name: Registry name of the model to use (default model if None)
         
     Returns:
         list: List of prediction results
     """
-    results = []
+    results, valid_indices, valid_rows = _validate_readings(readings)
     
-    for reading in readings:
-        try:
-            result = predict_water_quality(reading)
-            results.append(result)
-        except Exception as e:
-            results.append({
-                'error': str(e),
-                'parameters': reading
-            })
+    if not valid_rows:
+        return results
+    
+    try:
+        model = get_model_instance(model_name)
+        probabilities = _predict_probabilities(model, model.build_feature_matrix(valid_rows))
+        predictions = model.build_results(valid_rows, probabilities)
+        
+        timestamp = datetime.utcnow().isoformat() + 'Z'
+        for prediction in predictions:
+            prediction['timestamp'] = timestamp
+            prediction['model_used'] = 'Random Forest Classifier'
+        _degraded_mode.recovered(len(valid_rows), model_name)
+        
+    except Exception as model_error:
+        # Fallback to rule-based classification if model fails
+        _degraded_mode.record(model_error, len(valid_rows), model_name)
+        predictions = _fallback_predictions(valid_rows)
+    
+    for index, prediction in zip(valid_indices, predictions):
+        results[index] = prediction
     
     return results
 
+
+def _validate_readings(readings):
+    """
+    Split readings into per-index error entries and valid numeric rows
+    
+    Args:
+        readings: list of reading dicts from the request
+        
+    Returns:
+        tuple: (results with error entries at invalid indices and None
+                elsewhere, indices of valid readings, valid rows as dicts
+                of floats)
+    """
+    with metrics.stage('validate'):
+        return _split_readings(readings)
+
+
+def _split_readings(readings):
+    results = [None] * len(readings)
+    valid_indices = []
+    valid_rows = []
+    
+    for index, reading in enumerate(readings):
+        if not isinstance(reading, dict):
+            results[index] = {
+                'index': index,
+                'error': 'Reading must be an object',
+                'parameters': reading
+            }
+            continue
+        
+        validation = validate_sensor_data(reading)
+        if not validation['valid']:
+            results[index] = {
+                'index': index,
+                'error': 'Invalid input data',
+                'details': validation['errors'],
+                'parameters': reading
+            }
+            continue
+        
+        valid_indices.append(index)
+        valid_rows.append({
+            'ph': float(reading['ph']),
+            'temperature': float(reading['temperature']),
+            'turbidity': float(reading['turbidity']),
+            'dissolved_oxygen': float(reading['dissolved_oxygen'])
+        })
+    
+    return results, valid_indices, valid_rows
+
+
+def predict_compact(readings, fields=COMPACT_FIELDS, model_name=None):
+    """
+    Column-oriented prediction without prose
+    
+    Each requested field is returned as one array over the readings, with
+    class indices into ``labels``. Text is only rendered when a text field
+    is requested, so the default fields skip text generation entirely.
+    
+    Args:
+        readings: list of reading dicts
+        fields: names from RESPONSE_FIELDS to include
+        model_name: Registry name of the model to use (default model if None)
+        
+    Returns:
+        dict: 'labels', 'model_used', one array per field and 'errors'
+              (index/error/details of invalid readings, whose class is -1
+              and whose other fields are null)
+    """
+    results, valid_indices, valid_rows = _validate_readings(readings)
+    
+    labels = list(water_rules.QUALITY_LABELS)
+    probabilities = np.empty((0, len(labels)))
+    model_used = 'Random Forest Classifier'
+    if valid_rows:
+        try:
+            model = get_model_instance(model_name)
+            probabilities = _predict_probabilities(model, model.build_feature_matrix(valid_rows))
+            labels = [model.label_mapping[c] for c in model.classes_]
+            _degraded_mode.recovered(len(valid_rows), model_name)
+        except Exception as model_error:
+            _degraded_mode.record(model_error, len(valid_rows), model_name)
+            scores = water_rules.score_features(water_rules.readings_to_features(valid_rows))
+            probabilities = water_rules.classify_scores(scores)[2]
+            model_used = 'Rule-based (Fallback)'
+    
+    class_indices = probabilities.argmax(axis=1)
+    valid_columns = {}
+    if 'class' in fields:
+        valid_columns['class'] = class_indices.tolist()
+    if 'quality' in fields:
+        valid_columns['quality'] = [labels[i] for i in class_indices]
+    if 'confidence' in fields:
+        valid_columns['confidence'] = probabilities[np.arange(len(class_indices)), class_indices].tolist()
+    if 'probabilities' in fields:
+        valid_columns['probabilities'] = probabilities.tolist()
+    
+    text_fields = [field for field in water_rules.ALL_FIELDS if field in fields]
+    if 'issue_codes' in fields or text_fields:
+        issue_codes = water_rules.evaluate_issue_codes(water_rules.readings_to_features(valid_rows))
+        if 'issue_codes' in fields:
+            valid_columns['issue_codes'] = issue_codes.tolist()
+        if text_fields:
+            with metrics.stage('describe'):
+                rendered = [
+                    water_rules.render(code, labels[class_index], row, text_fields)
+                    for code, class_index, row in zip(issue_codes, class_indices, valid_rows)
+                ]
+            for field in text_fields:
+                valid_columns[field] = [row[field] for row in rendered]
+    
+    response = {'labels': labels, 'model_used': model_used}
+    for field in fields:
+        column = [-1 if field == 'class' else None] * len(readings)
+        for index, value in zip(valid_indices, valid_columns[field]):
+            column[index] = value
+        response[field] = column
+    response['errors'] = [
+        {key: result[key] for key in ('index', 'error', 'details') if key in result}
+        for result in results if result is not None
+    ]
+    
+    return response
+
+
+def ingest_pond_readings(pond_id, readings, model_name=None):
+    """
+    Append streamed readings to a pond's rolling state and classify the latest
+    
+    Args:
+        pond_id: Pond identifier
+        readings: list of reading dicts, optionally with a 'timestamp'
+            (epoch seconds or ISO 8601; default: now)
+        model_name: Registry name of the model used for the latest reading
+        
+    Returns:
+        dict: accepted count, rejected readings (index/error), the pond's
+              rolling trend, the prediction for the latest reading and
+              forecast alerts within FORECAST_HORIZON_HOURS
+        
+    Raises:
+        InvalidTimestampError: If any reading's timestamp is invalid
+    """
+    # A bad timestamp rejects the whole request before any state changes
+    now = time.time()
+    timestamps = []
+    for index, reading in enumerate(readings):
+        try:
+            timestamps.append(parse_timestamp(
+                reading.get('timestamp', now) if isinstance(reading, dict) else now
+            ))
+        except InvalidTimestampError as e:
+            raise InvalidTimestampError(f"Reading {index}: {e}") from None
+    
+    results, valid_indices, valid_rows = _validate_readings(readings)
+    rejected = [
+        {key: result[key] for key in ('index', 'error', 'details') if key in result}
+        for result in results if result is not None
+    ]
+    
+    rows = [(row, timestamps[index]) for index, row in zip(valid_indices, valid_rows)]
+    row_indices = list(valid_indices)
+    
+    state, out_of_order = get_pond_store().append(pond_id, rows)
+    for entry in out_of_order:
+        rejected.append({'index': row_indices[entry['position']], 'error': entry['error']})
+    rejected.sort(key=lambda entry: entry['index'])
+    
+    accepted = len(rows) - len(out_of_order)
+    prediction = None
+    if accepted:
+        latest = {name: state.windows[name].last for name in POND_PARAMETERS}
+        columns = predict_compact([latest], ('class', 'quality', 'confidence'), model_name)
+        prediction = {field: columns[field][0] for field in ('class', 'quality', 'confidence')}
+        prediction['model_used'] = columns['model_used']
+    
+    forecast = get_pond_store().forecast(pond_id, Config.FORECAST_HORIZON_HOURS)
+    return {
+        'accepted': accepted,
+        'rejected': rejected,
+        'trend': get_pond_store().trend(pond_id),
+        'prediction': prediction,
+        'alerts': forecast['alerts'] if forecast is not None else []
+    }
+
+
+def predict_columns(features, columns, model_name=None):
+    """
+    Vectorized prediction for bulk columnar input
+    
+    Validation is a set of vectorized range checks and the valid rows are
+    scored with one model call; no per-row Python work is done. When the
+    model is unavailable the vectorized rule-based scorer is used instead.
+    
+    Args:
+        features: N x len(columns) float array (may be a read-only view)
+        columns: feature names of the columns
+        model_name: Registry name of the model to use (default model if None)
+        
+    Returns:
+        tuple: (class column indices with -1 for invalid rows,
+                N x n_classes probabilities with NaN for invalid rows,
+                class labels per column, name of the model used)
+    """
+    with metrics.stage('validate'):
+        valid = validate_sensor_array(features, columns)
+    
+    try:
+        model = get_model_instance(model_name)
+        if not model.is_loaded:
+            raise RuntimeError("Model not loaded")
+        order = [columns.index(FEATURE_ALIASES.get(name, name)) for name in model.feature_names]
+        labels = [model.label_mapping[c] for c in model.classes_]
+        scored = _predict_probabilities(model, features[valid][:, order]) if valid.any() else None
+        model_used = 'Random Forest Classifier'
+        _degraded_mode.recovered(int(valid.sum()), model_name)
+    except Exception as model_error:
+        _degraded_mode.record(model_error, int(valid.sum()), model_name)
+        order = [columns.index(name) for name in water_rules.FEATURES]
+        labels = list(water_rules.QUALITY_LABELS)
+        scored = None
+        if valid.any():
+            scores = water_rules.score_features(features[valid][:, order])
+            scored = water_rules.classify_scores(scores)[2]
+        model_used = 'Rule-based (Fallback)'
+    
+    probabilities = np.full((features.shape[0], len(labels)), np.nan)
+    class_indices = np.full(features.shape[0], -1, dtype=np.int8)
+    
+    if scored is not None:
+        probabilities[valid] = scored
+        class_indices[valid] = scored.argmax(axis=1)
+    
+    return class_indices, probabilities, labels, model_used
+
+
+def predict_stream(lines, block_size=1000, model_name=None):
+    """
+    Predict newline-delimited JSON readings in fixed-size blocks
+    
+    Lines are consumed lazily and each block is scored with one vectorized
+    ``predict_batch`` call, so memory stays bounded by ``block_size``
+    regardless of how many readings are streamed.
+    
+    Args:
+        lines: iterable of bytes/str lines, one JSON reading per line
+        block_size: number of readings scored per model call
+        model_name: Registry name of the model to use (default model if None)
+        
+    Yields:
+        list: Prediction results (with their global 'index') for each block
+    """
+    block = []
+    index = 0
+    
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        
+        try:
+            block.append(json.loads(line))
+        except ValueError as e:
+            block.append(_InvalidLine(f"Invalid JSON: {e}"))
+        index += 1
+        
+        if len(block) >= block_size:
+            yield _predict_block(block, index - len(block), model_name)
+            block = []
+    
+    if block:
+        yield _predict_block(block, index - len(block), model_name)
+
+
+class _InvalidLine:
+    """Placeholder for a stream line that is not valid JSON"""
+    
+    def __init__(self, error):
+        self.error = error
+
+
+def _predict_block(block, start_index, model_name=None):
+    readings = [reading for reading in block if not isinstance(reading, _InvalidLine)]
+    predictions = iter(predict_batch(readings, model_name))
+    
+    results = []
+    for offset, reading in enumerate(block):
+        if isinstance(reading, _InvalidLine):
+            result = {'error': reading.error}
+        else:
+            result = next(predictions)
+        result['index'] = start_index + offset
+        results.append(result)
+    
+    return results
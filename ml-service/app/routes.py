@@ -1,24 +1,111 @@
 """
 API Routes for ML Service
 """
-from flask import Blueprint, request, jsonify
-from app.predict import predict_water_quality, predict_batch
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from app import columnar
+from app.health import get_readiness
+from app.predict import (
+    COMPACT_FIELDS, RESPONSE_FIELDS, get_degraded_mode, ingest_pond_readings, predict_batch,
+    predict_columns, predict_compact, predict_stream, predict_water_quality
+)
 from app.validators import validate_sensor_data
+from config.config import Config
+from utils.model_utils import (
+    ModelUnavailableError, UnknownModelError, get_model_instance, get_model_registry,
+    get_models, reload_model
+)
+from utils import metrics, profiler
+from utils.pond_state import InvalidTimestampError, get_pond_store
 from datetime import datetime
+from functools import wraps
+import hmac
+import os
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 @api_bp.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """
+    Health check endpoint
+    
+    Always 200 for existing clients; 'ready' tells whether predictions
+    come from the warmed-up model (see /api/health/ready).
+    """
     return jsonify({
         'status': 'healthy',
         'service': 'NilaSense ML Service',
         'version': '1.0.0',
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': datetime.utcnow().isoformat(),
+        'ready': get_readiness().status(warm=False)['ready']
+    }), 200
+
+
+@api_bp.route('/health/live', methods=['GET'])
+def health_live():
+    """Liveness: the process is up and answering requests"""
+    return jsonify({
+        'status': 'alive',
+        'pid': os.getpid(),
+        'uptime_seconds': round(get_readiness().uptime(), 3)
     }), 200
 
 
+@api_bp.route('/health/ready', methods=['GET'])
+def health_ready():
+    """
+    Readiness: 200 once the model is loaded and warmed up through every
+    prediction path, 503 before that and while the fallback is serving
+    """
+    status = get_readiness().status()
+    return jsonify({
+        'status': 'ready' if status['ready'] else 'not_ready',
+        **status
+    }), 200 if status['ready'] else 503
+
+
+def _requested_fields():
+    """
+    Fields requested through ``?compact=true`` or ``?fields=a,b``
+    
+    Returns:
+        tuple: Field names, or None for the full (verbose) response
+        
+    Raises:
+        ValueError: If an unknown field is requested
+    """
+    fields = request.args.get('fields')
+    if fields is None:
+        compact = request.args.get('compact', '').lower() in ('1', 'true', 'yes')
+        return COMPACT_FIELDS if compact else None
+    
+    fields = tuple(field.strip() for field in fields.split(',') if field.strip())
+    unknown = [field for field in fields if field not in RESPONSE_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(RESPONSE_FIELDS)}"
+        )
+    return fields or COMPACT_FIELDS
+
+
+def _requested_model(source):
+    """
+    Model name for a request from its 'model' or 'pond_id' field
+    
+    Args:
+        source: Request body dict or query arguments
+        
+    Returns:
+        str: Registry model name
+        
+    Raises:
+        UnknownModelError: If the named model has no artifact directory
+    """
+    models = get_models()
+    name = models.resolve(model=source.get('model'), pond_id=source.get('pond_id'))
+    models.registry(name)
+    return name
+
+
 @api_bp.route('/predict', methods=['POST'])
 def predict():
     """
@@ -30,11 +117,25 @@ def predict():
         "temperature": 28.5,
         "turbidity": 15.3,
         "dissolved_oxygen": 6.8,
-        "pond_id": 1 (optional)
+        "pond_id": 1 (optional, routes to the pond's model),
+        "model": "tarpaulin" (optional, wins over pond_id)
     }
+    
+    Query Parameters:
+        compact=true: return only class, confidence and probabilities
+        fields=a,b: return only the listed fields (see RESPONSE_FIELDS)
     """
     try:
-        data = request.get_json()
+        fields = _requested_fields()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        with metrics.stage('parse'):
+            data = request.get_json()
         
         if not data:
             return jsonify({
@@ -43,7 +144,8 @@ def predict():
             }), 400
         
         # Validate input
-        validation = validate_sensor_data(data)
+        with metrics.stage('validate'):
+            validation = validate_sensor_data(data)
         if not validation['valid']:
             return jsonify({
                 'success': False,
@@ -51,13 +153,28 @@ def predict():
                 'details': validation['errors']
             }), 400
         
+        try:
+            model_name = _requested_model(data)
+        except UnknownModelError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
         # Make prediction
-        result = predict_water_quality(data)
+        if fields is not None:
+            columns = predict_compact([data], fields, model_name)
+            result = {field: columns[field][0] for field in fields}
+            result['model_used'] = columns['model_used']
+        else:
+            result = predict_water_quality(data, model_name)
         
-        return jsonify({
-            'success': True,
-            'data': result
-        }), 200
+        with metrics.stage('serialize'):
+            response = jsonify({
+                'success': True,
+                'data': result
+            })
+        return response, 200
         
     except Exception as e:
         return jsonify({
@@ -81,11 +198,25 @@ def predict_batch_endpoint():
                 "dissolved_oxygen": 6.8
             },
             // ... more readings
-        ]
+        ],
+        "pond_id": 1 / "model": "tarpaulin" (optional, one model per batch)
     }
+    
+    Query Parameters:
+        compact=true / fields=a,b: column-oriented response with one array
+        per field instead of one verbose object per reading
     """
     try:
-        data = request.get_json()
+        fields = _requested_fields()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        with metrics.stage('parse'):
+            data = request.get_json()
         
         if not data or 'readings' not in data:
             return jsonify({
@@ -101,16 +232,36 @@ def predict_batch_endpoint():
                 'error': 'Readings must be an array'
             }), 400
         
+        try:
+            model_name = _requested_model(data)
+        except UnknownModelError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        if fields is not None:
+            columns = predict_compact(readings, fields, model_name)
+            columns['total'] = len(readings)
+            with metrics.stage('serialize'):
+                response = jsonify({
+                    'success': True,
+                    'data': columns
+                })
+            return response, 200
+        
         # Make batch predictions
-        results = predict_batch(readings)
+        results = predict_batch(readings, model_name)
         
-        return jsonify({
-            'success': True,
-            'data': {
-                'predictions': results,
-                'total': len(results)
-            }
-        }), 200
+        with metrics.stage('serialize'):
+            response = jsonify({
+                'success': True,
+                'data': {
+                    'predictions': results,
+                    'total': len(results)
+                }
+            })
+        return response, 200
         
     except Exception as e:
         return jsonify({
@@ -119,20 +270,212 @@ def predict_batch_endpoint():
         }), 500
 
 
+@api_bp.route('/predict/stream', methods=['POST'])
+def predict_stream_endpoint():
+    """
+    Streaming batch prediction (NDJSON in, NDJSON out)
+    
+    Request Body (application/x-ndjson), one reading per line:
+        {"ph": 7.2, "temperature": 28.5, "turbidity": 15.3, "dissolved_oxygen": 6.8}
+        {"ph": 6.8, "temperature": 27.0, "turbidity": 22.0, "dissolved_oxygen": 5.5}
+    
+    Response: one prediction (or error) per line, each with its 'index',
+    streamed as blocks of readings are scored. The model is chosen with
+    the ``model`` or ``pond_id`` query parameter.
+    """
+    block_size = Config.STREAM_BLOCK_SIZE
+    try:
+        model_name = _requested_model(request.args)
+    except UnknownModelError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    def generate():
+        for results in predict_stream(request.stream, block_size, model_name):
+            with metrics.stage('serialize'):
+                chunk = ''.join(current_app.json.dumps(result) + '\n' for result in results)
+            yield chunk
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@api_bp.route('/predict/columnar', methods=['POST'])
+def predict_columnar_endpoint():
+    """
+    Bulk prediction over a columnar binary payload
+    
+    Request/response layouts are documented in app/columnar.py: raw
+    little-endian float64 columns (ph, temperature, turbidity,
+    dissolved_oxygen) in, int8 class indices and float64 probability
+    columns out. Class names are returned in the X-Class-Labels header.
+    The model is chosen with the ``model`` or ``pond_id`` query parameter.
+    """
+    try:
+        model_name = _requested_model(request.args)
+        with metrics.stage('parse'):
+            features = columnar.decode_readings(request.get_data(cache=False))
+    except UnknownModelError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except columnar.ColumnarFormatError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid columnar payload: {e}'
+        }), 400
+    
+    try:
+        class_indices, probabilities, labels, model_used = predict_columns(
+            features, columnar.COLUMNS, model_name
+        )
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    
+    with metrics.stage('serialize'):
+        body = columnar.encode_predictions(class_indices, probabilities)
+    return Response(body, mimetype=columnar.CONTENT_TYPE, headers={
+        'X-Class-Labels': ','.join(labels),
+        'X-Model-Used': model_used,
+        'X-Invalid-Rows': str(int((class_indices < 0).sum()))
+    })
+
+
+@api_bp.route('/ponds/<pond_id>/readings', methods=['POST'])
+def ingest_pond_readings_endpoint(pond_id):
+    """
+    Append readings to a pond's rolling state
+    
+    Request Body (a single reading or a list under "readings"):
+    {
+        "readings": [
+            {
+                "ph": 7.2,
+                "temperature": 28.5,
+                "turbidity": 15.3,
+                "dissolved_oxygen": 6.8,
+                "timestamp": "2025-01-01T20:00:00Z" (optional, default now)
+            }
+        ]
+    }
+    
+    Readings must arrive in time order per pond; older ones are rejected.
+    Timestamps are epoch seconds, epoch milliseconds or ISO 8601 between
+    1970 and 9999; any other timestamp fails the whole request with 400.
+    The response carries the updated trend and the prediction for the
+    latest reading (with the pond's routed model).
+    """
+    with metrics.stage('parse'):
+        data = request.get_json(silent=True)
+    if not data:
+        return jsonify({
+            'success': False,
+            'error': 'No data provided'
+        }), 400
+    
+    readings = data.get('readings', [data]) if isinstance(data, dict) else data
+    if not isinstance(readings, list):
+        return jsonify({
+            'success': False,
+            'error': 'Readings must be an array'
+        }), 400
+    
+    try:
+        model_name = get_models().resolve(pond_id=pond_id)
+        get_models().registry(model_name)
+    except UnknownModelError:
+        model_name = None
+    
+    try:
+        result = ingest_pond_readings(pond_id, readings, model_name)
+    except InvalidTimestampError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    return jsonify({
+        'success': True,
+        'data': result
+    }), 200
+
+
+@api_bp.route('/ponds/<pond_id>/trend', methods=['GET'])
+def pond_trend(pond_id):
+    """Rolling mean, min/max and slope per parameter of a pond's recent readings"""
+    trend = get_pond_store().trend(pond_id)
+    if trend is None:
+        return jsonify({
+            'success': False,
+            'error': f'No readings for pond {pond_id}'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': trend
+    }), 200
+
+
+@api_bp.route('/ponds/<pond_id>/forecast', methods=['GET'])
+def pond_forecast(pond_id):
+    """
+    Dissolved oxygen and temperature forecast for a pond
+    
+    Query Parameters:
+        hours: look-ahead after the latest reading (default
+            FORECAST_HORIZON_HOURS)
+    
+    Alerts list the thresholds (DO 5.0 / 3.0 mg/L, temperature 20 / 32°C)
+    the forecast crosses within that window.
+    """
+    try:
+        hours = float(request.args.get('hours', Config.FORECAST_HORIZON_HOURS))
+    except ValueError:
+        hours = -1
+    if not 0 < hours <= Config.FORECAST_MAX_HORIZON_HOURS:
+        return jsonify({
+            'success': False,
+            'error': f'hours must be between 0 and {Config.FORECAST_MAX_HORIZON_HOURS:g}'
+        }), 400
+    
+    forecast = get_pond_store().forecast(pond_id, hours)
+    if forecast is None:
+        return jsonify({
+            'success': False,
+            'error': f'No readings for pond {pond_id}'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'data': forecast
+    }), 200
+
+
 @api_bp.route('/model/info', methods=['GET'])
 def model_info():
-    """Get information about the loaded model"""
+    """Get information about the loaded model (``?model=`` / ``?pond_id=`` to pick one)"""
     try:
-        from utils.model_utils import get_model_instance
-        
-        model = get_model_instance()
-        info = model.get_model_info()
+        try:
+            info = get_model_instance(_requested_model(request.args)).get_model_info()
+        except UnknownModelError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 404
+        except ModelUnavailableError as e:
+            info = {'error': str(e)}
         
         if 'error' in info:
             # Model not loaded, return basic info
             return jsonify({
                 'success': False,
                 'error': 'Model not loaded',
+                'details': info['error'],
                 'fallback_info': {
                     'model_type': 'Classification',
                     'algorithm': 'Rule-based (Fallback)',
@@ -154,6 +497,157 @@ def model_info():
         }), 500
 
 
+def admin_token_valid() -> bool:
+    """
+    Whether the request carries Config.ADMIN_TOKEN
+    
+    The token is sent as ``Authorization: Bearer <token>`` or in the
+    ``X-Admin-Token`` header; always False while no token is configured.
+    """
+    if not Config.ADMIN_TOKEN:
+        return False
+    token = request.headers.get('X-Admin-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        token = authorization[len('Bearer '):]
+    return hmac.compare_digest(token.encode(), Config.ADMIN_TOKEN.encode())
+
+
+def admin_required(view):
+    """
+    Guard an admin endpoint with Config.ADMIN_TOKEN
+    
+    Admin endpoints are disabled (403) while no token is configured and
+    reject requests without the token (401), see ``admin_token_valid``.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not Config.ADMIN_TOKEN:
+            return jsonify({
+                'success': False,
+                'error': 'Admin endpoints are disabled (ADMIN_TOKEN not set)'
+            }), 403
+        
+        if not admin_token_valid():
+            return jsonify({
+                'success': False,
+                'error': 'Invalid admin token'
+            }), 401
+        
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@api_bp.route('/model/reload', methods=['POST'])
+@admin_required
+def model_reload():
+    """
+    Load the model files again and swap the new model in atomically
+    
+    The new model is warmed with a canary prediction first; on failure
+    the current model keeps serving. Only reloads the worker process that
+    handles the request (use MODEL_WATCH_ENABLED to reload all workers).
+    Pick a named model with ``?model=``.
+    """
+    try:
+        name = _requested_model(request.args)
+    except UnknownModelError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 404
+    
+    current = get_model_registry(name).peek()
+    previous = current.version if current is not None else None
+    try:
+        model = reload_model(name=name)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Reload failed, keeping version {previous}: {e}'
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'data': {
+            'previous_version': previous,
+            'version': model.version,
+            'loaded_at': model.loaded_at
+        }
+    }), 200
+
+
+@api_bp.route('/admin/profile', methods=['POST'])
+@admin_required
+def admin_profile():
+    """
+    Sample the stacks of this worker process for a few seconds
+    
+    Query Parameters:
+        seconds: profiling window (default 10, max PROFILE_MAX_SECONDS)
+        interval_ms: sampling interval (default 5)
+        format=folded: return the collapsed stacks as text/plain (for
+            flamegraph.pl / speedscope) instead of a JSON summary
+    
+    The collapsed-stack file is also written to PROFILE_OUTPUT_DIR. Only
+    the worker handling this request is profiled; one profile runs at a
+    time per worker (409 otherwise).
+    """
+    try:
+        seconds = float(request.args.get('seconds', 10))
+        interval_ms = float(request.args.get('interval_ms', 5))
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'seconds and interval_ms must be numbers'
+        }), 400
+    if not 0 < seconds <= Config.PROFILE_MAX_SECONDS or not 1 <= interval_ms <= 1000:
+        return jsonify({
+            'success': False,
+            'error': f'seconds must be in (0, {Config.PROFILE_MAX_SECONDS:g}] and interval_ms in [1, 1000]'
+        }), 400
+    
+    result = profiler.profile(seconds, interval_ms / 1000, Config.PROFILE_OUTPUT_DIR)
+    if result is None:
+        return jsonify({
+            'success': False,
+            'error': 'A profile is already running in this worker'
+        }), 409
+    
+    collapsed = result.pop('collapsed')
+    if request.args.get('format') == 'folded':
+        return Response(collapsed, mimetype='text/plain', headers={'X-Profile-Path': result['path']})
+    result['top_stacks'] = collapsed.splitlines()[:10]
+    return jsonify({
+        'success': True,
+        'data': result
+    }), 200
+
+
+@api_bp.route('/stats', methods=['GET'])
+def stats():
+    """Runtime statistics of the worker process serving this request"""
+    from utils.system_stats import get_memory_usage
+    from utils.batching import get_batcher
+    from utils.prediction_cache import get_prediction_cache
+    
+    data = {
+        'memory': get_memory_usage(),
+        'models': get_models().stats()
+    }
+    if Config.MICRO_BATCHING_ENABLED:
+        data['batching'] = get_batcher().stats()
+    if Config.PREDICTION_CACHE_ENABLED:
+        data['cache'] = get_prediction_cache().stats()
+    data['fallback'] = get_degraded_mode().stats()
+    data['ponds'] = get_pond_store().stats()
+    
+    return jsonify({
+        'success': True,
+        'data': data
+    }), 200
+
+
 # Error handlers
 @api_bp.errorhandler(404)
 def not_found(error):
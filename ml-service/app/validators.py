@@ -1,6 +1,16 @@
 """
 Input Validation for Sensor Data
 """
+import numpy as np
+
+# Accepted (min, max) range per sensor field, inclusive
+# (same limits as validate_sensor_data)
+SENSOR_RANGES = {
+    'ph': (0, 14),
+    'temperature': (-10, 50),       # °C, wide for safety
+    'turbidity': (0, 1000),         # NTU
+    'dissolved_oxygen': (0, 20),    # mg/L
+}
 
 def validate_sensor_data(data):
     """
@@ -15,7 +25,7 @@ def validate_sensor_data(data):
     errors = []
     
     # Required fields
-    required_fields = ['ph', 'temperature', 'turbidity', 'dissolved_oxygen']
+    required_fields = list(SENSOR_RANGES)
     
     for field in required_fields:
         if field not in data:
@@ -89,3 +99,23 @@ def validate_batch_data(readings):
         'errors': all_errors
     }
 
+
+
+def validate_sensor_array(features, feature_names):
+    """
+    Vectorized range check of a feature matrix
+    
+    Args:
+        features: N x len(feature_names) float array
+        feature_names: column names, keys of SENSOR_RANGES
+        
+    Returns:
+        np.ndarray: boolean mask of valid rows (NaN/inf are invalid)
+    """
+    valid = np.ones(features.shape[0], dtype=bool)
+    for column, name in enumerate(feature_names):
+        low, high = SENSOR_RANGES[name]
+        values = features[:, column]
+        # NaN compares False, so it is rejected here as well
+        valid &= (values >= low) & (values <= high)
+    return valid
@@ -0,0 +1,20 @@
+"""
+NilaSense ML Service - ASGI Entry Point
+
+Serves the same API as run.py under an ASGI server, e.g.:
+    uvicorn asgi:app --host 0.0.0.0 --port 5002 --workers 2
+"""
+from dotenv import load_dotenv
+from app import create_app
+from app.asgi import ASGIAdapter
+from config.config import Config
+
+# Load environment variables
+load_dotenv()
+
+# Flask app wrapped for ASGI; handlers run in a bounded thread pool
+app = ASGIAdapter(
+    create_app(),
+    max_workers=Config.ASGI_MAX_WORKERS,
+    max_body_bytes=Config.ASGI_MAX_BODY_BYTES
+)
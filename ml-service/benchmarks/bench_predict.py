@@ -0,0 +1,104 @@
+"""
+Latency benchmark for /api/predict
+
+Compares the current single-pass predict path (class derived from the
+argmax of predict_proba) against the previous two-pass path that called
+both predict() and predict_proba() on the forest.
+
+Usage:
+    python benchmarks/bench_predict.py --iterations 500
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+import numpy as np
+
+# Add service root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from config.config import Config
+from utils.model_utils import WaterQualityModel
+
+
+PAYLOAD = {
+    'ph': 7.2,
+    'temperature': 28.5,
+    'turbidity': 15.3,
+    'dissolved_oxygen': 6.8
+}
+
+
+def _two_pass_predict_proba(self, input_data):
+    """Previous behaviour: walk the forest once for predict, once for predict_proba"""
+    input_scaled = self.scaler.transform(input_data)
+    self.model.predict(input_scaled)
+    return self.model.predict_proba(input_scaled)
+
+
+def measure(client, iterations, warmup=20):
+    """
+    Time POST /api/predict requests
+    
+    Returns:
+        dict: p50/p99/mean latency in milliseconds
+    """
+    body = json.dumps(PAYLOAD)
+    for _ in range(warmup):
+        client.post('/api/predict', data=body, content_type='application/json')
+    
+    latencies = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        response = client.post('/api/predict', data=body, content_type='application/json')
+        latencies[i] = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.data
+    
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 3),
+        'mean_ms': round(float(latencies.mean()), 3),
+        'iterations': iterations
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /api/predict latency')
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+    
+    # Every request repeats the same reading; measure the model, not the cache
+    Config.PREDICTION_CACHE_ENABLED = False
+    
+    app = create_app()
+    client = app.test_client()
+    
+    with mock.patch.object(WaterQualityModel, 'predict_proba_array', _two_pass_predict_proba):
+        two_pass = measure(client, args.iterations)
+    single_pass = measure(client, args.iterations)
+    
+    results = {
+        'endpoint': '/api/predict',
+        'two_pass': two_pass,
+        'single_pass': single_pass,
+        'p50_speedup': round(two_pass['p50_ms'] / single_pass['p50_ms'], 2),
+        'p99_speedup': round(two_pass['p99_ms'] / single_pass['p99_ms'], 2)
+    }
+    
+    print(f"{'path':<14}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    for name in ('two_pass', 'single_pass'):
+        print(f"{name:<14}{results[name]['p50_ms']:>12.3f}{results[name]['p99_ms']:>12.3f}")
+    print(f"speedup       {results['p50_speedup']:>11.2f}x{results['p99_speedup']:>11.2f}x")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,407 @@
+"""
+Benchmark suite for the ML service
+
+Measures, with a fixed seed and the prediction cache disabled:
+
+- model_load: WaterQualityModel.load_model() time per artifact format
+- single_predict: WaterQualityModel.predict() latency per inference backend
+- batch: predict_batch() throughput at 1 / 100 / 10k rows
+- memory: RSS / shared / private memory of a process with the model loaded
+- http: POST /api/predict through the Flask test client, or against a
+  local gunicorn (--gunicorn) with concurrent clients, including the
+  memory of every worker
+
+Results are written as JSON together with the commit and library
+versions, so two runs can be compared with --baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --gunicorn --workers 2 --output bench.json
+    python benchmarks/run_benchmarks.py --baseline main.json --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+# Add service root to path
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_ROOT)
+
+from config.config import Config
+
+PAYLOAD = {
+    'ph': 7.2,
+    'temperature': 28.5,
+    'turbidity': 15.3,
+    'dissolved_oxygen': 6.8
+}
+
+
+def random_readings(n, seed=42):
+    """Readings spread over the realistic sensor ranges"""
+    rng = np.random.default_rng(seed)
+    columns = np.column_stack([
+        rng.uniform(5.5, 9.5, n),
+        rng.uniform(20, 35, n),
+        rng.uniform(0, 60, n),
+        rng.uniform(1, 10, n)
+    ])
+    return [
+        dict(zip(('ph', 'temperature', 'turbidity', 'dissolved_oxygen'), row))
+        for row in columns.tolist()
+    ]
+
+
+def summarize(latencies_s):
+    """p50/p99/mean/max of durations in seconds, reported in ms"""
+    latencies = np.asarray(latencies_s) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(latencies, 50)), 4),
+        'p99_ms': round(float(np.percentile(latencies, 99)), 4),
+        'mean_ms': round(float(latencies.mean()), 4),
+        'max_ms': round(float(latencies.max()), 4),
+        'iterations': len(latencies)
+    }
+
+
+def bench_model_load(model_dir, repeats):
+    """Median load time per artifact format"""
+    from utils.model_utils import WaterQualityModel
+
+    results = {}
+    for model_format in ('native', 'pickle'):
+        timings = []
+        for _ in range(repeats):
+            model = WaterQualityModel(model_dir=model_dir, model_format=model_format)
+            start = time.perf_counter()
+            loaded = model.load_model()
+            timings.append(time.perf_counter() - start)
+            if not loaded:
+                break
+        if loaded:
+            results[model_format] = {**summarize(timings), 'variant': model.served_variant}
+    return results
+
+
+def bench_single_predict(model_dir, backends, iterations, warmup=20):
+    """
+    WaterQualityModel.predict() latency per requested inference backend
+
+    Results are keyed by the requested backend and record the one that
+    actually served (``active_backend``): a backend that falls back, e.g.
+    lookup without a table, must not overwrite the numbers of the
+    backend it fell back to.
+    """
+    from utils.model_utils import WaterQualityModel
+
+    results = {}
+    for backend in backends:
+        model = WaterQualityModel(model_dir=model_dir, backend=backend)
+        if not model.load_model():
+            continue
+        for _ in range(warmup):
+            model.predict(**PAYLOAD)
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            model.predict(**PAYLOAD)
+            timings.append(time.perf_counter() - start)
+        if model.active_backend != backend:
+            print(f"[WARNING] Backend '{backend}' fell back to '{model.active_backend}'")
+        results[backend] = {**summarize(timings), 'active_backend': model.active_backend}
+    return results
+
+
+def bench_batch(sizes, repeats, seed):
+    """predict_batch() throughput with the configured model"""
+    from app.predict import predict_batch
+
+    results = {}
+    for size in sizes:
+        readings = random_readings(size, seed)
+        predict_batch(readings[:10])
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            predictions = predict_batch(readings)
+            timings.append(time.perf_counter() - start)
+        assert len(predictions) == size
+        best = min(timings)
+        results[str(size)] = {
+            **summarize(timings),
+            'rows_per_s': round(size / float(np.median(timings)), 1),
+            'best_rows_per_s': round(size / best, 1),
+            'model_used': predictions[0].get('model_used')
+        }
+    return results
+
+
+def bench_memory():
+    """Memory of this process with the model loaded"""
+    from utils.model_utils import get_model_instance
+    from utils.system_stats import get_memory_usage
+
+    model = get_model_instance()
+    return {**get_memory_usage(), 'model_footprint_bytes': model.footprint_bytes}
+
+
+def bench_http_client(iterations, warmup=20):
+    """POST /api/predict through the Flask test client (single thread)"""
+    from app import create_app
+
+    client = create_app().test_client()
+    body = json.dumps(PAYLOAD)
+    for _ in range(warmup):
+        client.post('/api/predict', data=body, content_type='application/json')
+
+    timings = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.post('/api/predict', data=body, content_type='application/json')
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.data
+    elapsed = time.perf_counter() - started
+    return {**summarize(timings), 'requests_per_s': round(iterations / elapsed, 1)}
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url, timeout):
+    import requests
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def bench_http_gunicorn(workers, threads, concurrency, seconds, startup_timeout=60):
+    """
+    Load a local gunicorn with ``concurrency`` keep-alive clients
+
+    Returns:
+        dict: latency percentiles, requests/s, errors, gunicorn startup
+              time and the memory of each worker (from /api/stats)
+    """
+    import requests
+
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+        PREDICTION_CACHE_ENABLED='False',
+        MODEL_WATCH_ENABLED='False'
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', 'run:app'],
+        cwd=SERVICE_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not _wait_for(f'{base_url}/api/health', startup_timeout):
+            raise RuntimeError('gunicorn did not start')
+        startup_s = time.perf_counter() - started
+
+        timings = [[] for _ in range(concurrency)]
+        errors = [0] * concurrency
+        deadline = time.perf_counter() + seconds
+
+        def client(index):
+            session = requests.Session()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    ok = session.post(f'{base_url}/api/predict', json=PAYLOAD, timeout=10).status_code == 200
+                except requests.RequestException:
+                    ok = False
+                timings[index].append(time.perf_counter() - start)
+                errors[index] += not ok
+
+        load_started = time.perf_counter()
+        clients = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - load_started
+        all_timings = [t for per_client in timings for t in per_client]
+
+        # /api/stats reports the worker that answers; poll until all are seen
+        worker_memory = {}
+        for _ in range(workers * 20):
+            memory = requests.get(f'{base_url}/api/stats', timeout=5).json()['data']['memory']
+            worker_memory[memory['pid']] = memory
+            if len(worker_memory) == workers:
+                break
+
+        return {
+            **summarize(all_timings),
+            'requests_per_s': round(len(all_timings) / elapsed, 1),
+            'errors': sum(errors),
+            'workers': workers,
+            'threads': threads,
+            'concurrency': concurrency,
+            'startup_s': round(startup_s, 3),
+            'worker_memory': list(worker_memory.values())
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def environment():
+    """Commit and versions the results were measured with"""
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=SERVICE_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'inference_backend': Config.INFERENCE_BACKEND,
+        'model_format': Config.MODEL_FORMAT,
+        'model_variant': Config.MODEL_VARIANT
+    }
+
+
+def _flatten(results, prefix=''):
+    for key, value in results.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            yield from _flatten(value, f'{name}.')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(results, baseline, tolerance=0.1):
+    """
+    Compare latency (``*_ms``, lower is better) and throughput
+    (``*_per_s``, higher is better) figures against a baseline run
+
+    Args:
+        results: 'results' section of this run
+        baseline: 'results' section of the baseline run
+        tolerance: Relative change counted as a regression
+
+    Returns:
+        list: dicts with metric, baseline, current, change and regression
+    """
+    previous = dict(_flatten(baseline))
+    rows = []
+    for name, value in _flatten(results):
+        lower_is_better = name.endswith('_ms')
+        if not (lower_is_better or name.endswith('_per_s')) or not previous.get(name):
+            continue
+        change = (value - previous[name]) / previous[name]
+        regression = change > tolerance if lower_is_better else change < -tolerance
+        rows.append({
+            'metric': name,
+            'baseline': previous[name],
+            'current': value,
+            'change': round(change, 4),
+            'regression': regression
+        })
+    return rows
+
+
+def _parse_sizes(text):
+    return [int(size) for size in text.split(',') if size]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the ML service benchmark suite')
+    parser.add_argument('--model-dir', default='models/trained')
+    parser.add_argument('--iterations', type=int, default=500,
+                        help='Timed single predictions / HTTP requests')
+    parser.add_argument('--batch-sizes', type=_parse_sizes, default=[1, 100, 10000])
+    parser.add_argument('--batch-repeats', type=int, default=5)
+    parser.add_argument('--load-repeats', type=int, default=5)
+    parser.add_argument('--backends', default='sklearn,flat')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--gunicorn', action='store_true',
+                        help='Also load test a local gunicorn')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Earlier JSON output to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='Relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    os.chdir(SERVICE_ROOT)
+    # Repeated readings would otherwise be answered from the cache
+    Config.PREDICTION_CACHE_ENABLED = False
+    Config.MODEL_WATCH_ENABLED = False
+
+    results = {
+        'model_load': bench_model_load(args.model_dir, args.load_repeats),
+        'single_predict': bench_single_predict(
+            args.model_dir, args.backends.split(','), args.iterations
+        ),
+        'batch': bench_batch(args.batch_sizes, args.batch_repeats, args.seed),
+        'memory': bench_memory(),
+        'http': {'test_client': bench_http_client(args.iterations)}
+    }
+    if args.gunicorn:
+        results['http']['gunicorn'] = bench_http_gunicorn(
+            args.workers, args.threads, args.concurrency, args.seconds
+        )
+
+    report = {'environment': environment(), 'results': results}
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['comparison'] = compare(results, json.load(f)['results'], args.tolerance)
+        regressions = [row for row in report['comparison'] if row['regression']]
+        for row in report['comparison']:
+            flag = 'REGRESSION' if row['regression'] else ''
+            print(f"{row['metric']:<48}{row['baseline']:>12.4g}{row['current']:>12.4g}"
+                  f"{row['change'] * 100:>+9.1f}%  {flag}")
+        status = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+        print(f"Results written to {args.output}")
+    else:
+        print(text)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -19,6 +19,73 @@ class Config:
     MODEL_PATH = os.getenv('MODEL_PATH', 'models/trained/water_quality_model.pkl')
     SCALER_PATH = os.getenv('SCALER_PATH', 'models/trained/scaler.pkl')
     
+    # Inference backend: 'sklearn' (default), 'flat' (NumPy flat-array forest)
+    # or 'lookup' (precomputed threshold grid in lookup_table/ of the served model)
+    INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'sklearn')
+    # Batches larger than this use sklearn's multi-threaded trees instead
+    FLAT_BACKEND_MAX_ROWS = int(os.getenv('FLAT_BACKEND_MAX_ROWS', 256))
+    
+    # Artifact format: 'auto' (native when present), 'native' or 'pickle'
+    MODEL_FORMAT = os.getenv('MODEL_FORMAT', 'auto')
+    # Model variant: 'auto' (distilled student when present), 'distilled' or 'full'
+    MODEL_VARIANT = os.getenv('MODEL_VARIANT', 'auto')
+    
+    # Named models (models/variants/<name>/) for per-pond routing
+    MODEL_VARIANTS_DIR = os.getenv('MODEL_VARIANTS_DIR', 'models/variants')
+    # Loaded models beyond this footprint are unloaded least recently used first
+    MODEL_MEMORY_CAP_MB = float(os.getenv('MODEL_MEMORY_CAP_MB', 512))
+    # pond_id -> model name, e.g. "1:tarpaulin,2:tarpaulin,3:earthen"
+    POND_MODEL_ROUTES = dict(
+        (pond.strip(), name.strip())
+        for pond, name in (
+            route.split(':', 1) for route in os.getenv('POND_MODEL_ROUTES', '').split(',') if ':' in route
+        )
+    )
+    
+    # Retry a failed model load after 1s, 2s, 4s ... up to the maximum
+    MODEL_LOAD_RETRY_BASE_SECONDS = float(os.getenv('MODEL_LOAD_RETRY_BASE_SECONDS', 1.0))
+    MODEL_LOAD_RETRY_MAX_SECONDS = float(os.getenv('MODEL_LOAD_RETRY_MAX_SECONDS', 60.0))
+    # /api/health/ready re-runs a failed warm-up at most this often
+    READINESS_RETRY_SECONDS = float(os.getenv('READINESS_RETRY_SECONDS', 5.0))
+    
+    # Hot reload: poll models/trained and swap in a changed artifact
+    MODEL_WATCH_ENABLED = os.getenv('MODEL_WATCH_ENABLED', 'False').lower() == 'true'
+    MODEL_WATCH_INTERVAL_SECONDS = float(os.getenv('MODEL_WATCH_INTERVAL_SECONDS', 5.0))
+    
+    # Prometheus metrics at /metrics (needs prometheus_client). Under gunicorn
+    # PROMETHEUS_MULTIPROC_DIR aggregates samples across workers
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # Token for admin endpoints (e.g. POST /api/model/reload); empty disables them
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+    # Sampling profiler (POST /api/admin/profile): collapsed-stack output
+    PROFILE_OUTPUT_DIR = os.getenv('PROFILE_OUTPUT_DIR', 'profiles')
+    PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 60))
+    
+    # ASGI serving (asgi.py): threads running request handlers per process
+    ASGI_MAX_WORKERS = int(os.getenv('ASGI_MAX_WORKERS', 4))
+    # Largest request body accepted under ASGI (413 above it); 0 disables
+    ASGI_MAX_BODY_BYTES = int(os.getenv('ASGI_MAX_BODY_BYTES', 64 * 1024 * 1024))
+    
+    # Micro-batching of concurrent /api/predict calls into one forest call
+    MICRO_BATCHING_ENABLED = os.getenv('MICRO_BATCHING_ENABLED', 'False').lower() == 'true'
+    MICRO_BATCH_WINDOW_MS = float(os.getenv('MICRO_BATCH_WINDOW_MS', 2.0))
+    MICRO_BATCH_MAX_ROWS = int(os.getenv('MICRO_BATCH_MAX_ROWS', 256))
+    
+    # Prediction cache keyed on readings rounded to sensor precision. Off by
+    # default: cached requests are scored on the rounded readings
+    PREDICTION_CACHE_ENABLED = os.getenv('PREDICTION_CACHE_ENABLED', 'False').lower() == 'true'
+    PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv('PREDICTION_CACHE_MAX_ENTRIES', 10000))
+    # Larger batch/stream/columnar calls bypass the cache (raw readings)
+    PREDICTION_CACHE_MAX_ROWS = int(os.getenv('PREDICTION_CACHE_MAX_ROWS', 16))
+    PREDICTION_CACHE_TTL_SECONDS = float(os.getenv('PREDICTION_CACHE_TTL_SECONDS', 3600))
+    PREDICTION_CACHE_DECIMALS = {
+        'ph': int(os.getenv('PREDICTION_CACHE_PH_DECIMALS', 2)),
+        'temperature': int(os.getenv('PREDICTION_CACHE_TEMPERATURE_DECIMALS', 1)),
+        'turbidity': int(os.getenv('PREDICTION_CACHE_TURBIDITY_DECIMALS', 1)),
+        'dissolved_oxygen': int(os.getenv('PREDICTION_CACHE_DO_DECIMALS', 2)),
+    }
+    
     # Logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'logs/app.log')
@@ -33,6 +100,20 @@ class Config:
     # Model parameters
     CONFIDENCE_THRESHOLD = float(os.getenv('CONFIDENCE_THRESHOLD', 0.7))
     MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 100))
+    # Readings scored per model call by /api/predict/stream
+    STREAM_BLOCK_SIZE = int(os.getenv('STREAM_BLOCK_SIZE', 1000))
+    
+    # Streamed per-pond readings (POST /api/ponds/<id>/readings)
+    # Readings kept per pond for rolling statistics (288 = 24h at 5 min)
+    POND_WINDOW_SIZE = int(os.getenv('POND_WINDOW_SIZE', 288))
+    POND_MAX_PONDS = int(os.getenv('POND_MAX_PONDS', 10000))
+    # DO/temperature forecasts per pond (GET /api/ponds/<id>/forecast)
+    FORECAST_HORIZON_HOURS = float(os.getenv('FORECAST_HORIZON_HOURS', 6))
+    FORECAST_MAX_HORIZON_HOURS = float(os.getenv('FORECAST_MAX_HORIZON_HOURS', 48))
+    FORECAST_LEVEL_HALF_LIFE_HOURS = float(os.getenv('FORECAST_LEVEL_HALF_LIFE_HOURS', 1.0))
+    FORECAST_TREND_HALF_LIFE_HOURS = float(os.getenv('FORECAST_TREND_HALF_LIFE_HOURS', 3.0))
+    # Trend damping per hour; 1.0 extrapolates the trend linearly
+    FORECAST_TREND_DAMPING = float(os.getenv('FORECAST_TREND_DAMPING', 1.0))
     
     # Water quality thresholds
     PH_OPTIMAL_MIN = 6.5
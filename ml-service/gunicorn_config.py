@@ -1,11 +1,22 @@
+import gc
 import os
+import shutil
+
+# Workers write metric samples to files here so /metrics covers all of
+# them; must be set before prometheus_client is imported by the app
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/nilasense-metrics')
 
 # Bind to 0.0.0.0 with PORT from environment
 bind = f"0.0.0.0:{os.environ.get('PORT', '5002')}"
 
 # Worker processes
-workers = 2
-threads = 2
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+# Request threads read the model without locking (utils.model_utils.ModelRegistry)
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+
+# Load the app (and the ML model) once in the master before forking, so
+# workers share the model pages copy-on-write instead of each unpickling it
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
 
 # Timeout
 timeout = 120
@@ -17,3 +28,41 @@ worker_class = 'sync'
 loglevel = 'info'
 accesslog = '-'
 errorlog = '-'
+
+
+def on_starting(server):
+    # Samples from a previous run would otherwise be summed into this one
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    # Move everything allocated at preload out of the garbage collector's
+    # reach so collections in workers don't dirty the shared pages
+    if preload_app:
+        gc.freeze()
+
+
+def child_exit(server, worker):
+    from utils.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    from utils.model_watcher import start_model_watcher
+    from utils.system_stats import get_memory_usage
+
+    # Each worker watches for new model files itself; the master never
+    # runs a watcher, so no reload can hold a registry lock across fork
+    start_model_watcher()
+    
+    # Thread pools and per-process state of the warm-up don't survive fork
+    from app.health import get_readiness
+    get_readiness().warm_up()
+
+    usage = get_memory_usage()
+    worker.log.info(
+        "Worker %s memory: rss=%s shared=%s private=%s",
+        usage['pid'], usage['rss_bytes'], usage['shared_bytes'], usage['private_bytes']
+    )
@@ -0,0 +1,63 @@
+"""
+Build the exact lookup-table model from the trained forest
+
+The forest's decision function is piecewise constant between its split
+thresholds. This script collects every threshold per feature, evaluates
+the forest once per grid cell and writes the table to lookup_table/ next
+to the served model (models/trained/distilled/ when a current distilled
+model exists) for INFERENCE_BACKEND=lookup. The table records the version
+of that model and is ignored by the service once the model changes.
+
+Usage:
+    python models/training/build_lookup_table.py [--max-cells 5000000]
+"""
+import argparse
+import os
+import sys
+
+# Add service root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.model_utils import LOOKUP_TABLE_DIR, FlatForest, LookupTableModel, WaterQualityModel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the lookup-table model')
+    parser.add_argument('--model-dir', default='models/trained')
+    parser.add_argument('--max-cells', type=int, default=5_000_000,
+                        help='Refuse to build grids with more cells than this')
+    parser.add_argument('--verify-samples', type=int, default=10000)
+    args = parser.parse_args(argv)
+    
+    model = WaterQualityModel(model_dir=args.model_dir)
+    if not model.load_model():
+        sys.exit(1)
+    
+    # Native artifacts load without the sklearn estimator
+    flat_forest = model.forest or FlatForest.from_sklearn(model.model)
+    print(f"Forest: {flat_forest.n_trees} trees, {flat_forest.n_nodes} nodes")
+    
+    try:
+        lookup = LookupTableModel.build(
+            flat_forest,
+            n_features=len(model.feature_names),
+            max_cells=args.max_cells,
+            verify_samples=args.verify_samples,
+            source_sha256=model.version
+        )
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        print("   The forest has too many distinct thresholds for an exact table.")
+        print("   Use a smaller (e.g. distilled) model or raise --max-cells.")
+        sys.exit(1)
+    
+    output_dir = os.path.join(model.artifact_dir, LOOKUP_TABLE_DIR)
+    lookup.save(output_dir)
+    
+    print(f"[OK] Lookup table verified against the forest and saved to {output_dir}")
+    print(f"   Grid: {'x'.join(str(n) for n in lookup.table.shape[:-1])} cells")
+    print(f"   Size: {lookup.table.nbytes / 1024 / 1024:.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
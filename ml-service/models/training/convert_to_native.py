@@ -0,0 +1,63 @@
+"""
+Convert the pickled model artifacts to the native memory-mapped format
+
+Reads water_quality_rf_model.pkl, scaler.pkl and model_metadata.pkl from
+the model directory and writes <model-dir>/native/ (raw .npy tree arrays
+plus header.json), which the service loads with np.load(mmap_mode='r').
+
+Usage:
+    python models/training/convert_to_native.py [--model-dir models/trained]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add service root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.model_utils import (
+    MODEL_FILE,
+    NATIVE_ARTIFACT_DIR,
+    WaterQualityModel,
+    export_native_artifact,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert pickled model to the native format')
+    parser.add_argument('--model-dir', default='models/trained')
+    args = parser.parse_args()
+    
+    model = WaterQualityModel(model_dir=args.model_dir, model_format='pickle', variant='full')
+    if not model.load_model():
+        sys.exit(1)
+    
+    output_dir = os.path.join(args.model_dir, NATIVE_ARTIFACT_DIR)
+    export_native_artifact(
+        model.model,
+        model.scaler,
+        model.metadata,
+        output_dir,
+        source_path=os.path.join(args.model_dir, MODEL_FILE)
+    )
+    print(f"[OK] Native artifact written to {output_dir}")
+    
+    # Check the converted artifact loads and agrees with the pickle
+    start = time.perf_counter()
+    native = WaterQualityModel(model_dir=args.model_dir, model_format='native', variant='full')
+    if not native.load_model():
+        sys.exit(1)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    
+    expected = model.predict(7.2, 28.5, 15.3, 6.8)['probabilities']
+    actual = native.predict(7.2, 28.5, 15.3, 6.8)['probabilities']
+    if expected != actual:
+        print(f"[ERROR] Native artifact disagrees with the pickle: {actual} != {expected}")
+        sys.exit(1)
+    
+    print(f"   Native load time: {elapsed_ms:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,75 @@
 """
 Model Training Script
 
-TODO: Implement actual model training
-This is a template for training the water quality prediction model
+Trains the water quality Random Forest with a stratified k-fold
+hyperparameter search run in a process pool. Every candidate is scored on
+cross-validated macro-F1 minus a serving-cost penalty on its total tree
+node count (latency and size are reported alongside); the selected model
+is refit on the training split, evaluated once on a held-out test split
+and saved for the service.
+
+The forest is then distilled into a much smaller student fitted to its
+soft ``predict_proba`` outputs. The student is saved to ``distilled/``
+(served by default) only if its held-out macro-F1 stays within
+``--distill-margin`` of the forest's; otherwise training fails. Both
+models are written to a staging directory first and only moved into
+``--output-dir`` once that gate has passed, so a failed run leaves the
+served model untouched.
+
+Usage:
+    python models/training/train_model.py [--folds 5] [--workers 4]
+        [--n-estimators 50,100,200,400] [--max-depth 8,12,16,none]
+        [--min-samples-leaf 1,2,5] [--cost-weight 0.0001]
+        [--distill-margin 0.02] [--distill-samples 20000] [--no-distill]
+        [--output-dir models/trained] [--report training_report.json]
 """
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 # from sklearn.neural_network import MLPClassifier
+import argparse
+import hashlib
+import itertools
 import joblib
+import json
+import pickle
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 import os
+import sys
+
+# Add service root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.model_utils import (
+    DISTILLED_DIR, METADATA_FILE, MODEL_FILE, NATIVE_ARTIFACT_DIR, SCALER_FILE,
+    export_native_artifact, file_sha256
+)
+
+FEATURE_NAMES = ['ph', 'temperature', 'turbidity', 'dissolved_oxygen']
+CLASS_NAMES = ['Baik', 'Normal', 'Perlu Perhatian']
+
+DEFAULT_GRID = {
+    'n_estimators': [50, 100, 200, 400],
+    'max_depth': [8, 12, 16, None],
+    'min_samples_leaf': [1, 2, 5],
+}
+
+# Student models tried by the distillation stage, smallest first. Students
+# stay RandomForestClassifiers (a single tree is a one-tree forest without
+# bootstrap) so the flat, native and lookup-table engines serve them as-is.
+DISTILL_CANDIDATES = {
+    'tree_depth_6': {'n_estimators': 1, 'max_depth': 6, 'min_samples_leaf': 5},
+    'tree_depth_10': {'n_estimators': 1, 'max_depth': 10, 'min_samples_leaf': 2},
+    'forest_10_depth_8': {'n_estimators': 10, 'max_depth': 8, 'min_samples_leaf': 2},
+    'forest_25_depth_10': {'n_estimators': 25, 'max_depth': 10, 'min_samples_leaf': 1},
+}
+
 
 def load_data(csv_path='data/samples/Water_Quality_Dataset.csv'):
     """
@@ -34,58 +91,47 @@ def load_data(csv_path='data/samples/Water_Quality_Dataset.csv'):
         return None, None
     # Map to expected feature names and order
     X = data[['pH', 'Temperature (°C)', 'Turbidity (NTU)', 'DO (mg/L)']].copy()
-    X.columns = ['ph', 'temperature', 'turbidity', 'dissolved_oxygen']
+    X.columns = FEATURE_NAMES
     y = data['Pollution_Level'].astype(int)
     return X.values, y.values
 
 
-def preprocess_data(X, y):
+def build_model(params, seed=42, n_jobs=-1):
     """
-    Preprocess and split data
+    Random Forest with class_weight to handle imbalance
     
     Args:
-        X: Features
-        y: Target
-        
-    Returns:
-        X_train, X_test, y_train, y_test, scaler
+        params: dict with n_estimators, max_depth and min_samples_leaf
+        seed: Random seed
+        n_jobs: Threads used by fit/predict
     """
-    print("Preprocessing data...")
-    
-    # Split data
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+    return RandomForestClassifier(
+        n_estimators=params['n_estimators'],
+        max_depth=params['max_depth'],
+        min_samples_leaf=params['min_samples_leaf'],
+        random_state=seed,
+        n_jobs=n_jobs,
+        class_weight='balanced_subsample'
     )
-    
-    # Scale features
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-    
-    return X_train_scaled, X_test_scaled, y_train, y_test, scaler
 
 
-def train_model(X_train, y_train):
+def train_model(X_train, y_train, params=None, seed=42):
     """
     Train the model
     
     Args:
         X_train: Training features
         y_train: Training target
+        params: Hyperparameters (default: 400 unbounded trees)
+        seed: Random seed
         
     Returns:
         Trained model
     """
     print("Training model...")
     
-    # Random Forest with class_weight to handle imbalance
-    model = RandomForestClassifier(
-        n_estimators=400,
-        max_depth=None,
-        random_state=42,
-        n_jobs=-1,
-        class_weight='balanced_subsample'
-    )
+    params = params or {'n_estimators': 400, 'max_depth': None, 'min_samples_leaf': 1}
+    model = build_model(params, seed)
     
     # Option 2: Neural Network
     # model = MLPClassifier(
@@ -101,6 +147,223 @@ def train_model(X_train, y_train):
     return model
 
 
+def serving_cost(model, X, repeats=50):
+    """
+    Size and single-row latency of a fitted model
+    
+    Latency is the median of ``repeats`` single-row predict_proba calls
+    with one thread, which is what one /api/predict request costs.
+    
+    Returns:
+        dict: model_bytes, total_nodes, max_depth, latency_ms
+    """
+    n_jobs = model.n_jobs
+    model.set_params(n_jobs=1)
+    row = X[:1]
+    model.predict_proba(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    model.set_params(n_jobs=n_jobs)
+    
+    return {
+        'model_bytes': len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL)),
+        'total_nodes': int(sum(tree.tree_.node_count for tree in model.estimators_)),
+        'max_depth': int(max(tree.tree_.max_depth for tree in model.estimators_)),
+        'latency_ms': float(np.median(timings) * 1000),
+    }
+
+
+def cross_validate_candidate(task):
+    """
+    Stratified k-fold evaluation of one hyperparameter combination
+    
+    Runs in a worker process; each fold gets its own scaler fitted on the
+    fold's training rows, exactly like the final model.
+    
+    Args:
+        task: (params, X, y, folds, seed)
+    
+    Returns:
+        dict: params with mean/std macro-F1 and accuracy, fit time and
+              the serving cost of the last fold's model
+    """
+    from sklearn.metrics import accuracy_score, f1_score
+    
+    params, X, y, folds, seed = task
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed)
+    f1_scores, accuracies, fit_seconds = [], [], []
+    
+    for train_idx, val_idx in splitter.split(X, y):
+        scaler = StandardScaler().fit(X[train_idx])
+        model = build_model(params, seed, n_jobs=1)
+        start = time.perf_counter()
+        model.fit(scaler.transform(X[train_idx]), y[train_idx])
+        fit_seconds.append(time.perf_counter() - start)
+        
+        y_pred = model.predict(scaler.transform(X[val_idx]))
+        f1_scores.append(f1_score(y[val_idx], y_pred, average='macro', zero_division=0))
+        accuracies.append(accuracy_score(y[val_idx], y_pred))
+    
+    return {
+        'params': params,
+        'f1_macro': float(np.mean(f1_scores)),
+        'f1_macro_std': float(np.std(f1_scores)),
+        'accuracy': float(np.mean(accuracies)),
+        'fit_seconds': float(np.mean(fit_seconds)),
+        **serving_cost(model, scaler.transform(X[val_idx])),
+    }
+
+
+def objective(result, cost_weight):
+    """
+    Selection score: macro-F1 minus ``cost_weight`` per 1000 tree nodes
+    
+    The node count bounds traversal work and model size and, unlike the
+    measured latency, does not depend on machine load, so the selection is
+    reproducible.
+    """
+    return result['f1_macro'] - cost_weight * result['total_nodes'] / 1000
+
+
+def search_hyperparameters(X, y, grid, folds=5, workers=None, seed=42, cost_weight=0.0001):
+    """
+    Parallel grid search with stratified k-fold cross-validation
+    
+    Args:
+        X, y: Unscaled training features and labels
+        grid: dict of hyperparameter name -> candidate values
+        folds: Number of CV folds
+        workers: Worker processes (default: CPU count)
+        seed: Random seed for folds and forests
+        cost_weight: Macro-F1 traded per 1000 tree nodes
+    
+    Returns:
+        list: Candidate results sorted best first, each with 'objective'
+    """
+    names = list(grid)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    print(f"Searching {len(candidates)} candidates x {folds} folds "
+          f"on {workers or os.cpu_count()} processes...")
+    
+    tasks = [(params, X, y, folds, seed) for params in candidates]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(cross_validate_candidate, tasks))
+    
+    for result in results:
+        result['objective'] = objective(result, cost_weight)
+    # Ties go to the smaller model
+    results.sort(key=lambda r: (-r['objective'], r['total_nodes'], r['model_bytes']))
+    return results
+
+
+def transfer_set(X, n_samples, seed=42, noise=0.1):
+    """
+    Inputs the student learns the teacher's outputs on
+    
+    The training rows plus ``n_samples`` jittered copies of them (Gaussian
+    noise of ``noise`` standard deviations), which fills in the space
+    between training points where the teacher's boundaries lie.
+    
+    Args:
+        X: Scaled training features
+        n_samples: Number of synthetic rows
+        seed: Random seed
+        noise: Jitter in scaled (standard deviation) units
+    """
+    rng = np.random.default_rng(seed)
+    rows = X[rng.integers(0, len(X), n_samples)]
+    return np.vstack([X, rows + rng.normal(0.0, noise, rows.shape)])
+
+
+def build_student(params, seed=42):
+    """Student forest; a one-tree student uses every row and feature"""
+    single_tree = params['n_estimators'] == 1
+    return RandomForestClassifier(
+        n_estimators=params['n_estimators'],
+        max_depth=params['max_depth'],
+        min_samples_leaf=params['min_samples_leaf'],
+        bootstrap=not single_tree,
+        max_features=None if single_tree else 'sqrt',
+        random_state=seed,
+        n_jobs=-1
+    )
+
+
+def fit_soft_labels(student, teacher, X):
+    """
+    Fit ``student`` to the teacher's class probabilities on ``X``
+    
+    Each row is repeated once per class, labelled with that class and
+    weighted by the teacher's probability for it, so the weighted class
+    frequencies in every leaf approximate the teacher's soft outputs.
+    """
+    probabilities = teacher.predict_proba(X)
+    X_rep = np.tile(X, (len(teacher.classes_), 1))
+    y_rep = np.repeat(teacher.classes_, len(X))
+    weights = probabilities.T.ravel()
+    keep = weights > 0
+    student.fit(X_rep[keep], y_rep[keep], sample_weight=weights[keep])
+    return student
+
+
+def distill_model(teacher, X_train, X_test, y_test, teacher_f1, margin=0.02,
+                  n_samples=20000, seed=42):
+    """
+    Distill the teacher into the smallest student within the accuracy gate
+    
+    Size (total nodes, which bounds traversal work) decides rather than the
+    measured latency, so the choice is reproducible.
+    
+    Args:
+        teacher: Fitted forest
+        X_train: Scaled training features
+        X_test, y_test: Scaled held-out features and labels
+        teacher_f1: Teacher's held-out macro-F1
+        margin: Largest macro-F1 drop accepted
+        n_samples: Synthetic transfer rows
+        seed: Random seed
+    
+    Returns:
+        (student or None, name or None, list of candidate results)
+    """
+    from sklearn.metrics import f1_score
+    
+    print(f"\nDistilling into {len(DISTILL_CANDIDATES)} candidate students...")
+    X_transfer = transfer_set(X_train, n_samples, seed)
+    teacher_pred = teacher.predict(X_test)
+    results, students = [], {}
+    
+    for name, params in DISTILL_CANDIDATES.items():
+        student = fit_soft_labels(build_student(params, seed), teacher, X_transfer)
+        if not np.array_equal(student.classes_, teacher.classes_):
+            print(f"  {name}: skipped, classes differ from the teacher")
+            continue
+        y_pred = student.predict(X_test)
+        f1 = float(f1_score(y_test, y_pred, average='macro', zero_division=0))
+        result = {
+            'name': name,
+            'params': params,
+            'f1_macro': f1,
+            'fidelity': float(np.mean(y_pred == teacher_pred)),
+            'passed': f1 >= teacher_f1 - margin,
+            **serving_cost(student, X_test),
+        }
+        print(f"  {name}: F1={f1:.4f} fidelity={result['fidelity']:.4f} "
+              f"nodes={result['total_nodes']} latency={result['latency_ms']:.2f}ms "
+              f"{'ok' if result['passed'] else 'rejected'}")
+        results.append(result)
+        students[name] = student
+    
+    passed = [r for r in results if r['passed']]
+    if not passed:
+        return None, None, results
+    best = min(passed, key=lambda r: (r['total_nodes'], r['model_bytes']))
+    return students[best['name']], best['name'], results
+
+
 def evaluate_model(model, X_test, y_test):
     """
     Evaluate model performance
@@ -109,6 +372,9 @@ def evaluate_model(model, X_test, y_test):
         model: Trained model
         X_test: Test features
         y_test: Test target
+    
+    Returns:
+        dict: accuracy and macro precision/recall/F1
     """
     from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, precision_recall_fscore_support
     
@@ -122,8 +388,7 @@ def evaluate_model(model, X_test, y_test):
     print(f"Accuracy: {accuracy:.4f}")
     
     print("\nClassification Report:")
-    print(classification_report(y_test, y_pred, 
-                                target_names=['Baik', 'Normal', 'Perlu Perhatian']))
+    print(classification_report(y_test, y_pred, target_names=CLASS_NAMES))
     
     print("\nConfusion Matrix:")
     print(confusion_matrix(y_test, y_pred))
@@ -135,98 +400,270 @@ def evaluate_model(model, X_test, y_test):
     print(f"Macro Recall:    {recall:.4f}")
     print(f"Macro F1-score:  {f1:.4f}")
 
+    return {
+        'accuracy': float(accuracy),
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1_score': float(f1),
+    }
+
 
-def save_model(model, scaler, X_test, y_test):
+def save_model(model, scaler, metrics, output_dir='models/trained', extra_metadata=None):
     """
     Save trained model and scaler
     
     Args:
         model: Trained model
         scaler: Fitted scaler
+        metrics: Held-out metrics from ``evaluate_model``
+        output_dir: Directory the service loads models from
+        extra_metadata: Additional metadata entries (search, serving cost)
     """
     print("\nSaving model and metadata...")
     
     # Create directory if not exists
-    os.makedirs('models/trained', exist_ok=True)
+    os.makedirs(output_dir, exist_ok=True)
     
     # Filenames expected by inference service
-    model_path = 'models/trained/water_quality_rf_model.pkl'
-    scaler_path = 'models/trained/scaler.pkl'
-    metadata_path = 'models/trained/model_metadata.pkl'
+    model_path = os.path.join(output_dir, 'water_quality_rf_model.pkl')
+    scaler_path = os.path.join(output_dir, 'scaler.pkl')
+    metadata_path = os.path.join(output_dir, 'model_metadata.pkl')
     
     # Save model and scaler
     joblib.dump(model, model_path)
     joblib.dump(scaler, scaler_path)
     
-    # Compute evaluation for metadata
-    from sklearn.metrics import accuracy_score, precision_recall_fscore_support
-    y_pred = model.predict(X_test)
-    accuracy = float(accuracy_score(y_test, y_pred))
-    precision, recall, f1, _ = precision_recall_fscore_support(
-        y_test, y_pred, average='macro', zero_division=0
-    )
-    
     # Feature importance mapping
-    feature_names = ['ph', 'temperature', 'turbidity', 'dissolved_oxygen']
     importances = getattr(model, 'feature_importances_', None)
     if importances is not None:
-        feature_importance = {name: float(imp) for name, imp in zip(feature_names, importances)}
+        feature_importance = {name: float(imp) for name, imp in zip(FEATURE_NAMES, importances)}
     else:
-        feature_importance = {name: None for name in feature_names}
+        feature_importance = {name: None for name in FEATURE_NAMES}
     
     # Label mapping used by inference (index -> class name)
-    label_mapping = {0: 'Baik', 1: 'Normal', 2: 'Perlu Perhatian'}
+    label_mapping = dict(enumerate(CLASS_NAMES))
     
     metadata = {
         'model_type': 'RandomForestClassifier',
-        'feature_names': feature_names,
+        'feature_names': FEATURE_NAMES,
         'label_mapping': label_mapping,
-        'accuracy': accuracy,
-        'precision': float(precision),
-        'recall': float(recall),
-        'f1_score': float(f1),
+        **metrics,
         'training_date': datetime.utcnow().isoformat() + 'Z',
         'feature_importance': feature_importance,
+        **(extra_metadata or {}),
     }
     joblib.dump(metadata, metadata_path)
     
+    # Native memory-mapped artifact for fast service start
+    export_native_artifact(
+        model, scaler, metadata,
+        os.path.join(output_dir, NATIVE_ARTIFACT_DIR),
+        source_path=model_path
+    )
+    
     print("Model and metadata saved successfully!")
 
 
-def main():
-    """Main training pipeline"""
+def publish_artifacts(staging_dir, output_dir):
+    """
+    Move the artifacts of a staged training run into the served directory
+    
+    Each file is replaced with ``os.replace`` and each directory (native/,
+    distilled/) is swapped by renaming, so a reader sees either the old or
+    the new copy of every artifact. native/ and distilled/ go first: they
+    carry the hash of the model they belong to, and are skipped as stale
+    until the new model file is in place. The pickles follow, model.pkl
+    last and right after its scaler and metadata, so only two renames
+    separate a new scaler from its model. The model watcher also watches
+    the scaler and metadata, so a reload in that window is followed by
+    another once the pair is complete. A run without a student removes
+    the old distilled/.
+    
+    Args:
+        staging_dir: Directory written by ``save_model`` (same filesystem)
+        output_dir: Directory the service loads models from
+    """
+    for name in (NATIVE_ARTIFACT_DIR, DISTILLED_DIR, METADATA_FILE, SCALER_FILE, MODEL_FILE):
+        source = os.path.join(staging_dir, name)
+        target = os.path.join(output_dir, name)
+        if os.path.isdir(target):
+            # Parked in the staging directory, which the caller removes
+            os.replace(target, os.path.join(staging_dir, f'{name}.old'))
+        if os.path.exists(source):
+            os.replace(source, target)
+    print(f"Model published to {output_dir}")
+
+
+def _parse_grid_values(text, cast):
+    return [None if value.strip().lower() == 'none' else cast(value) for value in text.split(',')]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Train the water quality model')
+    parser.add_argument('--data', default='data/samples/Water_Quality_Dataset.csv')
+    parser.add_argument('--output-dir', default='models/trained')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Search processes (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-estimators', default=','.join(map(str, DEFAULT_GRID['n_estimators'])))
+    parser.add_argument('--max-depth', default=','.join(str(d).lower() for d in DEFAULT_GRID['max_depth']))
+    parser.add_argument('--min-samples-leaf', default=','.join(map(str, DEFAULT_GRID['min_samples_leaf'])))
+    parser.add_argument('--cost-weight', type=float, default=0.0001,
+                        help='Macro-F1 traded per 1000 tree nodes')
+    parser.add_argument('--distill-margin', type=float, default=0.02,
+                        help='Largest held-out macro-F1 drop accepted for the distilled model')
+    parser.add_argument('--distill-samples', type=int, default=20000,
+                        help='Synthetic rows labelled by the forest for distillation')
+    parser.add_argument('--no-distill', action='store_true',
+                        help='Skip distillation and serve the full forest')
+    parser.add_argument('--report', default=None,
+                        help='JSON report path (default: <output-dir>/training_report.json)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Main training pipeline
+    
+    Returns:
+        int: Exit status, 1 when no student passes the distillation gate
+    """
+    args = parse_args(argv)
+    started = time.perf_counter()
+    
     print("="*50)
     print("Water Quality Model Training")
     print("="*50)
     
     # Load data
-    X, y = load_data()
+    X, y = load_data(args.data)
     
     if X is None or y is None:
         print("\n⚠️  No training data available yet.")
-        print("Please prepare training data in 'data/processed/training_data.csv'")
+        print(f"Please prepare training data in '{args.data}'")
         print("\nData format should be:")
-        print("ph, temperature, turbidity, dissolved_oxygen, quality")
-        print("7.2, 28.5, 15.3, 6.8, Baik")
-        return
+        print("pH, Temperature (°C), Turbidity (NTU), DO (mg/L), Pollution_Level")
+        print("7.2, 28.5, 15.3, 6.8, 0")
+        return 1
+    
+    # Hold out a test split; the search only sees the training part
+    X_train_raw, X_test_raw, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=args.seed, stratify=y
+    )
     
-    # Preprocess
-    X_train, X_test, y_train, y_test, scaler = preprocess_data(X, y)
+    grid = {
+        'n_estimators': _parse_grid_values(args.n_estimators, int),
+        'max_depth': _parse_grid_values(args.max_depth, int),
+        'min_samples_leaf': _parse_grid_values(args.min_samples_leaf, int),
+    }
+    search_started = time.perf_counter()
+    results = search_hyperparameters(
+        X_train_raw, y_train, grid, args.folds, args.workers, args.seed, args.cost_weight
+    )
+    search_seconds = time.perf_counter() - search_started
     
-    # Train
-    model = train_model(X_train, y_train)
+    print(f"\nTop candidates ({search_seconds:.1f}s):")
+    for result in results[:5]:
+        print(f"  {result['params']}: F1={result['f1_macro']:.4f} "
+              f"nodes={result['total_nodes']} latency={result['latency_ms']:.2f}ms "
+              f"objective={result['objective']:.4f}")
+    best = results[0]
     
-    # Evaluate
-    evaluate_model(model, X_test, y_test)
+    # Refit the selected configuration on the whole training split
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X_train_raw)
+    X_test = scaler.transform(X_test_raw)
+    fit_started = time.perf_counter()
+    model = train_model(X_train, y_train, best['params'], args.seed)
+    fit_seconds = time.perf_counter() - fit_started
+    
+    # Evaluate once on the held-out split
+    metrics = evaluate_model(model, X_test, y_test)
+    serving = serving_cost(model, X_test)
+    serving['fit_seconds'] = fit_seconds
+    
+    with open(args.data, 'rb') as f:
+        data_sha256 = hashlib.sha256(f.read()).hexdigest()
+    training = {
+        'hyperparameters': best['params'],
+        'cv_folds': args.folds,
+        'cv_f1_macro': best['f1_macro'],
+        'cv_f1_macro_std': best['f1_macro_std'],
+        'cost_weight': args.cost_weight,
+        'seed': args.seed,
+        'data_sha256': data_sha256,
+    }
     
-    # Save
-    save_model(model, scaler, X_test, y_test)
+    # Save into a staging directory; the served model is only replaced
+    # once the distillation gate has passed
+    os.makedirs(args.output_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix='.staging-', dir=args.output_dir)
+    try:
+        save_model(model, scaler, metrics, staging_dir, {'training': training, 'serving': serving})
+        
+        # Distill into a small student served by default
+        distillation = None
+        if not args.no_distill:
+            student, student_name, candidates = distill_model(
+                model, X_train, X_test, y_test, metrics['f1_score'],
+                args.distill_margin, args.distill_samples, args.seed
+            )
+            distillation = {
+                'margin': args.distill_margin,
+                'samples': args.distill_samples,
+                'teacher_f1_macro': metrics['f1_score'],
+                'selected': student_name,
+                'candidates': candidates,
+            }
+            if student is not None:
+                print(f"\nSelected student: {student_name}")
+                student_metrics = evaluate_model(student, X_test, y_test)
+                student_serving = serving_cost(student, X_test)
+                distillation['holdout'] = student_metrics
+                distillation['serving'] = student_serving
+                save_model(student, scaler, student_metrics, os.path.join(staging_dir, DISTILLED_DIR), {
+                    'training': training,
+                    'serving': student_serving,
+                    'distillation': {
+                        'student': student_name,
+                        'teacher_sha256': file_sha256(os.path.join(staging_dir, MODEL_FILE)),
+                        'teacher_f1_macro': metrics['f1_score'],
+                        'margin': args.distill_margin,
+                    },
+                })
+        
+        passed = distillation is None or distillation['selected'] is not None
+        if passed:
+            publish_artifacts(staging_dir, args.output_dir)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    
+    report_path = args.report or os.path.join(args.output_dir, 'training_report.json')
+    with open(report_path, 'w') as f:
+        json.dump({
+            'selected': best,
+            'holdout': metrics,
+            'serving': serving,
+            'training': training,
+            'distillation': distillation,
+            'search_seconds': search_seconds,
+            'total_seconds': time.perf_counter() - started,
+            'candidates': results,
+        }, f, indent=2)
+    print(f"Report written to {report_path}")
+    
+    if not passed:
+        print(f"\n⚠️  No distilled model within {args.distill_margin} macro-F1 of the forest.")
+        print(f"The model in {args.output_dir} was left unchanged.")
+        print("Raise --distill-margin or train with --no-distill to serve the full forest.")
+        return 1
     
     print("\n" + "="*50)
     print("Training completed successfully!")
     print("="*50)
+    return 0
 
 
 if __name__ == '__main__':
-    main()
-
+    sys.exit(main())
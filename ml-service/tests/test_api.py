@@ -4,6 +4,7 @@ API Tests
 import pytest
 import json
 from app import create_app
+from utils import model_utils
 
 @pytest.fixture
 def client():
@@ -115,3 +116,404 @@ def test_batch_prediction(client):
     assert data['success'] == True
     assert len(data['data']['predictions']) == 2
 
+
+
+def test_batch_prediction_partial_failure(client):
+    """Test batch prediction reports invalid readings at their index"""
+    payload = {
+        'readings': [
+            {
+                'ph': 7.2,
+                'temperature': 28.5,
+                'turbidity': 15.3,
+                'dissolved_oxygen': 6.8
+            },
+            {
+                'ph': 15.0,  # Invalid pH
+                'temperature': 28.5,
+                'turbidity': 15.3,
+                'dissolved_oxygen': 6.8
+            },
+            {
+                'ph': 6.8,
+                'temperature': 27.0
+                # missing turbidity and dissolved_oxygen
+            }
+        ]
+    }
+    
+    response = client.post(
+        '/api/predict/batch',
+        data=json.dumps(payload),
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 200
+    predictions = json.loads(response.data)['data']['predictions']
+    assert len(predictions) == 3
+    assert 'quality' in predictions[0]
+    assert predictions[1]['index'] == 1
+    assert 'error' in predictions[1]
+    assert predictions[2]['index'] == 2
+    assert 'error' in predictions[2]
+
+
+def test_batch_prediction_matches_single(client):
+    """Test batch prediction gives the same result as single predictions"""
+    readings = [
+        {'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8},
+        {'ph': 5.5, 'temperature': 33.0, 'turbidity': 60.0, 'dissolved_oxygen': 2.5},
+        {'ph': 8.7, 'temperature': 24.0, 'turbidity': 30.0, 'dissolved_oxygen': 4.5}
+    ]
+    
+    response = client.post(
+        '/api/predict/batch',
+        data=json.dumps({'readings': readings}),
+        content_type='application/json'
+    )
+    batch = json.loads(response.data)['data']['predictions']
+    
+    for reading, batch_result in zip(readings, batch):
+        response = client.post(
+            '/api/predict',
+            data=json.dumps(reading),
+            content_type='application/json'
+        )
+        single = json.loads(response.data)['data']
+        assert batch_result['quality'] == single['quality']
+        assert batch_result['probabilities'] == pytest.approx(single['probabilities'])
+        assert batch_result['recommendations'] == single['recommendations']
+
+
+def test_stats_reports_worker_memory(client):
+    """Test stats endpoint reports memory of the serving process"""
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    memory = json.loads(response.data)['data']['memory']
+    assert memory['pid'] > 0
+    assert 'rss_bytes' in memory
+
+
+def test_predict_with_micro_batching(client, monkeypatch):
+    """Test micro-batched prediction returns the same result"""
+    from config.config import Config
+    
+    payload = json.dumps({
+        'ph': 7.2,
+        'temperature': 28.5,
+        'turbidity': 15.3,
+        'dissolved_oxygen': 6.8
+    })
+    expected = json.loads(client.post(
+        '/api/predict', data=payload, content_type='application/json'
+    ).data)['data']
+    
+    monkeypatch.setattr(Config, 'MICRO_BATCHING_ENABLED', True)
+    monkeypatch.setattr(Config, 'PREDICTION_CACHE_ENABLED', False)
+    response = client.post('/api/predict', data=payload, content_type='application/json')
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)['data']
+    assert data['quality'] == expected['quality']
+    assert data['probabilities'] == pytest.approx(expected['probabilities'])
+    
+    stats = json.loads(client.get('/api/stats').data)['data']
+    assert stats['batching']['rows'] >= 1
+
+
+def test_stats_reports_cache_counters(client, monkeypatch):
+    """Test repeated predictions are served from the prediction cache"""
+    from config.config import Config
+    
+    monkeypatch.setattr(Config, 'PREDICTION_CACHE_ENABLED', True)
+    payload = json.dumps({
+        'ph': 6.9,
+        'temperature': 27.5,
+        'turbidity': 11.0,
+        'dissolved_oxygen': 6.1
+    })
+    before = json.loads(client.get('/api/stats').data)['data']['cache']
+    client.post('/api/predict', data=payload, content_type='application/json')
+    client.post('/api/predict', data=payload, content_type='application/json')
+    after = json.loads(client.get('/api/stats').data)['data']['cache']
+    
+    assert after['hits'] >= before['hits'] + 1
+    assert after['model_version'] is not None
+
+
+def test_bulk_predictions_bypass_the_cache(client, monkeypatch):
+    """Batches above PREDICTION_CACHE_MAX_ROWS neither round nor fill the cache"""
+    from config.config import Config
+    from utils.prediction_cache import get_prediction_cache
+    
+    monkeypatch.setattr(Config, 'PREDICTION_CACHE_ENABLED', True)
+    monkeypatch.setattr(Config, 'PREDICTION_CACHE_MAX_ROWS', 4)
+    readings = [
+        {'ph': 6.0 + i * 0.013, 'temperature': 27.04, 'turbidity': 12.0, 'dissolved_oxygen': 6.004}
+        for i in range(10)
+    ]
+    before = get_prediction_cache().stats()
+    response = client.post('/api/predict/batch', data=json.dumps({'readings': readings}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    after = get_prediction_cache().stats()
+    assert (after['hits'], after['misses']) == (before['hits'], before['misses'])
+    
+    model = model_utils.get_model_instance()
+    expected = model.predict_proba_array(model.build_feature_matrix(readings))
+    predictions = json.loads(response.data)['data']['predictions']
+    assert [p['confidence'] for p in predictions] == pytest.approx(
+        expected.max(axis=1).round(4).tolist(), abs=1e-4
+    )
+
+
+def test_stream_prediction(client, monkeypatch):
+    """Test NDJSON streaming prediction keeps order and reports bad lines"""
+    from config.config import Config
+    
+    lines = [
+        json.dumps({'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8}),
+        'not json',
+        '',
+        json.dumps({'ph': 15.0, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8}),
+    ] + [
+        json.dumps({'ph': 6.5 + i / 10, 'temperature': 27.0, 'turbidity': 20.0, 'dissolved_oxygen': 5.5})
+        for i in range(5)
+    ]
+    
+    monkeypatch.setattr(Config, 'STREAM_BLOCK_SIZE', 3)
+    response = client.post(
+        '/api/predict/stream',
+        data='\n'.join(lines) + '\n',
+        content_type='application/x-ndjson'
+    )
+    body = response.get_data(as_text=True)
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    results = [json.loads(line) for line in body.splitlines()]
+    assert [r['index'] for r in results] == list(range(8))
+    assert 'quality' in results[0]
+    assert 'error' in results[1]
+    assert 'error' in results[2]
+    assert all('quality' in r for r in results[3:])
+
+
+def test_columnar_prediction(client):
+    """Test columnar binary prediction matches the JSON batch endpoint"""
+    from app import columnar
+    
+    readings = [
+        [7.2, 28.5, 15.3, 6.8],
+        [15.0, 28.5, 15.3, 6.8],  # Invalid pH
+        [5.5, 33.0, 60.0, 2.5],
+    ]
+    response = client.post(
+        '/api/predict/columnar',
+        data=columnar.encode_readings(readings),
+        content_type=columnar.CONTENT_TYPE
+    )
+    
+    assert response.status_code == 200
+    assert response.headers['X-Invalid-Rows'] == '1'
+    labels = response.headers['X-Class-Labels'].split(',')
+    class_indices, probabilities = columnar.decode_predictions(response.data)
+    
+    assert class_indices[1] == -1
+    assert all(p != p for p in probabilities[1])  # NaN
+    
+    batch = json.loads(client.post(
+        '/api/predict/batch',
+        data=json.dumps({'readings': [
+            dict(zip(columnar.COLUMNS, reading)) for reading in readings
+        ]}),
+        content_type='application/json'
+    ).data)['data']['predictions']
+    for row in (0, 2):
+        assert labels[class_indices[row]] == batch[row]['quality']
+
+
+def test_columnar_prediction_rejects_bad_payload(client):
+    """Test malformed columnar payloads are rejected"""
+    response = client.post(
+        '/api/predict/columnar',
+        data=b'NSC1' + b'\x00' * 8,
+        content_type='application/vnd.nilasense.columnar'
+    )
+    assert response.status_code == 400
+
+
+def test_batch_prediction_falls_back_when_model_fails(client, monkeypatch, capsys):
+    """A model outage degrades the batch to the vectorized rule scorer, logged once"""
+    from app import predict
+    
+    def broken_model(name=None):
+        raise RuntimeError("model file missing")
+    
+    monkeypatch.setattr(predict, 'get_model_instance', broken_model)
+    monkeypatch.setattr(predict, '_degraded_mode', predict.DegradedModeTracker())
+    
+    readings = [
+        {'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8},
+        {'ph': 5.5, 'temperature': 33.0, 'turbidity': 55.0, 'dissolved_oxygen': 2.5},
+    ]
+    for _ in range(3):
+        response = client.post(
+            '/api/predict/batch',
+            data=json.dumps({'readings': readings}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+    
+    results = json.loads(response.data)['data']['predictions']
+    assert [r['model_used'] for r in results] == ['Rule-based (Fallback)'] * 2
+    assert [r['quality'] for r in results] == ['Baik', 'Perlu Perhatian']
+    assert results[0]['score'] == 100
+    assert capsys.readouterr().out.count('Model prediction failed') == 1
+    
+    stats = predict.get_degraded_mode().stats()
+    assert stats['active'] is True
+    assert stats['requests'] == 3
+    assert stats['rows'] == 6
+    assert stats['degraded_models'] == ['default']
+
+
+def test_variant_failure_is_tracked_per_model(client, monkeypatch):
+    """A broken variant neither degrades the default model nor is cleared by it"""
+    from app import predict
+    
+    def model_for(name=None):
+        if name == 'broken':
+            raise RuntimeError("broken variant")
+        return model_utils.get_model_instance(name)
+    
+    monkeypatch.setattr(predict, 'get_model_instance', model_for)
+    monkeypatch.setattr(predict, '_degraded_mode', predict.DegradedModeTracker())
+    reading = {'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8}
+    
+    assert predict.predict_water_quality(reading, 'broken')['model_used'] == 'Rule-based (Fallback)'
+    assert predict.predict_water_quality(reading)['model_used'] == 'Random Forest Classifier'
+    
+    tracker = predict.get_degraded_mode()
+    assert tracker.model_stats('broken')['active'] is True
+    assert tracker.model_stats('broken')['last_error'] == 'broken variant'
+    assert tracker.model_stats()['active'] is False
+    assert tracker.stats()['degraded_models'] == ['broken']
+
+
+def test_predict_compact(client):
+    """Compact mode returns numbers only and agrees with the verbose response"""
+    payload = json.dumps({
+        'ph': 7.2,
+        'temperature': 28.5,
+        'turbidity': 15.3,
+        'dissolved_oxygen': 6.8
+    })
+    verbose = client.post('/api/predict', data=payload, content_type='application/json')
+    compact = client.post('/api/predict?compact=true', data=payload, content_type='application/json')
+    
+    assert compact.status_code == 200
+    data = json.loads(compact.data)['data']
+    expected = json.loads(verbose.data)['data']
+    assert set(data) == {'class', 'confidence', 'probabilities', 'model_used'}
+    assert data['class'] == expected['prediction_numeric']
+    assert data['confidence'] == pytest.approx(expected['confidence'])
+    assert data['probabilities'] == pytest.approx(list(expected['probabilities'].values()))
+    assert len(compact.data) * 5 < len(verbose.data)
+
+
+def test_batch_prediction_fields(client):
+    """Batch fields= returns one array per field with invalid rows marked"""
+    readings = [
+        {'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8},
+        {'ph': 20.0, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8},
+        {'ph': 5.5, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 2.5},
+    ]
+    response = client.post(
+        '/api/predict/batch?fields=class,quality,issue_codes',
+        data=json.dumps({'readings': readings}),
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)['data']
+    assert data['class'][1] == -1
+    assert data['quality'][0] == data['labels'][data['class'][0]]
+    assert data['issue_codes'][1] is None
+    assert data['issue_codes'][2] != 0
+    assert [error['index'] for error in data['errors']] == [1]
+    assert data['total'] == 3
+    assert 'description' not in data
+
+
+def test_predict_unknown_field(client):
+    """Unknown response fields are rejected"""
+    response = client.post(
+        '/api/predict?fields=class,colour',
+        data=json.dumps({'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8}),
+        content_type='application/json'
+    )
+    
+    assert response.status_code == 400
+
+
+def test_pond_readings_and_trend(client):
+    """Streamed readings update the pond trend incrementally"""
+    readings = [
+        {'ph': 7.0, 'temperature': 28.0, 'turbidity': 10.0, 'dissolved_oxygen': 7.0 - hour * 0.5,
+         'timestamp': f'2025-01-01T{hour:02d}:00:00Z'}
+        for hour in range(4)
+    ]
+    readings.append({'ph': 99, 'temperature': 28.0, 'turbidity': 10.0, 'dissolved_oxygen': 6.0})
+    
+    response = client.post('/api/ponds/test-pond/readings', json={'readings': readings})
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)['data']
+    assert data['accepted'] == 4
+    assert [entry['index'] for entry in data['rejected']] == [4]
+    assert data['prediction']['quality'] in ('Baik', 'Normal', 'Perlu Perhatian')
+    
+    trend = json.loads(client.get('/api/ponds/test-pond/trend').data)['data']
+    do = trend['parameters']['dissolved_oxygen']
+    assert do['slope_per_hour'] == pytest.approx(-0.5)
+    assert (do['min'], do['max']) == (5.5, 7.0)
+    
+    assert client.get('/api/ponds/unknown-pond/trend').status_code == 404
+
+
+def test_pond_readings_reject_invalid_timestamps(client):
+    """Timestamps that cannot be formatted fail the request and leave no state"""
+    reading = {'ph': 7.0, 'temperature': 28.0, 'turbidity': 10.0, 'dissolved_oxygen': 6.0}
+    
+    for timestamp in (float('nan'), 1e30, 'yesterday'):
+        response = client.post('/api/ponds/bad-time-pond/readings',
+                               json={'readings': [dict(reading), dict(reading, timestamp=timestamp)]})
+        assert response.status_code == 400
+        assert 'Reading 1' in json.loads(response.data)['error']
+    assert client.get('/api/ponds/bad-time-pond/trend').status_code == 404
+    
+    # Epoch milliseconds (JS Date.now()) are converted
+    response = client.post('/api/ponds/bad-time-pond/readings',
+                           json=dict(reading, timestamp=1_735_689_600_000))
+    assert response.status_code == 200
+    trend = json.loads(client.get('/api/ponds/bad-time-pond/trend').data)['data']
+    assert trend['last_at'] == '2025-01-01T00:00:00Z'
+
+
+def test_pond_forecast(client):
+    """A falling DO series produces an early warning"""
+    readings = [
+        {'ph': 7.0, 'temperature': 28.0, 'turbidity': 10.0,
+         'dissolved_oxygen': round(15.5 - 0.4 * step * 0.25, 3), 'timestamp': 1_700_000_000 + step * 900}
+        for step in range(96)
+    ]
+    client.post('/api/ponds/forecast-pond/readings', json={'readings': readings})
+    
+    response = client.get('/api/ponds/forecast-pond/forecast?hours=4')
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)['data']
+    assert data['parameters']['dissolved_oxygen']['trend_per_hour'] == pytest.approx(-0.4, rel=0.05)
+    assert [alert['threshold'] for alert in data['alerts']] == [5.0]
+    assert client.get('/api/ponds/forecast-pond/forecast?hours=500').status_code == 400
@@ -0,0 +1,244 @@
+"""
+ASGI Adapter Tests
+"""
+import asyncio
+import json
+import threading
+import time
+import pytest
+from app import create_app
+from app.asgi import ASGIAdapter
+
+
+def call_asgi(app, method, path, body=b'', headers=None):
+    """Run one HTTP request through an ASGI app and collect the response"""
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': headers or [(b'content-type', b'application/json')],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+    
+    async def receive():
+        return messages.pop(0)
+    
+    async def send(message):
+        sent.append(message)
+    
+    asyncio.run(app(scope, receive, send))
+    status = sent[0]['status']
+    payload = b''.join(m.get('body', b'') for m in sent[1:])
+    return status, payload
+
+
+@pytest.fixture(scope='module')
+def asgi_app():
+    """Flask app wrapped in the ASGI adapter"""
+    return ASGIAdapter(create_app(), max_workers=2)
+
+
+def test_asgi_health(asgi_app):
+    """Health endpoint has the same contract under ASGI"""
+    status, payload = call_asgi(asgi_app, 'GET', '/api/health')
+    assert status == 200
+    assert json.loads(payload)['status'] == 'healthy'
+
+
+def test_asgi_predict(asgi_app):
+    """Prediction endpoint has the same contract under ASGI"""
+    body = json.dumps({
+        'ph': 7.2,
+        'temperature': 28.5,
+        'turbidity': 15.3,
+        'dissolved_oxygen': 6.8
+    }).encode()
+    status, payload = call_asgi(asgi_app, 'POST', '/api/predict', body)
+    
+    assert status == 200
+    data = json.loads(payload)
+    assert data['success'] == True
+    assert 'quality' in data['data']
+
+
+def test_asgi_invalid_predict(asgi_app):
+    """Validation errors keep their status code under ASGI"""
+    status, payload = call_asgi(asgi_app, 'POST', '/api/predict', b'{"ph": 7.2}')
+    assert status == 400
+    assert json.loads(payload)['success'] == False
+
+
+def test_asgi_executor_is_bounded():
+    """No more than max_workers requests run the WSGI app at once"""
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0}
+    
+    def slow_app(environ, start_response):
+        with lock:
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+        time.sleep(0.05)
+        with lock:
+            state['active'] -= 1
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+    
+    adapter = ASGIAdapter(slow_app, max_workers=2)
+    
+    async def run_many():
+        async def one():
+            sent = []
+            
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+            
+            async def send(message):
+                sent.append(message)
+            
+            await adapter({'type': 'http', 'method': 'GET', 'path': '/'}, receive, send)
+            return sent[0]['status']
+        
+        return await asyncio.gather(*(one() for _ in range(8)))
+    
+    assert asyncio.run(run_many()) == [200] * 8
+    assert state['peak'] <= 2
+
+
+def _run_request(adapter, messages, headers=None):
+    """Run one POST fed by ``messages`` and return the sent messages"""
+    sent = []
+    
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {'type': 'http', 'method': 'POST', 'path': '/', 'headers': headers or []}
+    asyncio.run(adapter(scope, receive, send))
+    return sent
+
+
+def test_asgi_rejects_oversized_bodies():
+    """Bodies above max_body_bytes get 413, declared or streamed"""
+    calls = []
+    
+    def app(environ, start_response):
+        calls.append(environ['wsgi.input'].read())
+        start_response('200 OK', [])
+        return [b'ok']
+    
+    adapter = ASGIAdapter(app, max_workers=1, max_body_bytes=10)
+    sent = _run_request(adapter, [], headers=[(b'content-length', b'11')])
+    assert sent[0]['status'] == 413
+    
+    sent = _run_request(adapter, [{'type': 'http.request', 'body': b'x' * 11}])
+    assert sent[0]['status'] == 413
+    assert calls == []
+    
+    sent = _run_request(adapter, [{'type': 'http.request', 'body': b'x' * 10}])
+    assert sent[0]['status'] == 200
+    assert calls == [b'x' * 10]
+
+
+def test_asgi_streams_large_bodies_to_the_app(monkeypatch):
+    """Past the spool size the app reads the body while it is still arriving"""
+    monkeypatch.setattr('app.asgi.SPOOL_BYTES', 16)
+    seen = {}
+    
+    def app(environ, start_response):
+        stream = environ['wsgi.input']
+        seen['first'] = stream.readline()
+        seen['received_at_first_line'] = state['received']
+        seen['rest'] = stream.read()
+        start_response('200 OK', [])
+        return [b'ok']
+    
+    lines = [f'{{"row": {i}}}\n'.encode() for i in range(20)]
+    messages = [{'type': 'http.request', 'body': line, 'more_body': True} for line in lines]
+    messages.append({'type': 'http.request', 'body': b'', 'more_body': False})
+    total = len(messages)
+    state = {'received': 0}
+    
+    async def receive():
+        state['received'] += 1
+        return messages.pop(0)
+    
+    sent = []
+    
+    async def send(message):
+        sent.append(message)
+    
+    adapter = ASGIAdapter(app, max_workers=1)
+    asyncio.run(adapter({'type': 'http', 'method': 'POST', 'path': '/'}, receive, send))
+    
+    assert sent[0]['status'] == 200
+    assert seen['first'] + seen['rest'] == b''.join(lines)
+    assert seen['received_at_first_line'] < total
+
+
+def test_asgi_predict_stream_with_chunked_body(asgi_app, monkeypatch):
+    """NDJSON streamed in many chunks without Content-Length is fully scored"""
+    monkeypatch.setattr('app.asgi.SPOOL_BYTES', 256)
+    line = json.dumps({'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8})
+    messages = [
+        {'type': 'http.request', 'body': (line + '\n').encode(), 'more_body': True}
+        for _ in range(50)
+    ]
+    messages.append({'type': 'http.request', 'body': b'', 'more_body': False})
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/predict/stream', 'query_string': b'',
+             'headers': [(b'content-type', b'application/x-ndjson')]}
+    sent = []
+    
+    async def receive():
+        return messages.pop(0)
+    
+    async def send(message):
+        sent.append(message)
+    
+    asyncio.run(asgi_app(scope, receive, send))
+    
+    assert sent[0]['status'] == 200
+    results = b''.join(m.get('body', b'') for m in sent[1:]).decode().splitlines()
+    assert [json.loads(result)['index'] for result in results] == list(range(50))
+
+
+def test_asgi_releases_slot_before_sending_to_slow_client():
+    """A client that is slow to receive does not hold the executor slot"""
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [environ['PATH_INFO'].encode()]
+    
+    adapter = ASGIAdapter(app, max_workers=1)
+    
+    async def run_both():
+        slow_client_blocked = asyncio.Event()
+        release_slow_client = asyncio.Event()
+        
+        def request(path, send):
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+            return adapter({'type': 'http', 'method': 'GET', 'path': path}, receive, send)
+        
+        async def slow_send(message):
+            if message['type'] == 'http.response.body':
+                slow_client_blocked.set()
+                await release_slow_client.wait()
+        
+        fast_sent = []
+        
+        async def fast_send(message):
+            fast_sent.append(message)
+        
+        slow = asyncio.create_task(request('/slow', slow_send))
+        await slow_client_blocked.wait()
+        await asyncio.wait_for(request('/fast', fast_send), timeout=5)
+        release_slow_client.set()
+        await slow
+        return fast_sent
+    
+    fast_sent = asyncio.run(run_both())
+    assert fast_sent[0]['status'] == 200
+    assert b''.join(m.get('body', b'') for m in fast_sent[1:]) == b'/fast'
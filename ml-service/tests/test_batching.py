@@ -0,0 +1,78 @@
+"""
+Micro-batching Tests
+"""
+import threading
+import numpy as np
+import pytest
+from utils.batching import MicroBatcher
+
+
+class RecordingModel:
+    """Stand-in model that records the batch sizes it is called with"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def predict_proba_array(self, features):
+        self.calls.append(len(features))
+        # Each row's "probabilities" echo its first feature
+        return np.column_stack([features[:, 0], 1 - features[:, 0]])
+
+
+class FailingModel:
+    def predict_proba_array(self, features):
+        raise RuntimeError("model exploded")
+
+
+def test_concurrent_rows_are_coalesced():
+    """Concurrent submissions share one model call and get their own row"""
+    model = RecordingModel()
+    batcher = MicroBatcher(window_ms=100, max_batch_rows=64)
+    results = {}
+    barrier = threading.Barrier(16)
+    
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.submit(model, np.array([[i / 100, 0, 0, 0]]))
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sum(model.calls) == 16
+    assert len(model.calls) < 16
+    for i, probabilities in results.items():
+        assert probabilities.shape == (1, 2)
+        assert probabilities[0, 0] == pytest.approx(i / 100)
+    
+    stats = batcher.stats()
+    assert stats['rows'] == 16
+    assert stats['batches'] == len(model.calls)
+    assert sum(stats['batch_size_histogram'].values()) == stats['batches']
+    assert sum(stats['queue_wait_ms']['histogram'].values()) == 16
+
+
+def test_batch_respects_max_rows():
+    """Batches never exceed max_batch_rows"""
+    model = RecordingModel()
+    batcher = MicroBatcher(window_ms=50, max_batch_rows=4)
+    threads = [
+        threading.Thread(target=batcher.submit, args=(model, np.zeros((1, 4))))
+        for _ in range(12)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sum(model.calls) == 12
+    assert max(model.calls) <= 4
+
+
+def test_model_errors_reach_the_caller():
+    """A failing model call raises in every caller of that batch"""
+    batcher = MicroBatcher(window_ms=1)
+    with pytest.raises(RuntimeError, match='model exploded'):
+        batcher.submit(FailingModel(), np.zeros((1, 4)))
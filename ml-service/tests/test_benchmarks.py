@@ -0,0 +1,59 @@
+"""
+Benchmark Suite Tests
+"""
+import json
+
+from benchmarks import run_benchmarks
+from config.config import Config
+
+
+def test_compare_flags_regressions():
+    baseline = {'single_predict': {'flat': {'p50_ms': 1.0, 'iterations': 100}},
+                'batch': {'100': {'rows_per_s': 1000.0}}}
+    current = {'single_predict': {'flat': {'p50_ms': 1.5, 'iterations': 100}},
+               'batch': {'100': {'rows_per_s': 950.0}}}
+
+    rows = {row['metric']: row for row in run_benchmarks.compare(current, baseline, 0.1)}
+
+    assert set(rows) == {'single_predict.flat.p50_ms', 'batch.100.rows_per_s'}
+    assert rows['single_predict.flat.p50_ms']['regression']
+    assert not rows['batch.100.rows_per_s']['regression']
+    assert rows['batch.100.rows_per_s']['change'] == -0.05
+
+
+def test_suite_writes_json(tmp_path, monkeypatch):
+    # main() switches these off for the process; restore them afterwards
+    monkeypatch.setattr(Config, 'PREDICTION_CACHE_ENABLED', Config.PREDICTION_CACHE_ENABLED)
+    monkeypatch.setattr(Config, 'MODEL_WATCH_ENABLED', Config.MODEL_WATCH_ENABLED)
+    output = tmp_path / 'bench.json'
+    status = run_benchmarks.main([
+        '--iterations', '5', '--batch-sizes', '1,10', '--batch-repeats', '1',
+        '--load-repeats', '1', '--backends', 'flat', '--output', str(output),
+    ])
+    assert status == 0
+
+    report = json.loads(output.read_text())
+    assert report['environment']['numpy']
+    results = report['results']
+    assert set(results['batch']) == {'1', '10'}
+    assert results['batch']['10']['rows_per_s'] > 0
+    assert results['single_predict']['flat']['iterations'] == 5
+    assert results['http']['test_client']['requests_per_s'] > 0
+    assert results['memory']['model_footprint_bytes'] > 0
+
+    # Comparing a run with itself reports no regressions
+    assert run_benchmarks.main([
+        '--iterations', '5', '--batch-sizes', '1,10', '--batch-repeats', '1',
+        '--load-repeats', '1', '--backends', 'flat', '--baseline', str(output),
+        '--tolerance', '100',
+    ]) == 0
+
+
+def test_single_predict_keys_by_requested_backend():
+    """A backend that falls back does not overwrite the fallback's numbers"""
+    results = run_benchmarks.bench_single_predict('models/trained', ['sklearn', 'lookup'], 3, warmup=1)
+
+    assert set(results) == {'sklearn', 'lookup'}
+    assert results['sklearn']['active_backend'] == 'sklearn'
+    assert results['lookup']['active_backend'] == 'sklearn'
+    assert results['lookup']['iterations'] == 3
@@ -0,0 +1,53 @@
+"""
+Forecaster Tests
+"""
+import pytest
+from utils.forecast import HoltForecaster, forecast_alerts
+
+
+def test_linear_decline_is_tracked():
+    """A steady DO decline is learned and extrapolated"""
+    forecaster = HoltForecaster()
+    for step in range(120):
+        hours = step * 0.25
+        forecaster.update(hours, 20.0 - 0.4 * hours)
+    
+    assert forecaster.trend == pytest.approx(-0.4, rel=1e-3)
+    assert forecaster.forecast(2.0) == pytest.approx(20.0 - 0.4 * 31.75, rel=1e-3)
+    assert forecaster.hours_until(5.0, 'below') == pytest.approx((forecaster.level - 5.0) / 0.4, rel=1e-3)
+
+
+def test_alert_before_threshold_is_crossed():
+    """DO alerts fire while the reading is still above 5.0 mg/L"""
+    forecaster = HoltForecaster()
+    for step in range(96):
+        hours = step * 0.25
+        forecaster.update(hours, 15.5 - 0.4 * hours)  # ends at 6.0 mg/L
+    assert forecaster.level > 5.0
+    
+    alerts = forecast_alerts({'dissolved_oxygen': forecaster}, horizon_hours=6)
+    assert [(a['severity'], a['threshold']) for a in alerts] == [('warning', 5.0)]
+    assert alerts[0]['hours_until'] == pytest.approx(2.5, abs=0.1)
+    
+    alerts = forecast_alerts({'dissolved_oxygen': forecaster}, horizon_hours=10)
+    assert [(a['severity'], a['threshold']) for a in alerts] == [('critical', 3.0), ('warning', 5.0)]
+
+
+def test_damped_trend_crossing_matches_forecast():
+    """hours_until inverts the damped forecast"""
+    forecaster = HoltForecaster(damping=0.9)
+    for step in range(20):
+        forecaster.update(step * 0.5, 30.0 + 0.3 * step)
+    
+    hours = forecaster.hours_until(forecaster.level + 1.0, 'above')
+    
+    assert hours is not None
+    assert forecaster.forecast(hours) == pytest.approx(forecaster.level + 1.0)
+    assert forecaster.hours_until(forecaster.level + 1000.0, 'above') is None
+
+
+def test_not_ready_without_enough_readings():
+    forecaster = HoltForecaster()
+    forecaster.update(0.0, 2.0)
+    
+    assert forecast_alerts({'dissolved_oxygen': forecaster}, horizon_hours=6) == []
@@ -0,0 +1,171 @@
+"""
+Liveness and Readiness Tests
+"""
+import shutil
+
+import pytest
+from app import create_app
+from app.health import get_readiness
+from app.predict import get_degraded_mode
+from utils import model_utils
+from utils.model_utils import CANARY_READING
+
+TRAINED_DIR = 'models/trained'
+
+
+def _client():
+    app = create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+@pytest.fixture
+def missing_model(tmp_path, monkeypatch):
+    """Serve from an empty directory; loads fail and are retried immediately"""
+    directory = tmp_path / 'trained'
+    directory.mkdir()
+    monkeypatch.setattr(model_utils, '_models', model_utils.MultiModelRegistry(
+        str(directory), retry_base_seconds=0.0, retry_max_seconds=0.0
+    ))
+    monkeypatch.setattr(get_readiness(), 'retry_seconds', 0.0)
+    return directory
+
+
+def test_ready_after_warm_up():
+    client = _client()
+
+    response = client.get('/api/health/ready')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['status'] == 'ready'
+    assert data['model']['version'] == model_utils.get_model_instance().version
+    assert set(data['warm_up_ms']) == {
+        'load', 'single', 'batch', 'compact', 'columnar', 'fallback', 'serialize'
+    }
+    assert client.get('/api/health').get_json()['ready'] is True
+
+
+def test_not_ready_without_model(missing_model):
+    client = _client()
+
+    ready = client.get('/api/health/ready')
+    assert ready.status_code == 503
+    assert ready.get_json()['reason'].startswith('warm-up failed: load')
+
+    # Liveness and the legacy health check stay up
+    assert client.get('/api/health/live').status_code == 200
+    health = client.get('/api/health')
+    assert health.status_code == 200
+    assert health.get_json()['status'] == 'healthy'
+    assert health.get_json()['ready'] is False
+
+
+def test_becomes_ready_when_model_appears(missing_model):
+    client = _client()
+    assert client.get('/api/health/ready').status_code == 503
+
+    shutil.rmtree(missing_model)
+    shutil.copytree(TRAINED_DIR, missing_model)
+
+    assert client.get('/api/health/ready').status_code == 200
+
+
+def test_not_ready_while_degraded(monkeypatch):
+    from app import predict
+
+    monkeypatch.setattr(get_readiness(), 'retry_seconds', 0.0)
+    client = _client()
+    assert client.get('/api/health/ready').status_code == 200
+
+    def broken_model(name=None):
+        raise RuntimeError('inference failed')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(predict, 'get_model_instance', broken_model)
+        client.post('/api/predict', json=CANARY_READING)
+
+        response = client.get('/api/health/ready')
+        assert response.status_code == 503
+        assert 'Rule-based' in response.get_json()['reason']
+        assert client.get('/api/health/live').status_code == 200
+
+    assert client.get('/api/health/ready').status_code == 200
+
+
+def test_probe_clears_degraded_mode_without_traffic(monkeypatch):
+    """A probe re-runs the canary predictions instead of waiting for a request"""
+    client = _client()
+    monkeypatch.setattr(get_readiness(), '_retry_at', 0.0)
+    get_degraded_mode().record(RuntimeError('transient failure'))
+
+    assert client.get('/api/health/ready').status_code == 200
+    assert get_degraded_mode().model_stats()['active'] is False
+
+
+def test_broken_variant_does_not_affect_readiness(monkeypatch):
+    from app import predict
+
+    client = _client()
+    original = predict.get_model_instance
+
+    def model_for(name=None):
+        if name == 'broken':
+            raise RuntimeError('broken variant')
+        return original(name)
+
+    monkeypatch.setattr(predict, 'get_model_instance', model_for)
+    predict.predict_water_quality(CANARY_READING, 'broken')
+
+    assert get_degraded_mode().model_stats('broken')['active'] is True
+    assert client.get('/api/health/ready').status_code == 200
+
+
+def test_forked_worker_warms_up_again(monkeypatch):
+    client = _client()
+    readiness = get_readiness()
+    # As seen by a worker forked from a warm master
+    monkeypatch.setattr(readiness, 'warmed_pid', -1)
+    monkeypatch.setattr(readiness, '_attempt_pid', -1)
+
+    assert readiness.status(warm=False)['ready'] is False
+    assert client.get('/api/health/ready').status_code == 200
+
+
+def test_probes_retry_warm_up_at_most_once_per_interval(missing_model, monkeypatch):
+    client = _client()
+    readiness = get_readiness()
+    monkeypatch.setattr(readiness, 'retry_seconds', 60.0)
+    attempts = []
+    original = readiness._warm_up
+
+    def counting_warm_up():
+        attempts.append(1)
+        return original()
+
+    monkeypatch.setattr(readiness, '_warm_up', counting_warm_up)
+    assert client.get('/api/health/ready').status_code == 503
+    assert client.get('/api/health/ready').status_code == 503
+    assert len(attempts) == 1
+
+    shutil.rmtree(missing_model)
+    shutil.copytree(TRAINED_DIR, missing_model)
+    assert client.get('/api/health/ready').status_code == 503
+    assert len(attempts) == 1
+
+    monkeypatch.setattr(readiness, '_retry_at', 0.0)
+    assert client.get('/api/health/ready').status_code == 200
+    assert len(attempts) == 2
+
+
+def test_default_model_is_not_evicted(tmp_path, monkeypatch):
+    """Loading variants past the memory cap keeps the default model ready"""
+    shutil.copytree(TRAINED_DIR, tmp_path / 'variants' / 'earthen')
+    models = model_utils.MultiModelRegistry(TRAINED_DIR, str(tmp_path / 'variants'), max_bytes=1)
+    monkeypatch.setattr(model_utils, '_models', models)
+    client = _client()
+
+    models.get('earthen')
+
+    assert models.registry('default').peek() is not None
+    assert client.get('/api/health/ready').status_code == 200
@@ -0,0 +1,103 @@
+"""
+Prometheus Metrics Tests
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+from prometheus_client import REGISTRY
+from app import create_app
+from config.config import Config
+from utils import metrics
+
+READING = {'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, 'PREDICTION_CACHE_ENABLED', False)
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_predict_records_route_and_stages(client):
+    requests_before = _sample(
+        'nilasense_http_requests_total', route='/api/predict', method='POST', status='200'
+    )
+    stages_before = {
+        stage: _sample('nilasense_prediction_stage_duration_seconds_count', stage=stage)
+        for stage in metrics.STAGES
+    }
+    model_rows_before = _sample('nilasense_predictions_total', source='model')
+
+    response = client.post('/api/predict', json=READING)
+    assert response.status_code == 200
+
+    assert _sample(
+        'nilasense_http_requests_total', route='/api/predict', method='POST', status='200'
+    ) == requests_before + 1
+    for stage in metrics.STAGES:
+        assert _sample(
+            'nilasense_prediction_stage_duration_seconds_count', stage=stage
+        ) == stages_before[stage] + 1, stage
+    assert _sample('nilasense_predictions_total', source='model') == model_rows_before + 1
+
+
+def test_batch_size_and_route_template(client):
+    batch_before = _sample('nilasense_prediction_batch_rows_sum', source='model')
+    trend_before = _sample(
+        'nilasense_http_requests_total', route='/api/ponds/<pond_id>/trend', method='GET', status='404'
+    )
+
+    client.post('/api/predict/batch', json={'readings': [READING] * 5})
+    client.get('/api/ponds/metrics-test/trend')
+
+    assert _sample('nilasense_prediction_batch_rows_sum', source='model') == batch_before + 5
+    # Routes are labelled by URL rule so pond ids don't multiply series
+    assert _sample(
+        'nilasense_http_requests_total', route='/api/ponds/<pond_id>/trend', method='GET', status='404'
+    ) == trend_before + 1
+
+
+def test_metrics_endpoint_exposition(client):
+    client.post('/api/predict', json=READING)
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert 'nilasense_prediction_stage_duration_seconds_bucket' in body
+    assert 'nilasense_http_requests_total{method="POST",route="/api/predict",status="200"}' in body
+
+
+def test_metrics_disabled(client, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_ENABLED', False)
+    before = _sample('nilasense_predictions_total', source='model')
+
+    client.post('/api/predict', json=READING)
+
+    assert client.get('/metrics').status_code == 404
+    assert _sample('nilasense_predictions_total', source='model') == before
+
+
+def test_multiprocess_aggregation(tmp_path):
+    """Samples written by separate processes are summed in one scrape"""
+    script = (
+        "from utils import metrics; metrics.record_predictions('fallback', 3)"
+    )
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', script], env=env, check=True)
+
+    scrape = subprocess.run(
+        [sys.executable, '-c', "from utils import metrics; print(metrics.render()[0].decode())"],
+        env=env, check=True, capture_output=True, text=True
+    )
+    assert 'nilasense_predictions_total{source="fallback"} 6.0' in scrape.stdout
@@ -0,0 +1,69 @@
+"""
+Multi-Model Registry Tests
+"""
+import json
+import shutil
+
+import pytest
+from app import create_app
+from utils import model_utils
+
+TRAINED_DIR = 'models/trained'
+
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    """Registry with the default model and two named variants"""
+    for name in ('tarpaulin', 'earthen'):
+        shutil.copytree(TRAINED_DIR, tmp_path / 'variants' / name)
+    registry = model_utils.MultiModelRegistry(
+        TRAINED_DIR, str(tmp_path / 'variants'), pond_routes={3: 'earthen'}
+    )
+    monkeypatch.setattr(model_utils, '_models', registry)
+    return registry
+
+
+def test_routing_by_model_and_pond(models):
+    """An explicit model wins, pond ids use the routes, the rest go to default"""
+    assert models.resolve(model='tarpaulin', pond_id=3) == 'tarpaulin'
+    assert models.resolve(pond_id='3') == 'earthen'
+    assert models.resolve(pond_id=9) == 'default'
+    assert models.available() == ['default', 'earthen', 'tarpaulin']
+    
+    with pytest.raises(model_utils.UnknownModelError):
+        models.registry('missing')
+    with pytest.raises(model_utils.UnknownModelError):
+        models.registry('../trained')
+
+
+def test_least_recently_used_model_is_unloaded(models):
+    """Loading past the memory cap unloads the least recently used model"""
+    tarpaulin = models.get('tarpaulin')
+    models.max_bytes = tarpaulin.footprint_bytes
+    
+    earthen = models.get('earthen')
+    
+    assert models.registry('tarpaulin').peek() is None
+    assert models.registry('earthen').peek() is earthen
+    assert models.evictions == 1
+    assert tarpaulin.is_loaded  # requests holding it can still finish
+    assert models.get('tarpaulin').name == 'tarpaulin'
+
+
+def test_predict_routes_to_pond_model(models, monkeypatch):
+    """/api/predict uses the pond's model and records its latency"""
+    from config.config import Config
+    
+    # Copied artifacts share a version, so a cached answer would skip the model
+    monkeypatch.setattr(Config, 'PREDICTION_CACHE_ENABLED', False)
+    client = create_app().test_client()
+    payload = {'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8}
+    
+    response = client.post('/api/predict', json=dict(payload, pond_id=3))
+    assert response.status_code == 200
+    
+    stats = json.loads(client.get('/api/stats').data)['data']['models']
+    assert stats['models']['earthen']['latency']['calls'] >= 1
+    
+    response = client.post('/api/predict', json=dict(payload, model='missing'))
+    assert response.status_code == 400
@@ -0,0 +1,188 @@
+"""
+Model Registry and Hot Reload Tests
+"""
+import json
+import os
+import shutil
+import threading
+
+import pytest
+from app import create_app
+from config.config import Config
+from utils import model_utils
+from utils.model_watcher import ModelFileWatcher
+
+TRAINED_DIR = 'models/trained'
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    """Copy of the trained model files served as the active model"""
+    directory = tmp_path / 'trained'
+    shutil.copytree(TRAINED_DIR, directory)
+    monkeypatch.setattr(model_utils, '_models', model_utils.MultiModelRegistry(str(directory)))
+    model_utils.reload_model()
+    return directory
+
+
+@pytest.fixture
+def client(model_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_reload_requires_admin_token(client, monkeypatch):
+    """Reload is 401 with a wrong token and 403 when no token is configured"""
+    assert client.post('/api/model/reload', headers={'X-Admin-Token': 'wrong'}).status_code == 401
+    
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', '')
+    assert client.post('/api/model/reload', headers={'X-Admin-Token': ''}).status_code == 403
+
+
+def test_reload_swaps_model(client, model_dir):
+    """A reload installs a new instance and model info reports its version"""
+    old = model_utils.get_model_instance()
+    
+    response = client.post('/api/model/reload', headers={'Authorization': 'Bearer secret'})
+    
+    assert response.status_code == 200
+    data = json.loads(response.data)['data']
+    assert model_utils.get_model_instance() is not old
+    assert old.is_loaded  # in-flight requests keep a working model
+    info = json.loads(client.get('/api/model/info').data)['data']
+    assert info['version'] == data['version']
+
+
+def test_failed_reload_keeps_current_model(client, model_dir):
+    """A broken artifact never replaces the serving model"""
+    old = model_utils.get_model_instance()
+    (model_dir / model_utils.MODEL_FILE).write_bytes(b'not a pickle')
+    
+    response = client.post('/api/model/reload', headers={'X-Admin-Token': 'secret'})
+    
+    assert response.status_code == 500
+    assert model_utils.get_model_instance() is old
+
+
+def _touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_watcher_reloads_after_file_settles(model_dir):
+    """The watcher reloads once the changed file looks the same twice"""
+    watcher = ModelFileWatcher()
+    old = model_utils.get_model_instance()
+    
+    _touch(model_dir / model_utils.MODEL_FILE)
+    
+    assert watcher.poll() == 0
+    assert model_utils.get_model_instance() is old
+    assert watcher.poll() == 1
+    assert watcher.reloads == 1
+    assert model_utils.get_model_instance() is not old
+    assert watcher.poll() == 0
+
+
+def test_watcher_reloads_when_only_the_scaler_changes(model_dir):
+    """A new scaler is loaded together with the model it belongs to"""
+    watcher = ModelFileWatcher()
+    old = model_utils.get_model_instance()
+    
+    _touch(model_dir / model_utils.SCALER_FILE)
+    watcher.poll()
+    
+    assert watcher.poll() == 1
+    assert model_utils.get_model_instance() is not old
+
+
+def test_watcher_reloads_named_variants_and_lookup_tables(model_dir, tmp_path, monkeypatch):
+    """Every loaded model is watched, including a new lookup table"""
+    shutil.copytree(TRAINED_DIR, tmp_path / 'variants' / 'earthen')
+    models = model_utils.MultiModelRegistry(str(model_dir), str(tmp_path / 'variants'))
+    monkeypatch.setattr(model_utils, '_models', models)
+    default = models.get()
+    earthen = models.get('earthen')
+    watcher = ModelFileWatcher()
+    
+    lookup_dir = tmp_path / 'variants' / 'earthen' / model_utils.LOOKUP_TABLE_DIR
+    lookup_dir.mkdir()
+    (lookup_dir / model_utils.LookupTableModel.HEADER_FILE).write_text('{}')
+    watcher.poll()
+    
+    assert watcher.poll() == 1
+    assert models.get('earthen') is not earthen
+    assert models.get() is default
+
+
+def test_create_app_does_not_start_watcher(model_dir, monkeypatch):
+    """The watcher starts on the first request, not in a preloading master"""
+    from utils import model_watcher
+    
+    started = []
+    monkeypatch.setattr(Config, 'MODEL_WATCH_ENABLED', True)
+    monkeypatch.setattr(model_watcher, '_watcher', None)
+    monkeypatch.setattr(model_watcher.ModelFileWatcher, 'start', lambda self: started.append(self))
+    app = create_app()
+    assert started == []
+    
+    client = app.test_client()
+    client.get('/api/health')
+    client.get('/api/health')
+    assert len(started) == 1
+    assert started[0].pid == os.getpid()
+
+
+def test_concurrent_first_requests_load_once(tmp_path, monkeypatch):
+    """Threads racing on an empty registry share one load"""
+    shutil.copytree(TRAINED_DIR, tmp_path / 'trained')
+    registry = model_utils.ModelRegistry(str(tmp_path / 'trained'))
+    loads = []
+    original = model_utils.WaterQualityModel.load_model
+    
+    def counting_load(self):
+        loads.append(self)
+        return original(self)
+    
+    monkeypatch.setattr(model_utils.WaterQualityModel, 'load_model', counting_load)
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(registry.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(loads) == 1
+    assert all(model is models[0] for model in models)
+
+
+def test_failed_load_is_retried_after_backoff(tmp_path, monkeypatch):
+    """A failed load is not cached; requests fail fast until the backoff ends"""
+    registry = model_utils.ModelRegistry(str(tmp_path / 'missing'), retry_base_seconds=30)
+    clock = [1000.0]
+    monkeypatch.setattr(model_utils.time, 'monotonic', lambda: clock[0])
+    
+    with pytest.raises(model_utils.ModelUnavailableError):
+        registry.get()
+    with pytest.raises(model_utils.ModelUnavailableError, match='next load attempt'):
+        registry.get()
+    assert registry.failures == 1
+    
+    shutil.copytree(TRAINED_DIR, tmp_path / 'missing')
+    clock[0] += 31
+    assert registry.get().is_loaded
+    assert registry.failures == 0
+
+
+def test_model_info_unavailable(tmp_path, monkeypatch):
+    """Model info answers 503 while no model can be loaded"""
+    app = create_app()
+    monkeypatch.setattr(model_utils, '_models', model_utils.MultiModelRegistry(str(tmp_path)))
+    
+    response = app.test_client().get('/api/model/info')
+    
+    assert response.status_code == 503
+    assert 'fallback_info' in json.loads(response.data)
@@ -0,0 +1,205 @@
+"""
+Model Utility Tests
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+import json
+import os
+import shutil
+from models.training import build_lookup_table, train_model
+from utils.model_utils import (
+    FlatForest,
+    LOOKUP_TABLE_DIR,
+    LookupTableModel,
+    NATIVE_ARTIFACT_DIR,
+    NATIVE_HEADER_FILE,
+    WaterQualityModel,
+    export_native_artifact,
+)
+
+
+@pytest.fixture(scope='module')
+def model():
+    """Load the bundled trained model with the sklearn backend"""
+    model = WaterQualityModel()
+    assert model.load_model()
+    # Sequential accumulation so sklearn's own output is deterministic
+    model.model.set_params(n_jobs=1, verbose=0)
+    return model
+
+
+@pytest.fixture(scope='module')
+def readings():
+    """Random readings covering the validated input ranges"""
+    rng = np.random.default_rng(42)
+    return np.column_stack([
+        rng.uniform(0, 14, 3000),
+        rng.uniform(-10, 50, 3000),
+        rng.uniform(0, 100, 3000),
+        rng.uniform(0, 20, 3000)
+    ])
+
+
+def test_flat_forest_matches_sklearn_bitwise(model, readings):
+    """Flat forest probabilities are bit-for-bit identical to sklearn"""
+    flat = FlatForest.from_sklearn(model.model, chunk_size=512)
+    scaled = model.scaler.transform(readings)
+    
+    expected = model.model.predict_proba(scaled)
+    actual = flat.predict_proba(scaled)
+    
+    np.testing.assert_array_equal(actual, expected)
+
+
+def test_flat_forest_matches_on_split_thresholds(model):
+    """Rows sitting exactly on split thresholds follow sklearn's <= rule"""
+    flat = FlatForest.from_sklearn(model.model)
+    is_split = flat.children_left != np.arange(flat.n_nodes)
+    thresholds = flat.threshold[is_split][:400]
+    features = flat.feature[is_split][:400]
+    
+    scaled = np.zeros((len(thresholds), 4))
+    scaled[np.arange(len(thresholds)), features] = thresholds
+    
+    np.testing.assert_array_equal(
+        flat.predict_proba(scaled),
+        model.model.predict_proba(scaled)
+    )
+
+
+def test_flat_backend_prediction_schema(model):
+    """Flat backend serves the same prediction as the sklearn backend"""
+    flat_model = WaterQualityModel(backend='flat')
+    assert flat_model.load_model()
+    assert flat_model.active_backend == 'flat'
+    
+    expected = model.predict(7.2, 28.5, 15.3, 6.8)
+    actual = flat_model.predict(7.2, 28.5, 15.3, 6.8)
+    
+    assert actual['quality'] == expected['quality']
+    assert actual['probabilities'] == expected['probabilities']
+    assert actual['confidence'] == expected['confidence']
+
+
+def test_unknown_backend_falls_back_to_sklearn():
+    """Unknown backend names keep sklearn as the fallback"""
+    model = WaterQualityModel(backend='does-not-exist')
+    assert model.load_model()
+    assert model.active_backend == 'sklearn'
+
+
+@pytest.fixture(scope='module')
+def small_forest():
+    """Small forest whose threshold grid fits in a lookup table"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 4))
+    y = (X[:, 0] + X[:, 3] > 0).astype(int) + (X[:, 1] > 1).astype(int)
+    forest = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0, n_jobs=1)
+    return forest.fit(X, y)
+
+
+def test_lookup_table_matches_forest_bitwise(small_forest, tmp_path):
+    """Lookup table answers are exact, including after a save/load round trip"""
+    lookup = LookupTableModel.build(FlatForest.from_sklearn(small_forest))
+    lookup.save(str(tmp_path))
+    loaded = LookupTableModel.load(str(tmp_path))
+    
+    rng = np.random.default_rng(1)
+    X = rng.normal(scale=2.0, size=(5000, 4))
+    # Include rows sitting exactly on the split thresholds
+    X[:len(lookup.thresholds[0]), 0] = lookup.thresholds[0]
+    
+    expected = small_forest.predict_proba(X)
+    np.testing.assert_array_equal(lookup.predict_proba(X), expected)
+    np.testing.assert_array_equal(loaded.predict_proba(X), expected)
+    assert isinstance(loaded.table, np.memmap)
+
+
+def test_lookup_table_refuses_oversized_grid(model):
+    """The bundled 300-tree forest has far too many thresholds for a table"""
+    with pytest.raises(ValueError):
+        LookupTableModel.build(FlatForest.from_sklearn(model.model), max_cells=1000)
+
+
+def test_build_lookup_table_script_with_native_artifact(small_forest, tmp_path):
+    """The build script works on a freshly trained directory, which has native/"""
+    rng = np.random.default_rng(2)
+    scaler = StandardScaler().fit(rng.normal(loc=5.0, scale=3.0, size=(100, 4)))
+    train_model.save_model(small_forest, scaler, {'f1_score': 1.0}, str(tmp_path))
+    assert (tmp_path / NATIVE_ARTIFACT_DIR / NATIVE_HEADER_FILE).exists()
+    
+    build_lookup_table.main(['--model-dir', str(tmp_path), '--verify-samples', '500'])
+    assert (tmp_path / LOOKUP_TABLE_DIR / LookupTableModel.HEADER_FILE).exists()
+    
+    lookup = WaterQualityModel(model_dir=str(tmp_path), backend='lookup')
+    assert lookup.load_model()
+    assert lookup.active_backend == 'lookup'
+    readings = rng.normal(loc=5.0, scale=3.0, size=(500, 4))
+    np.testing.assert_array_equal(
+        lookup.predict_proba_array(readings),
+        small_forest.predict_proba(scaler.transform(readings))
+    )
+
+
+def test_stale_lookup_table_is_refused(small_forest, tmp_path):
+    """A table built from a previous model falls back to the forest engine"""
+    scaler = StandardScaler().fit(np.random.default_rng(3).normal(size=(100, 4)))
+    train_model.save_model(small_forest, scaler, {'f1_score': 1.0}, str(tmp_path))
+    build_lookup_table.main(['--model-dir', str(tmp_path), '--verify-samples', '500'])
+    header = json.loads((tmp_path / LOOKUP_TABLE_DIR / LookupTableModel.HEADER_FILE).read_text())
+    
+    retrained = RandomForestClassifier(n_estimators=3, max_depth=2, random_state=1, n_jobs=1)
+    retrained.fit(np.random.default_rng(4).normal(size=(200, 4)), np.arange(200) % 3)
+    train_model.save_model(retrained, scaler, {'f1_score': 1.0}, str(tmp_path))
+    
+    model = WaterQualityModel(model_dir=str(tmp_path), backend='lookup')
+    assert model.load_model()
+    assert header['source_sha256'] != model.version
+    assert model.active_backend == 'flat'
+
+
+@pytest.fixture
+def native_model_dir(model, tmp_path):
+    """Copy of the trained pickles plus a converted native artifact"""
+    for name in os.listdir('models/trained'):
+        if name.endswith('.pkl'):
+            shutil.copy(os.path.join('models/trained', name), tmp_path)
+    export_native_artifact(
+        model.model, model.scaler, model.metadata,
+        str(tmp_path / NATIVE_ARTIFACT_DIR),
+        source_path=str(tmp_path / 'water_quality_rf_model.pkl')
+    )
+    return tmp_path
+
+
+def test_native_artifact_matches_pickle(model, native_model_dir, readings):
+    """Native artifact loads memory-mapped and predicts like the pickle"""
+    native = WaterQualityModel(model_dir=str(native_model_dir), model_format='native')
+    assert native.load_model()
+    assert native.artifact_format == 'native'
+    assert isinstance(native.forest.value, np.memmap)
+    
+    np.testing.assert_array_equal(
+        native.predict_proba_array(readings),
+        model.model.predict_proba(model.scaler.transform(readings))
+    )
+    assert native.get_model_info()['classes'] == model.get_model_info()['classes']
+
+
+def test_auto_format_skips_stale_native_artifact(native_model_dir):
+    """auto mode falls back to the pickles when the artifact is stale"""
+    header_path = native_model_dir / NATIVE_ARTIFACT_DIR / NATIVE_HEADER_FILE
+    
+    model = WaterQualityModel(model_dir=str(native_model_dir))
+    assert model.load_model()
+    assert model.artifact_format == 'native'
+    
+    header = json.loads(header_path.read_text())
+    header['source_sha256'] = '0' * 64
+    header_path.write_text(json.dumps(header))
+    
+    model = WaterQualityModel(model_dir=str(native_model_dir))
+    assert model.load_model()
+    assert model.artifact_format == 'pickle'
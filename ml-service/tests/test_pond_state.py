@@ -0,0 +1,83 @@
+"""
+Pond Rolling State Tests
+"""
+import numpy as np
+import pytest
+from utils.pond_state import PondStore, RollingWindow, format_timestamp, parse_timestamp
+
+
+def test_rolling_window_matches_full_recomputation():
+    """Incremental mean/min/max/slope equal a rescan of the last N values"""
+    rng = np.random.default_rng(7)
+    times = 480000 + np.cumsum(rng.uniform(0.05, 0.2, 1000))  # hours since epoch
+    values = 6 + np.sin(times) + rng.normal(0, 0.3, 1000)
+    window = RollingWindow(50)
+    
+    for i, (t, x) in enumerate(zip(times, values)):
+        window.push(t, x)
+        recent_t = times[max(0, i - 49):i + 1]
+        recent_x = values[max(0, i - 49):i + 1]
+        
+        assert len(window) == len(recent_x)
+        assert window.mean == pytest.approx(recent_x.mean(), rel=1e-9)
+        assert window.minimum == recent_x.min()
+        assert window.maximum == recent_x.max()
+        if len(recent_x) >= 2:
+            assert window.slope == pytest.approx(np.polyfit(recent_t, recent_x, 1)[0], rel=1e-6, abs=1e-9)
+
+
+def test_store_rejects_out_of_order_readings():
+    """Readings are append-only per pond"""
+    store = PondStore(window_size=4)
+    reading = {'ph': 7.0, 'temperature': 28.0, 'turbidity': 10.0, 'dissolved_oxygen': 6.0}
+    
+    state, rejected = store.append(1, [(reading, 7200.0), (reading, 3600.0), (reading, 10800.0)])
+    
+    assert [entry['position'] for entry in rejected] == [1]
+    assert state.readings == 2
+    assert store.trend('1')['last_at'] == '1970-01-01T03:00:00Z'
+
+
+def test_store_evicts_least_recently_updated_pond():
+    store = PondStore(window_size=4, max_ponds=2)
+    reading = {'ph': 7.0, 'temperature': 28.0, 'turbidity': 10.0, 'dissolved_oxygen': 6.0}
+    
+    for pond in ('a', 'b', 'a', 'c'):
+        store.append(pond, [(reading, 0.0)])
+    
+    assert store.trend('b') is None
+    assert store.trend('a') is not None
+
+
+def test_store_adds_pond_only_with_accepted_readings():
+    store = PondStore(window_size=4)
+    
+    state, rejected = store.append('empty', [])
+    
+    assert state is None and rejected == []
+    assert store.trend('empty') is None
+    assert store.stats()['ponds'] == 0
+
+
+def test_parse_timestamp():
+    assert parse_timestamp('1970-01-01T01:00:00Z') == 3600.0
+    assert parse_timestamp(60) == 60.0
+    with pytest.raises(ValueError):
+        parse_timestamp('yesterday')
+
+
+def test_parse_timestamp_converts_epoch_milliseconds():
+    assert parse_timestamp(1_700_000_000_000) == 1_700_000_000.0
+    assert parse_timestamp(1_700_000_000.5) == 1_700_000_000.5
+
+
+@pytest.mark.parametrize('value', [
+    float('nan'), float('inf'), -float('inf'), 1e30, -1.0, '9999-12-31T23:00:00Z', True
+])
+def test_parse_timestamp_rejects_unformattable_values(value):
+    """Every accepted timestamp can be formatted back, including a forecast horizon later"""
+    with pytest.raises(ValueError):
+        parse_timestamp(value)
+    
+    latest = parse_timestamp('9998-12-31T23:59:59Z')
+    assert format_timestamp(latest + 24 * 3600).startswith('9999-01-01')
@@ -0,0 +1,136 @@
+"""
+Prediction Cache Tests
+"""
+import itertools
+import numpy as np
+import pytest
+from utils.prediction_cache import PredictionCache
+
+_generations = itertools.count(1)
+
+
+class CountingModel:
+    """Stand-in model that counts the rows it scores"""
+    
+    feature_names = ['ph', 'temperature', 'turbidity', 'dissolved_oxygen']
+    
+    def __init__(self, version='v1'):
+        self.version = version
+        self.generation = next(_generations)
+        self.rows_scored = 0
+    
+    def predict_proba_array(self, features):
+        self.rows_scored += len(features)
+        return np.column_stack([features[:, 0] / 14, 1 - features[:, 0] / 14])
+
+
+DECIMALS = {'ph': 2, 'temperature': 1, 'turbidity': 1, 'dissolved_oxygen': 2}
+
+
+def test_rounded_readings_hit_the_cache():
+    """Readings equal at sensor precision share one model call"""
+    model = CountingModel()
+    cache = PredictionCache(decimals=DECIMALS)
+    
+    first = cache.predict_proba(model, np.array([[7.201, 28.5, 15.3, 6.8]]))
+    second = cache.predict_proba(model, np.array([[7.199, 28.54, 15.26, 6.801]]))
+    
+    assert model.rows_scored == 1
+    np.testing.assert_array_equal(first, second)
+    assert first[0, 0] == pytest.approx(7.2 / 14)
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_batch_only_scores_misses():
+    """A batch sends only its uncached rows to the model"""
+    model = CountingModel()
+    cache = PredictionCache(decimals=DECIMALS)
+    cache.predict_proba(model, np.array([[7.0, 28.0, 10.0, 6.0]]))
+    
+    rows = np.array([
+        [7.0, 28.0, 10.0, 6.0],
+        [6.5, 27.0, 12.0, 5.5],
+        [7.0, 28.0, 10.0, 6.0],
+    ])
+    probabilities = cache.predict_proba(model, rows)
+    
+    assert probabilities.shape == (3, 2)
+    assert model.rows_scored == 2
+    np.testing.assert_array_equal(probabilities[0], probabilities[2])
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted when full"""
+    model = CountingModel()
+    cache = PredictionCache(max_entries=2, decimals=DECIMALS)
+    for ph in (6.0, 7.0, 6.0, 8.0):
+        cache.predict_proba(model, np.array([[ph, 28.0, 10.0, 6.0]]))
+    
+    stats = cache.stats()
+    assert stats['size'] == 2
+    assert stats['evictions'] == 1
+    
+    # 7.0 was least recently used and is gone; 6.0 is still cached
+    cache.predict_proba(model, np.array([[6.0, 28.0, 10.0, 6.0]]))
+    assert model.rows_scored == 3
+    cache.predict_proba(model, np.array([[7.0, 28.0, 10.0, 6.0]]))
+    assert model.rows_scored == 4
+
+
+def test_entries_expire(monkeypatch):
+    """Entries older than the TTL are recomputed"""
+    clock = [1000.0]
+    monkeypatch.setattr('utils.prediction_cache.time.monotonic', lambda: clock[0])
+    model = CountingModel()
+    cache = PredictionCache(ttl_seconds=60, decimals=DECIMALS)
+    row = np.array([[7.0, 28.0, 10.0, 6.0]])
+    
+    cache.predict_proba(model, row)
+    clock[0] += 61
+    cache.predict_proba(model, row)
+    
+    assert model.rows_scored == 2
+    assert cache.stats()['expirations'] == 1
+
+
+def test_new_model_version_invalidates():
+    """A different model artifact clears the cache"""
+    cache = PredictionCache(decimals=DECIMALS)
+    row = np.array([[7.0, 28.0, 10.0, 6.0]])
+    cache.predict_proba(CountingModel('v1'), row)
+    
+    new_model = CountingModel('v2')
+    cache.predict_proba(new_model, row)
+    
+    assert new_model.rows_scored == 1
+    assert cache.stats()['invalidations'] == 1
+    assert cache.stats()['model_version'] == 'v2'
+
+
+def test_requests_on_replaced_model_do_not_flip_the_version():
+    """In-flight requests on the old model neither flush nor replace the new entries"""
+    cache = PredictionCache(decimals=DECIMALS)
+    row = np.array([[7.0, 28.0, 10.0, 6.0]])
+    old_model = CountingModel('v1')
+    cache.predict_proba(old_model, row)
+    new_model = CountingModel('v2')
+    cache.predict_proba(new_model, row)
+    
+    cache.predict_proba(old_model, row)
+    cache.predict_proba(new_model, row)
+    
+    assert new_model.rows_scored == 1
+    assert cache.stats()['model_version'] == 'v2'
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_reloading_same_version_is_not_an_invalidation():
+    cache = PredictionCache(decimals=DECIMALS)
+    row = np.array([[7.0, 28.0, 10.0, 6.0]])
+    cache.predict_proba(CountingModel('v1'), row)
+    reloaded = CountingModel('v1')
+    cache.predict_proba(reloaded, row)
+    
+    assert reloaded.rows_scored == 0
+    assert cache.stats()['invalidations'] == 0
@@ -0,0 +1,96 @@
+"""
+Sampling Profiler and X-Timing Tests
+"""
+import threading
+import time
+
+import pytest
+from app import create_app
+from config.config import Config
+from utils import metrics
+from utils.profiler import SamplingProfiler
+
+READING = {'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8}
+ADMIN = {'X-Admin-Token': 'secret'}
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(Config, 'PROFILE_OUTPUT_DIR', str(tmp_path / 'profiles'))
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def _busy_wait_target(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_collects_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_wait_target, args=(stop,), name='busy')
+    worker.start()
+    try:
+        profiler = SamplingProfiler(interval=0.001).run(0.2)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert profiler.samples > 10
+    busy = [stack for stack in profiler.stacks if stack.startswith('busy;')]
+    assert any(stack.endswith('test_profiler.py:_busy_wait_target') for stack in busy)
+    # The sampling thread itself is left out
+    assert not any('profiler.py:run' in stack for stack in profiler.stacks)
+    for line in profiler.collapsed().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0
+
+
+def test_profile_endpoint_requires_admin(client):
+    assert client.post('/api/admin/profile?seconds=0.1').status_code == 401
+    assert client.post('/api/admin/profile?seconds=0', headers=ADMIN).status_code == 400
+    assert client.post('/api/admin/profile?seconds=abc', headers=ADMIN).status_code == 400
+
+
+def test_profile_endpoint_writes_folded_file(client):
+    response = client.post('/api/admin/profile?seconds=0.2&interval_ms=2', headers=ADMIN)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['samples'] > 0
+    with open(data['path']) as f:
+        assert f.read().splitlines()[:10] == data['top_stacks']
+
+    folded = client.post('/api/admin/profile?seconds=0.1&format=folded', headers=ADMIN)
+    assert folded.status_code == 200
+    assert folded.mimetype == 'text/plain'
+    assert folded.headers['X-Profile-Path'].endswith('.folded')
+
+
+def test_timing_header_only_when_requested(client):
+    plain = client.post('/api/predict', json=READING, headers=ADMIN)
+    assert 'X-Timing' not in plain.headers
+
+    # Without the admin token the debug header is ignored
+    anonymous = client.post('/api/predict', json=READING, headers={'X-Debug-Timing': '1'})
+    assert 'X-Timing' not in anonymous.headers
+
+    timed = client.post('/api/predict', json=READING, headers={**ADMIN, 'X-Debug-Timing': '1'})
+    entries = dict(
+        entry.split(';dur=') for entry in timed.headers['X-Timing'].split(', ')
+    )
+    assert {'parse', 'validate', 'describe', 'serialize', 'total'} <= set(entries)
+    assert all(float(ms) >= 0 for ms in entries.values())
+    assert metrics._timed_requests == 0
+
+
+def test_timing_without_metrics(client, monkeypatch):
+    monkeypatch.setattr(Config, 'METRICS_ENABLED', False)
+    monkeypatch.setattr(Config, 'PREDICTION_CACHE_ENABLED', False)
+
+    timed = client.post('/api/predict', json=READING, headers={**ADMIN, 'X-Debug-Timing': '1'})
+
+    assert 'inference;dur=' in timed.headers['X-Timing']
+    assert metrics.stage('parse') is metrics._NO_TIMER
@@ -0,0 +1,168 @@
+"""
+Training Pipeline Tests
+"""
+import json
+import os
+
+import numpy as np
+import pytest
+from models.training import train_model
+from utils.model_utils import (
+    DISTILLED_DIR, METADATA_FILE, MODEL_FILE, NATIVE_ARTIFACT_DIR, NATIVE_HEADER_FILE, SCALER_FILE,
+    WaterQualityModel, file_sha256
+)
+
+GRID = {'n_estimators': [5, 10], 'max_depth': [4], 'min_samples_leaf': [1]}
+
+
+@pytest.fixture(scope='module')
+def data():
+    X, y = train_model.load_data()
+    assert X is not None
+    return X, y
+
+
+def test_search_is_reproducible(data):
+    """Same seed, same search results regardless of worker scheduling"""
+    X, y = data
+    first = train_model.search_hyperparameters(X, y, GRID, folds=2, workers=2, seed=7)
+    second = train_model.search_hyperparameters(X, y, GRID, folds=2, workers=2, seed=7)
+
+    assert len(first) == 2
+    assert [r['params'] for r in first] == [r['params'] for r in second]
+    assert [r['f1_macro'] for r in first] == [r['f1_macro'] for r in second]
+    assert [r['objective'] for r in first] == [r['objective'] for r in second]
+    for result in first:
+        assert result['model_bytes'] > 0
+        assert result['latency_ms'] > 0
+
+
+def test_objective_penalises_size_not_latency():
+    """The objective trades F1 against node count; measured latency has no effect"""
+    result = {'f1_macro': 0.8, 'total_nodes': 50000, 'latency_ms': 10.0}
+    assert train_model.objective(result, 0.0) == 0.8
+    assert train_model.objective(result, 0.002) == pytest.approx(0.7)
+    assert train_model.objective(dict(result, latency_ms=1000.0), 0.002) == pytest.approx(0.7)
+
+
+def _train(output_dir, *extra):
+    return train_model.main([
+        '--output-dir', str(output_dir),
+        '--n-estimators', '5', '--max-depth', '4,none', '--min-samples-leaf', '1',
+        '--folds', '2', '--workers', '1', '--distill-samples', '500', *extra,
+    ])
+
+
+def test_main_writes_loadable_model_and_report(tmp_path):
+    """A training run writes a model the service loads and a JSON report"""
+    output_dir = tmp_path / 'trained'
+    assert _train(output_dir, '--no-distill') == 0
+
+    report = json.loads((output_dir / 'training_report.json').read_text())
+    assert len(report['candidates']) == 2
+    assert report['training']['hyperparameters'] == report['selected']['params']
+    assert len(report['training']['data_sha256']) == 64
+
+    model = WaterQualityModel(str(output_dir))
+    assert model.load_model()
+    info = model.get_model_info()
+    assert info['f1_score'] == report['holdout']['f1_score']
+    probabilities = model.predict_proba_array(np.array([[7.0, 28.0, 10.0, 6.0]]))
+    assert probabilities.shape == (1, 3)
+
+
+def test_distilled_model_served_by_default(tmp_path):
+    """The distilled student is served in auto mode when it passed the gate"""
+    output_dir = tmp_path / 'trained'
+    assert _train(output_dir, '--distill-margin', '1.0') == 0
+
+    report = json.loads((output_dir / 'training_report.json').read_text())
+    selected = report['distillation']['selected']
+    assert selected in train_model.DISTILL_CANDIDATES
+    assert (output_dir / DISTILLED_DIR / MODEL_FILE).exists()
+
+    distilled = WaterQualityModel(str(output_dir))
+    assert distilled.load_model()
+    full = WaterQualityModel(str(output_dir), variant='full')
+    assert full.load_model()
+    assert distilled.get_model_info()['variant'] == 'distilled'
+    assert full.get_model_info()['variant'] == 'full'
+    assert distilled.version != full.version
+    assert distilled.footprint_bytes < full.footprint_bytes
+
+
+def test_stale_distilled_model_is_ignored(tmp_path):
+    """A student distilled from another teacher falls back to the full model"""
+    output_dir = tmp_path / 'trained'
+    assert _train(output_dir, '--distill-margin', '1.0') == 0
+    with open(output_dir / MODEL_FILE, 'ab') as f:
+        f.write(b'retrained')
+
+    model = WaterQualityModel(str(output_dir), model_format='native')
+    assert model.load_model()
+    assert model.get_model_info()['variant'] == 'full'
+
+
+def test_distillation_gate_fails_training(tmp_path):
+    """No student within the margin fails the run and publishes nothing"""
+    output_dir = tmp_path / 'trained'
+    # A negative margin demands a student better than the teacher by a full point
+    assert _train(output_dir, '--distill-margin', '-1.0') == 1
+
+    report = json.loads((output_dir / 'training_report.json').read_text())
+    assert report['distillation']['selected'] is None
+    assert not (output_dir / DISTILLED_DIR).exists()
+    assert not (output_dir / MODEL_FILE).exists()
+
+
+def test_failed_gate_keeps_served_model(tmp_path):
+    """A failed gate leaves the previously published model untouched"""
+    output_dir = tmp_path / 'trained'
+    assert _train(output_dir, '--distill-margin', '1.0') == 0
+    served = {
+        path: file_sha256(str(output_dir / path))
+        for path in (MODEL_FILE, f'{NATIVE_ARTIFACT_DIR}/{NATIVE_HEADER_FILE}',
+                     f'{DISTILLED_DIR}/{MODEL_FILE}')
+    }
+
+    assert _train(output_dir, '--distill-margin', '-1.0', '--seed', '3') == 1
+
+    assert {path: file_sha256(str(output_dir / path)) for path in served} == served
+    assert not [name for name in os.listdir(output_dir) if name.startswith('.staging-')]
+
+
+def test_retrain_without_distillation_removes_old_student(tmp_path):
+    """--no-distill removes the student of the previous run"""
+    output_dir = tmp_path / 'trained'
+    assert _train(output_dir, '--distill-margin', '1.0') == 0
+    assert _train(output_dir, '--no-distill', '--seed', '3') == 0
+
+    assert not (output_dir / DISTILLED_DIR).exists()
+    model = WaterQualityModel(str(output_dir))
+    assert model.load_model()
+    assert model.get_model_info()['variant'] == 'full'
+    assert model.artifact_format == 'native'
+
+
+def test_publish_replaces_model_file_last(tmp_path, monkeypatch):
+    """The model file lands right after its scaler and metadata, after native/ and distilled/"""
+    staging = tmp_path / 'staging'
+    output = tmp_path / 'trained'
+    for directory in (staging, output):
+        (directory / NATIVE_ARTIFACT_DIR).mkdir(parents=True)
+        (directory / DISTILLED_DIR).mkdir()
+        for name in (MODEL_FILE, SCALER_FILE, METADATA_FILE):
+            (directory / name).write_text(directory.name)
+    published = []
+    replace = os.replace
+
+    def recording_replace(source, target):
+        if os.path.dirname(target) == str(output):
+            published.append(os.path.basename(target))
+        replace(source, target)
+
+    monkeypatch.setattr(train_model.os, 'replace', recording_replace)
+    train_model.publish_artifacts(str(staging), str(output))
+
+    assert published == [NATIVE_ARTIFACT_DIR, DISTILLED_DIR, METADATA_FILE, SCALER_FILE, MODEL_FILE]
+    assert (output / SCALER_FILE).read_text() == 'staging'
@@ -0,0 +1,231 @@
+"""
+Water Rules Tests
+"""
+import itertools
+
+import numpy as np
+
+from utils import water_rules
+
+# Values on, just below and just above every threshold of the rules
+PH_GRID = (5.9, 5.99, 6.0, 6.01, 6.49, 6.5, 6.51, 7.0, 8.49, 8.5, 8.51, 8.99, 9.0, 9.01, 9.5)
+TEMPERATURE_GRID = (19.9, 20.0, 20.1, 21.99, 22.0, 22.01, 24.99, 25.0, 27.5, 30.0, 30.01,
+                    31.99, 32.0, 32.01, 35.0)
+TURBIDITY_GRID = (10.0, 24.99, 25.0, 25.01, 39.99, 40.0, 40.01, 49.99, 50.0, 50.01, 60.0)
+DO_GRID = (2.9, 2.99, 3.0, 3.01, 3.99, 4.0, 4.01, 4.99, 5.0, 5.01, 7.0)
+
+
+def test_first_matching_rule_per_parameter_wins():
+    """Each parameter reports at most one issue, like the old if/elif chains"""
+    codes = water_rules.evaluate_issue_codes(np.array([
+        [5.5, 27.0, 10.0, 6.0],   # acid only, not also sub-optimal
+        [7.0, 35.0, 60.0, 2.0],   # hot, very turbid, critical DO
+        [7.0, 27.0, 10.0, 6.0],   # nothing fired
+    ]))
+    
+    assert water_rules.issue_code_names(codes[0]) == ['PH_ACID']
+    assert water_rules.issue_code_names(codes[1]) == [
+        'TEMP_HIGH', 'TURBIDITY_VERY_HIGH', 'DO_CRITICAL'
+    ]
+    assert codes[2] == 0
+
+
+def test_render_only_requested_fields():
+    """Text that was not asked for is never built"""
+    reading = {'ph': 7.0, 'temperature': 27.0, 'turbidity': 10.0, 'dissolved_oxygen': 6.0}
+    
+    rendered = water_rules.render(0, 'Baik', reading, fields=('issues',))
+    
+    assert rendered == {'issues': ['Tidak ada masalah signifikan']}
+
+
+def test_empty_issues_wording_for_perlu_perhatian():
+    """
+    Model and fallback paths share one wording for an empty issue list
+    
+    This is the one intended difference from the old rules: the model path
+    used to render "Masalah yang terdeteksi: . " here.
+    """
+    reading = {'ph': 7.0, 'temperature': 27.0, 'turbidity': 10.0, 'dissolved_oxygen': 6.0}
+    
+    rendered = water_rules.render(0, 'Perlu Perhatian', reading)
+    
+    assert 'beberapa parameter di luar batas toleransi' in rendered['description']
+    assert rendered['recommendations'][-1] == water_rules.URGENT_FOLLOW_UP
+
+
+def _legacy_describe(quality_class, ph, temperature, turbidity, dissolved_oxygen):
+    """
+    Issue rules and texts of the scalar fallback before the rule table
+    
+    The model path (WaterQualityModel._generate_description) was identical
+    except for 'Perlu Perhatian' with no issue, where it rendered an empty
+    list ("Masalah yang terdeteksi: . "); the table uses the fallback
+    wording for both, which is the one intended difference.
+    """
+    IDEAL_PH_MIN, IDEAL_PH_MAX = 6.5, 8.5
+    IDEAL_TEMP_MIN, IDEAL_TEMP_MAX = 25, 30
+    IDEAL_TURBIDITY_MAX = 25
+    IDEAL_DO_MIN = 5.0
+    
+    issues = []
+    recommendations = []
+    
+    if ph < 6.0:
+        issues.append("pH terlalu rendah (asam)")
+        recommendations.append("Tambahkan kapur pertanian untuk menaikkan pH")
+    elif ph > 9.0:
+        issues.append("pH terlalu tinggi (basa)")
+        recommendations.append("Lakukan pergantian air secara bertahap")
+    elif ph < IDEAL_PH_MIN or ph > IDEAL_PH_MAX:
+        issues.append("pH di luar rentang optimal")
+        recommendations.append("Monitor pH secara rutin dan lakukan penyesuaian bertahap")
+    
+    if temperature < 20:
+        issues.append("suhu terlalu rendah")
+        recommendations.append("Pertimbangkan penggunaan pemanas air atau greenhouse")
+    elif temperature > 32:
+        issues.append("suhu terlalu tinggi")
+        recommendations.append("Tingkatkan aerasi dan pertimbangkan peneduh kolam")
+    elif temperature < IDEAL_TEMP_MIN or temperature > IDEAL_TEMP_MAX:
+        issues.append("suhu di luar rentang optimal")
+        recommendations.append("Monitor suhu dan sesuaikan dengan kondisi lingkungan")
+    
+    if turbidity > 50:
+        issues.append("kekeruhan sangat tinggi")
+        recommendations.append("Kurangi pemberian pakan dan tingkatkan filtrasi air")
+    elif turbidity > IDEAL_TURBIDITY_MAX:
+        issues.append("kekeruhan cukup tinggi")
+        recommendations.append("Lakukan penggantian air parsial dan periksa sistem filtrasi")
+    
+    if dissolved_oxygen < 3.0:
+        issues.append("oksigen terlarut sangat rendah (berbahaya)")
+        recommendations.append("SEGERA tingkatkan aerasi dan kurangi kepadatan ikan")
+    elif dissolved_oxygen < IDEAL_DO_MIN:
+        issues.append("oksigen terlarut di bawah ideal")
+        recommendations.append("Tingkatkan aerasi dengan aerator atau kincir air")
+    
+    if quality_class == 'Baik':
+        description = (
+            f"Kualitas air dalam kondisi OPTIMAL untuk budidaya ikan nila. "
+            f"Parameter pH ({ph:.2f}), suhu ({temperature:.1f}°C), kekeruhan ({turbidity:.1f} NTU), "
+            f"dan oksigen terlarut ({dissolved_oxygen:.2f} mg/L) berada dalam rentang ideal. "
+            f"Ikan nila dapat tumbuh dengan sehat, memiliki nafsu makan yang baik, dan sistem imun yang kuat. "
+            f"Pertumbuhan ikan optimal dengan tingkat stres minimal."
+        )
+        if not recommendations:
+            recommendations.extend([
+                "Pertahankan kualitas air saat ini",
+                "Lakukan monitoring rutin setiap hari",
+                "Berikan pakan berkualitas sesuai jadwal"
+            ])
+    elif quality_class == 'Normal':
+        description = (
+            f"Kualitas air dalam kondisi CUKUP BAIK untuk budidaya ikan nila. "
+            f"Terdapat beberapa parameter yang perlu diperhatikan: {', '.join(issues) if issues else 'parameter masih dalam batas toleransi'}. "
+            f"Ikan nila masih dapat bertahan dan tumbuh, namun mungkin mengalami sedikit stres. "
+            f"Nafsu makan ikan bisa menurun dan pertumbuhan tidak seoptimal kondisi ideal. "
+            f"Sistem kekebalan tubuh ikan mulai menurun, sehingga lebih rentan terhadap penyakit."
+        )
+        if not recommendations:
+            recommendations.extend([
+                "Monitor parameter air lebih sering (2-3x sehari)",
+                "Siapkan rencana perbaikan kualitas air",
+                "Kurangi pemberian pakan jika ikan terlihat lemas"
+            ])
+    else:
+        description = (
+            f"Kualitas air dalam kondisi BURUK dan MEMERLUKAN TINDAKAN SEGERA! "
+            f"Masalah yang terdeteksi: {', '.join(issues) if issues else 'beberapa parameter di luar batas toleransi'}. "
+            f"Dalam kondisi air seperti ini, ikan nila mengalami STRES BERAT dan kesehatan mereka terancam. "
+            f"Ikan akan menunjukkan gejala: nafsu makan menurun drastis atau tidak mau makan, "
+            f"bergerak lemah di permukaan air (gasping), warna tubuh memucat, "
+            f"sangat rentan terhadap penyakit dan infeksi, pertumbuhan terhenti, "
+            f"dan dapat menyebabkan KEMATIAN MASSAL jika tidak segera ditangani."
+        )
+        if not recommendations:
+            recommendations.extend([
+                "SEGERA lakukan pergantian air 30-50%",
+                "Hentikan pemberian pakan sementara",
+                "Tingkatkan aerasi secara maksimal"
+            ])
+        recommendations.append("Konsultasi dengan ahli budidaya ikan jika kondisi tidak membaik")
+    
+    return {
+        'description': description,
+        'issues': issues if issues else ['Tidak ada masalah signifikan'],
+        'recommendations': recommendations,
+    }
+
+
+def _legacy_score(ph, temperature, turbidity, dissolved_oxygen):
+    """Score, class, confidence and probabilities of the scalar fallback"""
+    score = 0
+    if 6.5 <= ph <= 8.5:
+        score += 25
+    elif 6.0 <= ph < 6.5 or 8.5 < ph <= 9.0:
+        score += 15
+    if 25 <= temperature <= 30:
+        score += 25
+    elif 22 <= temperature < 25 or 30 < temperature <= 32:
+        score += 15
+    if turbidity < 25:
+        score += 25
+    elif 25 <= turbidity < 40:
+        score += 15
+    if dissolved_oxygen >= 5:
+        score += 25
+    elif 4 <= dissolved_oxygen < 5:
+        score += 15
+    
+    if score >= 80:
+        quality = 'Baik'
+        confidence = min(0.95 + (score - 80) / 20 * 0.05, 0.99)
+        prob_baik = confidence
+        prob_normal = (1 - prob_baik) * 0.6
+        prob_perhatian = (1 - prob_baik) * 0.4
+    elif score >= 60:
+        quality = 'Normal'
+        confidence = 0.75 + (score - 60) / 20 * 0.10
+        prob_normal = confidence
+        prob_baik = (1 - prob_normal) * 0.3
+        prob_perhatian = (1 - prob_normal) * 0.7
+    else:
+        quality = 'Perlu Perhatian'
+        confidence = 0.85 + (score / 60) * 0.05
+        prob_perhatian = confidence
+        prob_baik = (1 - prob_perhatian) * 0.2
+        prob_normal = (1 - prob_perhatian) * 0.8
+    
+    total_prob = prob_baik + prob_normal + prob_perhatian
+    probabilities = [prob_baik / total_prob, prob_normal / total_prob, prob_perhatian / total_prob]
+    return score, quality, confidence, probabilities
+
+
+def _boundary_grid():
+    return np.array(list(itertools.product(PH_GRID, TEMPERATURE_GRID, TURBIDITY_GRID, DO_GRID)))
+
+
+def test_rule_table_matches_legacy_texts_on_boundary_grid():
+    """Issues, recommendations and descriptions equal the old if/elif chains"""
+    features = _boundary_grid()
+    codes = water_rules.evaluate_issue_codes(features)
+    
+    for row, code in zip(features.tolist(), codes):
+        reading = dict(zip(water_rules.FEATURES, row))
+        for quality in water_rules.QUALITY_LABELS:
+            assert water_rules.render(code, quality, reading) == _legacy_describe(quality, *row), \
+                (quality, reading)
+
+
+def test_rule_scores_match_legacy_fallback_on_boundary_grid():
+    """Scores, classes, confidences and probabilities equal the scalar fallback"""
+    features = _boundary_grid()
+    scores = water_rules.score_features(features)
+    class_indices, confidences, probabilities = water_rules.classify_scores(scores)
+    
+    expected = [_legacy_score(*row) for row in features.tolist()]
+    np.testing.assert_array_equal(scores, [e[0] for e in expected])
+    assert [water_rules.QUALITY_LABELS[i] for i in class_indices] == [e[1] for e in expected]
+    np.testing.assert_array_equal(confidences, [e[2] for e in expected])
+    np.testing.assert_array_equal(probabilities, [e[3] for e in expected])
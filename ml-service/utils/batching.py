@@ -0,0 +1,189 @@
+"""
+Micro-batching of concurrent single-row predictions
+"""
+import queue
+import threading
+import time
+from typing import Any, Dict
+
+import numpy as np
+from config.config import Config
+
+# Upper bounds of the batch size and queue wait histograms
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+QUEUE_WAIT_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100)
+
+
+class _PendingRow:
+    """One caller's row waiting for a batch"""
+    
+    __slots__ = ('model', 'features', 'enqueued_at', 'done', 'result', 'error')
+    
+    def __init__(self, model, features):
+        self.model = model
+        self.features = features
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-row predictions into one forest call
+    
+    Callers submit one feature row and block until it is scored. A
+    background thread takes the first waiting row, keeps collecting rows
+    until the window elapses or the batch is full, then runs a single
+    ``predict_proba_array`` call and hands each caller its own row.
+    """
+    
+    def __init__(self, window_ms=2.0, max_batch_rows=256):
+        """
+        Initialize the batcher
+        
+        Args:
+            window_ms (float): How long to wait for more rows after the first
+            max_batch_rows (int): Largest batch sent to the model
+        """
+        self.window = window_ms / 1000.0
+        self.max_batch_rows = max_batch_rows
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        
+        self._batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+        self._wait_counts = [0] * (len(QUEUE_WAIT_BUCKETS_MS) + 1)
+        self._batches = 0
+        self._rows = 0
+        self._wait_sum_ms = 0.0
+        self._wait_max_ms = 0.0
+    
+    def submit(self, model, features: np.ndarray, timeout: float = 30.0) -> np.ndarray:
+        """
+        Score one row as part of the next batch
+        
+        Args:
+            model: WaterQualityModel used for the row
+            features: 1 x n_features row from ``model.build_feature_matrix``
+            timeout (float): Seconds to wait for the result
+            
+        Returns:
+            np.ndarray: 1 x n_classes probabilities
+        """
+        self._ensure_worker()
+        pending = _PendingRow(model, features)
+        self._queue.put(pending)
+        
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for micro-batch prediction")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+    
+    def _ensure_worker(self):
+        # Started lazily so each gunicorn worker gets its own thread after fork
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(
+                        target=self._run, name='micro-batcher', daemon=True
+                    )
+                    self._thread.start()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.window
+            
+            while len(batch) < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            self._process(batch)
+    
+    def _process(self, batch):
+        started_at = time.perf_counter()
+        self._record(batch, started_at)
+        
+        # Rows submitted across a model swap are scored by their own model
+        by_model = {}
+        for pending in batch:
+            by_model.setdefault(id(pending.model), []).append(pending)
+        
+        for group in by_model.values():
+            try:
+                features = np.vstack([pending.features for pending in group])
+                probabilities = group[0].model.predict_proba_array(features)
+                for i, pending in enumerate(group):
+                    pending.result = probabilities[i:i + 1]
+            except Exception as e:
+                for pending in group:
+                    pending.error = e
+            finally:
+                for pending in group:
+                    pending.done.set()
+    
+    def _record(self, batch, started_at):
+        with self._lock:
+            self._batches += 1
+            self._rows += len(batch)
+            self._batch_size_counts[_bucket_index(BATCH_SIZE_BUCKETS, len(batch))] += 1
+            for pending in batch:
+                wait_ms = (started_at - pending.enqueued_at) * 1000
+                self._wait_counts[_bucket_index(QUEUE_WAIT_BUCKETS_MS, wait_ms)] += 1
+                self._wait_sum_ms += wait_ms
+                self._wait_max_ms = max(self._wait_max_ms, wait_ms)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Batch size histogram and queue wait statistics"""
+        with self._lock:
+            return {
+                'window_ms': self.window * 1000,
+                'max_batch_rows': self.max_batch_rows,
+                'batches': self._batches,
+                'rows': self._rows,
+                'mean_batch_size': round(self._rows / self._batches, 3) if self._batches else 0.0,
+                'batch_size_histogram': _histogram(BATCH_SIZE_BUCKETS, self._batch_size_counts),
+                'queue_wait_ms': {
+                    'mean': round(self._wait_sum_ms / self._rows, 4) if self._rows else 0.0,
+                    'max': round(self._wait_max_ms, 4),
+                    'histogram': _histogram(QUEUE_WAIT_BUCKETS_MS, self._wait_counts),
+                },
+            }
+
+
+def _bucket_index(buckets, value):
+    for i, upper in enumerate(buckets):
+        if value <= upper:
+            return i
+    return len(buckets)
+
+
+def _histogram(buckets, counts):
+    """Per-bucket counts keyed by upper bound ('+Inf' for the overflow bucket)"""
+    labels = [str(upper) for upper in buckets] + ['+Inf']
+    return dict(zip(labels, counts))
+
+
+# Global batcher (one per process)
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher() -> MicroBatcher:
+    """Get or create the process-wide micro-batcher from Config"""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(
+                    window_ms=Config.MICRO_BATCH_WINDOW_MS,
+                    max_batch_rows=Config.MICRO_BATCH_MAX_ROWS
+                )
+    return _batcher
@@ -0,0 +1,162 @@
+"""
+Incremental per-pond forecasts of dissolved oxygen and temperature
+"""
+import math
+from typing import Any, Dict, List, Optional
+
+from utils import water_rules
+
+# Parameters forecast for every pond
+FORECAST_PARAMETERS = ('dissolved_oxygen', 'temperature')
+
+# Alert rules: (parameter, direction, threshold, severity, message template).
+# A rule fires when the forecast crosses the threshold within the horizon.
+ALERT_RULES = (
+    ('dissolved_oxygen', 'below', water_rules.DO_CRITICAL_MIN, 'critical',
+     "Oksigen terlarut diperkirakan turun di bawah {threshold} mg/L (berbahaya) dalam {hours:.1f} jam"),
+    ('dissolved_oxygen', 'below', water_rules.IDEAL_DO_MIN, 'warning',
+     "Oksigen terlarut diperkirakan turun di bawah {threshold} mg/L dalam {hours:.1f} jam"),
+    ('temperature', 'above', water_rules.TEMP_HIGH_LIMIT, 'warning',
+     "Suhu diperkirakan naik di atas {threshold}°C dalam {hours:.1f} jam"),
+    ('temperature', 'below', water_rules.TEMP_LOW_LIMIT, 'warning',
+     "Suhu diperkirakan turun di bawah {threshold}°C dalam {hours:.1f} jam"),
+)
+
+# Readings needed before a forecast is trusted
+MIN_READINGS = 3
+
+
+class HoltForecaster:
+    """
+    Holt's linear trend smoothing for irregularly spaced readings
+    
+    Level and trend (units per hour) are exponentially smoothed with
+    half-lives in hours, so the smoothing weight adapts to the gap between
+    readings. Each update is O(1) and the state is a handful of floats.
+    An optional damping factor per hour flattens long-range extrapolation.
+    """
+    
+    __slots__ = ('level_half_life', 'trend_half_life', 'damping',
+                 'level', 'trend', 'last_t', 'count', 'mae')
+    
+    def __init__(self, level_half_life=1.0, trend_half_life=3.0, damping=1.0):
+        """
+        Args:
+            level_half_life (float): Hours after which a reading's weight
+                in the level has halved
+            trend_half_life (float): Same for the trend
+            damping (float): Trend damping per hour (1.0 = linear trend)
+        """
+        self.level_half_life = level_half_life
+        self.trend_half_life = trend_half_life
+        self.damping = damping
+        self.level = None
+        self.trend = 0.0
+        self.last_t = None
+        self.count = 0
+        # Exponentially weighted mean absolute one-step-ahead error
+        self.mae = None
+    
+    def update(self, t: float, x: float):
+        """
+        Add a reading
+        
+        Args:
+            t (float): Time in hours, not earlier than the previous update
+            x (float): Observed value
+        """
+        self.count += 1
+        if self.level is None:
+            self.level, self.last_t = x, t
+            return
+        
+        dt = t - self.last_t
+        predicted = self.forecast(dt)
+        error = abs(x - predicted)
+        self.mae = error if self.mae is None else 0.8 * self.mae + 0.2 * error
+        
+        if dt <= 0:
+            # Same timestamp: refine the level only
+            self.level = 0.5 * (self.level + x)
+            return
+        
+        alpha = 1 - 0.5 ** (dt / self.level_half_life)
+        beta = 1 - 0.5 ** (dt / self.trend_half_life)
+        level = alpha * x + (1 - alpha) * predicted
+        self.trend = beta * (level - self.level) / dt + (1 - beta) * self._damped(self.trend, dt)
+        self.level = level
+        self.last_t = t
+    
+    def _damped(self, trend, hours):
+        return trend if self.damping == 1.0 else trend * self.damping ** hours
+    
+    def _trend_factor(self, hours: float) -> float:
+        # Accumulated trend over `hours` (continuous damped sum)
+        if self.damping == 1.0:
+            return hours
+        return (1 - self.damping ** hours) / -math.log(self.damping)
+    
+    def forecast(self, hours: float) -> Optional[float]:
+        """Value expected ``hours`` after the last reading"""
+        if self.level is None:
+            return None
+        return self.level + self.trend * self._trend_factor(max(hours, 0.0))
+    
+    def hours_until(self, threshold: float, direction: str) -> Optional[float]:
+        """
+        Hours after the last reading until the forecast crosses ``threshold``
+        
+        Returns:
+            float: 0.0 if already across, None if the trend never crosses it
+        """
+        if self.level is None:
+            return None
+        gap = threshold - self.level
+        if (direction == 'below' and gap >= 0) or (direction == 'above' and gap <= 0):
+            return 0.0
+        if self.trend == 0 or (gap > 0) != (self.trend > 0):
+            return None
+        
+        steps = gap / self.trend  # trend-hours needed
+        if self.damping == 1.0:
+            return steps
+        remaining = 1 + steps * math.log(self.damping)
+        if remaining <= 0:
+            return None  # damped trend levels off before the threshold
+        return math.log(remaining) / math.log(self.damping)
+    
+    @property
+    def ready(self) -> bool:
+        return self.count >= MIN_READINGS
+
+
+def forecast_alerts(forecasters: Dict[str, HoltForecaster], horizon_hours: float) -> List[Dict[str, Any]]:
+    """
+    Threshold crossings expected within the horizon
+    
+    Args:
+        forecasters: parameter -> HoltForecaster
+        horizon_hours (float): Look-ahead window
+        
+    Returns:
+        list: Alerts with parameter, severity, threshold, direction,
+              hours_until and an Indonesian message
+    """
+    alerts = []
+    for parameter, direction, threshold, severity, message in ALERT_RULES:
+        forecaster = forecasters.get(parameter)
+        if forecaster is None or not forecaster.ready:
+            continue
+        hours = forecaster.hours_until(threshold, direction)
+        if hours is None or hours > horizon_hours:
+            continue
+        
+        alerts.append({
+            'parameter': parameter,
+            'severity': severity,
+            'direction': direction,
+            'threshold': threshold,
+            'hours_until': round(hours, 2),
+            'message': message.format(threshold=threshold, hours=hours),
+        })
+    return alerts
@@ -4,6 +4,7 @@ Helper Utilities
 import requests
 import os
 from datetime import datetime
+from utils import water_rules
 
 def send_to_backend(endpoint, data):
     """
@@ -58,43 +59,6 @@ def calculate_water_quality_score(parameters):
     Returns:
         int: Quality score (0-100)
     """
-    score = 0
-    
-    # pH scoring (ideal: 6.5-8.5)
-    ph = parameters['ph']
-    if 6.5 <= ph <= 8.5:
-        score += 25
-    elif 6.0 <= ph < 6.5 or 8.5 < ph <= 9.0:
-        score += 15
-    else:
-        score += 0
-    
-    # Temperature scoring (ideal: 25-30°C)
-    temp = parameters['temperature']
-    if 25 <= temp <= 30:
-        score += 25
-    elif 22 <= temp < 25 or 30 < temp <= 32:
-        score += 15
-    else:
-        score += 0
-    
-    # Turbidity scoring (ideal: < 25 NTU)
-    turbidity = parameters['turbidity']
-    if turbidity < 25:
-        score += 25
-    elif 25 <= turbidity < 40:
-        score += 15
-    else:
-        score += 0
-    
-    # Dissolved Oxygen scoring (ideal: > 5 mg/L)
-    do = parameters['dissolved_oxygen']
-    if do >= 5:
-        score += 25
-    elif 4 <= do < 5:
-        score += 15
-    else:
-        score += 0
-    
-    return score
+    features = water_rules.readings_to_features([parameters])
+    return int(water_rules.score_features(features)[0])
 
@@ -0,0 +1,205 @@
+"""
+Prometheus metrics for the ML service
+
+Samples are process-local unless ``PROMETHEUS_MULTIPROC_DIR`` is set
+before this module is imported (gunicorn_config.py does this). Every
+worker then writes its samples to memory-mapped files in that directory
+and ``/metrics`` aggregates all of them, whichever worker answers the
+scrape.
+
+Requests sent with an ``X-Debug-Timing`` header additionally get their
+own stage durations back in an ``X-Timing`` header.
+"""
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from config.config import Config
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+    )
+    from prometheus_client import multiprocess
+except ImportError:  # Optional dependency; metrics become no-ops
+    Counter = None
+
+# Request/stage latency buckets in seconds (10 µs .. 2.5 s)
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+# Readings per prediction call
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Stages of a prediction request, in order
+STAGES = ('parse', 'validate', 'scale', 'inference', 'describe', 'serialize')
+
+if Counter is not None:
+    REQUESTS = Counter(
+        'nilasense_http_requests_total', 'HTTP requests',
+        ['route', 'method', 'status']
+    )
+    REQUEST_LATENCY = Histogram(
+        'nilasense_http_request_duration_seconds', 'HTTP request latency',
+        ['route', 'method'], buckets=LATENCY_BUCKETS
+    )
+    STAGE_LATENCY = Histogram(
+        'nilasense_prediction_stage_duration_seconds', 'Time spent per prediction stage',
+        ['stage'], buckets=LATENCY_BUCKETS
+    )
+    PREDICTIONS = Counter(
+        'nilasense_predictions_total', 'Readings classified, by model or rule-based fallback',
+        ['source']
+    )
+    BATCH_SIZE = Histogram(
+        'nilasense_prediction_batch_rows', 'Readings per prediction call',
+        ['source'], buckets=BATCH_SIZE_BUCKETS
+    )
+    CACHE_LOOKUPS = Counter(
+        'nilasense_prediction_cache_lookups_total', 'Prediction cache lookups',
+        ['result']
+    )
+
+
+# Stage durations of the current request when it asked for X-Timing
+_request_timings = ContextVar('request_timings', default=None)
+# Requests in flight that asked for X-Timing; while 0 nothing is collected
+_timed_requests = 0
+_timed_requests_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    """Whether metrics are collected (METRICS_ENABLED and prometheus_client installed)"""
+    return Config.METRICS_ENABLED and Counter is not None
+
+
+class _StageTimer:
+    """Context manager adding its elapsed time to a stage histogram"""
+
+    __slots__ = ('stage', 'started_at')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe_stage(self.stage, time.perf_counter() - self.started_at)
+        return False
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+def stage(name):
+    """
+    Time a block as one prediction stage
+
+    Usage::
+
+        with metrics.stage('validate'):
+            validation = validate_sensor_data(data)
+    """
+    return _StageTimer(name) if _timed_requests or enabled() else _NO_TIMER
+
+
+def observe_stage(name, seconds):
+    """Record an already measured stage duration"""
+    if enabled():
+        STAGE_LATENCY.labels(name).observe(seconds)
+    if _timed_requests:
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + seconds
+
+
+def start_request_timing():
+    """Collect stage durations for the current request (X-Debug-Timing)"""
+    global _timed_requests
+    with _timed_requests_lock:
+        _timed_requests += 1
+    return _request_timings.set({})
+
+
+def finish_request_timing(token, total_seconds) -> str:
+    """
+    Stop collecting for the current request
+
+    Args:
+        token: Value returned by ``start_request_timing``
+        total_seconds: Whole request duration
+
+    Returns:
+        str: ``X-Timing`` value in Server-Timing syntax with durations in
+             ms, e.g. ``parse;dur=0.031, inference;dur=1.204, total;dur=1.9``
+    """
+    global _timed_requests
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    with _timed_requests_lock:
+        _timed_requests -= 1
+
+    entries = [(name, timings[name]) for name in STAGES if name in timings]
+    entries += [(name, seconds) for name, seconds in timings.items() if name not in STAGES]
+    entries.append(('total', total_seconds))
+    return ', '.join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in entries)
+
+
+def record_predictions(source, rows):
+    """Count one prediction call of ``rows`` readings ('model' or 'fallback')"""
+    if enabled() and rows:
+        PREDICTIONS.labels(source).inc(rows)
+        BATCH_SIZE.labels(source).observe(rows)
+
+
+def record_cache(hits, misses):
+    """Count prediction cache hits and misses of one lookup"""
+    if enabled():
+        if hits:
+            CACHE_LOOKUPS.labels('hit').inc(hits)
+        if misses:
+            CACHE_LOOKUPS.labels('miss').inc(misses)
+
+
+def record_request(route, method, status, seconds):
+    """Count a finished HTTP request; ``route`` is the URL rule, not the path"""
+    if enabled():
+        REQUESTS.labels(route, method, str(status)).inc()
+        REQUEST_LATENCY.labels(route, method).observe(seconds)
+
+
+def render():
+    """
+    Exposition of all metrics in the Prometheus text format
+
+    Returns:
+        tuple: (body bytes, content type), or None when metrics are disabled
+    """
+    if not enabled():
+        return None
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live-only samples (gunicorn child_exit hook)"""
+    if Counter is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)
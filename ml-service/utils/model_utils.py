@@ -2,29 +2,524 @@
 Model utilities for loading and using the trained water quality model.
 """
 
+import hashlib
+import itertools
 import joblib
+import json
 import numpy as np
 import os
+import re
+import threading
+import time
 import warnings
 from datetime import datetime
-from typing import Dict, Tuple, Any
+from typing import Dict, List, Tuple, Any
+from config.config import Config
+from utils import metrics, water_rules
 
 # Suppress scikit-learn version warnings when loading old models
 # This is safe as scikit-learn maintains backward compatibility for model loading
 warnings.filterwarnings('ignore', category=UserWarning, module='sklearn')
 
+DEFAULT_FEATURE_NAMES = ['ph', 'temperature', 'turbidity', 'dissolved_oxygen']
+
+MODEL_FILE = 'water_quality_rf_model.pkl'
+SCALER_FILE = 'scaler.pkl'
+METADATA_FILE = 'model_metadata.pkl'
+
+# Native artifact: directory of raw .npy tree arrays plus a JSON header
+NATIVE_ARTIFACT_DIR = 'native'
+NATIVE_HEADER_FILE = 'header.json'
+NATIVE_FORMAT_VERSION = 1
+
+# Distilled student model: a complete model directory inside the teacher's
+DISTILLED_DIR = 'distilled'
+
+# Lookup-table engine, built next to the model it was computed from
+LOOKUP_TABLE_DIR = 'lookup_table'
+
+# Load order of model instances in this process (WaterQualityModel.generation)
+_load_sequence = itertools.count(1)
+
+# Alternate feature names used by some notebooks/datasets
+FEATURE_ALIASES = {
+    'pH': 'ph',
+    'temp': 'temperature',
+    'do': 'dissolved_oxygen',
+    'd_o': 'dissolved_oxygen',
+}
+
+
+class FlatForest:
+    """
+    Tree ensemble exported into contiguous NumPy arrays
+    
+    All trees of a fitted ``RandomForestClassifier`` are concatenated into
+    flat node arrays (feature, threshold, children and leaf values). Leaves
+    point to themselves, so evaluation is a fixed number of vectorized
+    steps over every (tree, row) pair at once. Probabilities are
+    bit-for-bit identical to sklearn's sequential ``predict_proba``.
+    """
+    
+    ARRAY_FILES = ('feature', 'threshold', 'children_left', 'children_right',
+                   'children', 'value', 'roots')
+    
+    def __init__(self, feature, threshold, children_left, children_right,
+                 value, roots, max_depth, classes, chunk_size=2048, children=None):
+        """
+        Initialize the flat forest
+        
+        Args:
+            feature (np.ndarray): int32 split feature per node (0 for leaves)
+            threshold (np.ndarray): float64 split threshold per node
+            children_left (np.ndarray): int32 global index of left child
+            children_right (np.ndarray): int32 global index of right child
+            value (np.ndarray): float64 class fractions per node (n_nodes x n_classes)
+            roots (np.ndarray): int32 global index of each tree's root
+            max_depth (int): Depth of the deepest tree
+            classes (np.ndarray): Class labels in column order
+            chunk_size (int): Rows evaluated per block to bound memory
+            children (np.ndarray): Optional precomputed interleaved
+                (right, left) children, as written by ``save``
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.chunk_size = chunk_size
+        # Interleaved (right, left) children so one gather picks the next node
+        if children is None:
+            children = np.stack([children_right, children_left], axis=1).ravel()
+        self.children = children
+        
+        # Read-only so forked workers never copy the shared pages
+        for array in (self.feature, self.threshold, self.children_left,
+                      self.children_right, self.value, self.roots, self.children):
+            array.setflags(write=False)
+    
+    @classmethod
+    def from_sklearn(cls, forest, chunk_size=2048):
+        """
+        Export a fitted sklearn forest classifier
+        
+        Args:
+            forest: Fitted RandomForestClassifier (single output)
+            chunk_size (int): Rows evaluated per block
+            
+        Returns:
+            FlatForest
+        """
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be exported")
+        
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        n_nodes = sum(tree.node_count for tree in trees)
+        n_classes = int(forest.n_classes_)
+        
+        feature = np.zeros(n_nodes, dtype=np.int32)
+        threshold = np.zeros(n_nodes, dtype=np.float64)
+        children_left = np.zeros(n_nodes, dtype=np.int32)
+        children_right = np.zeros(n_nodes, dtype=np.int32)
+        value = np.zeros((n_nodes, n_classes), dtype=np.float64)
+        roots = np.zeros(len(trees), dtype=np.int32)
+        
+        offset = 0
+        for i, tree in enumerate(trees):
+            count = tree.node_count
+            nodes = np.arange(offset, offset + count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+            
+            roots[i] = offset
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = tree.threshold
+            # Leaves point to themselves so extra traversal steps are no-ops
+            children_left[nodes] = np.where(is_leaf, nodes, tree.children_left + offset)
+            children_right[nodes] = np.where(is_leaf, nodes, tree.children_right + offset)
+            value[nodes] = tree.value[:, 0, :n_classes]
+            offset += count
+        
+        max_depth = max(tree.max_depth for tree in trees)
+        
+        return cls(feature, threshold, children_left, children_right,
+                   value, roots, max_depth, forest.classes_, chunk_size)
+    
+    def save(self, directory: str):
+        """Write the node arrays as raw .npy files"""
+        os.makedirs(directory, exist_ok=True)
+        for name in self.ARRAY_FILES:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+    
+    @classmethod
+    def load(cls, directory: str, max_depth: int, classes, mmap_mode='r', chunk_size=2048):
+        """
+        Load node arrays written by ``save``
+        
+        Args:
+            directory (str): Directory containing the .npy files
+            max_depth (int): Depth of the deepest tree
+            classes: Class labels in column order
+            mmap_mode (str): ``np.load`` mmap mode; 'r' keeps the pages
+                shared between processes
+            
+        Returns:
+            FlatForest
+        """
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in cls.ARRAY_FILES
+        }
+        return cls(max_depth=max_depth, classes=classes, chunk_size=chunk_size, **arrays)
+    
+    @property
+    def n_nodes(self) -> int:
+        return int(self.feature.shape[0])
+    
+    @property
+    def n_trees(self) -> int:
+        return int(self.roots.shape[0])
+    
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """
+        Find the leaf reached by every row in every tree
+        
+        Args:
+            X: Scaled N x n_features input
+            
+        Returns:
+            np.ndarray: n_trees x N global leaf indices
+        """
+        # sklearn trees compare float32 features against float64 thresholds
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X32.shape
+        values = X32.ravel()
+        row_offsets = (np.arange(n_rows) * n_features)[np.newaxis, :]
+        nodes = np.repeat(self.roots[:, np.newaxis], n_rows, axis=1)
+        
+        for _ in range(self.max_depth):
+            go_left = values[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        
+        return nodes
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Mean class probabilities over all trees
+        
+        Args:
+            X: Scaled N x n_features input
+            
+        Returns:
+            np.ndarray: N x n_classes probability matrix
+        """
+        X = np.asarray(X)
+        proba = np.empty((X.shape[0], self.value.shape[1]), dtype=np.float64)
+        
+        for start in range(0, X.shape[0], self.chunk_size):
+            stop = start + self.chunk_size
+            leaves = self.apply(X[start:stop])
+            # Reducing over the tree axis adds trees in order, exactly like
+            # sklearn's sequential accumulation
+            proba[start:stop] = np.add.reduce(self.value[leaves], axis=0)
+        
+        proba /= self.n_trees
+        return proba
+
+
+class LookupTableModel:
+    """
+    Exact lookup-table form of a tree ensemble
+    
+    Every split threshold of the forest is collected per feature. Between
+    consecutive thresholds the forest output is constant, so the class
+    probabilities of every cell of the threshold grid are precomputed once.
+    A prediction is then one binary search per feature plus a table read,
+    with no tree walking. The table is stored as raw ``.npy`` arrays that
+    can be memory-mapped.
+    """
+    
+    TABLE_FILE = 'table.npy'
+    THRESHOLDS_FILE = 'thresholds.npy'
+    OFFSETS_FILE = 'threshold_offsets.npy'
+    CLASSES_FILE = 'classes.npy'
+    HEADER_FILE = 'header.json'
+    FORMAT_VERSION = 1
+    
+    def __init__(self, thresholds, table, classes, source_sha256=None):
+        """
+        Initialize the lookup table
+        
+        Args:
+            thresholds (list): Sorted float64 split thresholds per feature
+            table (np.ndarray): Probabilities with shape
+                (k_0 + 1, ..., k_3 + 1, n_classes)
+            classes (np.ndarray): Class labels in column order
+            source_sha256 (str): Version (``WaterQualityModel.version``)
+                of the model the table was computed from
+        """
+        self.thresholds = thresholds
+        self.table = table
+        self.classes_ = np.asarray(classes)
+        self.source_sha256 = source_sha256
+    
+    @classmethod
+    def build(cls, flat_forest: FlatForest, n_features=4, max_cells=5_000_000,
+              verify_samples=10000, seed=42, source_sha256=None):
+        """
+        Precompute the forest output for every cell of its threshold grid
+        
+        Args:
+            flat_forest (FlatForest): Exported forest (inputs in scaled space)
+            n_features (int): Number of input features
+            max_cells (int): Refuse to build grids larger than this
+            verify_samples (int): Random rows checked against the forest
+            seed (int): Seed for the verification sample
+            source_sha256 (str): Version of the model the forest belongs to
+            
+        Returns:
+            LookupTableModel
+        """
+        is_split = flat_forest.children_left != np.arange(flat_forest.n_nodes)
+        thresholds = [
+            np.unique(flat_forest.threshold[is_split & (flat_forest.feature == f)])
+            for f in range(n_features)
+        ]
+        shape = tuple(len(t) + 1 for t in thresholds)
+        n_cells = int(np.prod(shape, dtype=np.float64))
+        if n_cells > max_cells:
+            raise ValueError(
+                f"Lookup grid {'x'.join(map(str, shape))} has {n_cells:.3g} cells, "
+                f"more than max_cells={max_cells:.3g}"
+            )
+        
+        # One float32 representative per cell: thresholds[j-1] < v <= thresholds[j]
+        representatives = [cls._cell_representatives(t) for t in thresholds]
+        grid = np.stack(np.meshgrid(*representatives, indexing='ij'), axis=-1)
+        table = flat_forest.predict_proba(grid.reshape(-1, n_features))
+        table = table.reshape(shape + (table.shape[1],))
+        
+        lookup = cls(thresholds, table, flat_forest.classes_, source_sha256)
+        lookup.verify(flat_forest, verify_samples, seed)
+        return lookup
+    
+    @staticmethod
+    def _cell_representatives(thresholds: np.ndarray) -> np.ndarray:
+        """Largest float32 value inside each cell of a sorted threshold list"""
+        upper = thresholds.astype(np.float32)
+        # Round down where float32 rounding moved past the threshold
+        over = upper.astype(np.float64) > thresholds
+        upper[over] = np.nextafter(upper[over], np.float32(-np.inf))
+        
+        last = np.float32(thresholds[-1]) if len(thresholds) else np.float32(0)
+        if len(thresholds) and last <= thresholds[-1]:
+            last = np.nextafter(last, np.float32(np.inf))
+        
+        return np.append(upper, last)
+    
+    def verify(self, flat_forest: FlatForest, n_samples=10000, seed=42):
+        """
+        Check the table against the forest on random rows and threshold edges
+        
+        Raises:
+            AssertionError: If any probability differs from the forest
+        """
+        rng = np.random.default_rng(seed)
+        columns = []
+        for thresholds in self.thresholds:
+            if len(thresholds):
+                lo, hi = thresholds[0], thresholds[-1]
+                span = max(hi - lo, 1.0)
+                random_values = rng.uniform(lo - 0.1 * span, hi + 0.1 * span, n_samples)
+                # Mix in exact threshold values to exercise the <= boundary
+                edges = rng.choice(thresholds, n_samples // 4)
+                random_values[:len(edges)] = edges
+            else:
+                random_values = rng.normal(size=n_samples)
+            columns.append(rng.permutation(random_values))
+        
+        samples = np.column_stack(columns)
+        if not np.array_equal(self.predict_proba(samples), flat_forest.predict_proba(samples)):
+            raise AssertionError("Lookup table disagrees with the forest")
+    
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities for scaled inputs
+        
+        Args:
+            X: Scaled N x n_features input
+            
+        Returns:
+            np.ndarray: N x n_classes probability matrix
+        """
+        # Same float32 comparison as the trees: cell j holds values in
+        # (thresholds[j-1], thresholds[j]]
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        index = tuple(
+            np.searchsorted(thresholds, X[:, f], side='left')
+            for f, thresholds in enumerate(self.thresholds)
+        )
+        return np.array(self.table[index], dtype=np.float64)
+    
+    def save(self, directory: str):
+        """Write the table as raw .npy arrays plus a JSON header"""
+        os.makedirs(directory, exist_ok=True)
+        offsets = np.cumsum([0] + [len(t) for t in self.thresholds])
+        np.save(os.path.join(directory, self.TABLE_FILE), np.ascontiguousarray(self.table))
+        np.save(os.path.join(directory, self.THRESHOLDS_FILE), np.concatenate(self.thresholds))
+        np.save(os.path.join(directory, self.OFFSETS_FILE), offsets)
+        np.save(os.path.join(directory, self.CLASSES_FILE), self.classes_)
+        with open(os.path.join(directory, self.HEADER_FILE), 'w') as f:
+            json.dump({
+                'format_version': self.FORMAT_VERSION,
+                'source_sha256': self.source_sha256,
+                'shape': list(self.table.shape),
+            }, f, indent=2)
+    
+    @classmethod
+    def load(cls, directory: str, mmap_mode='r'):
+        """Load a table written by ``save``, memory-mapping the cell array"""
+        header_path = os.path.join(directory, cls.HEADER_FILE)
+        if not os.path.exists(header_path):
+            raise FileNotFoundError(f"Lookup table header not found: {header_path}")
+        with open(header_path) as f:
+            header = json.load(f)
+        if header.get('format_version') != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported lookup table version: {header.get('format_version')}")
+        
+        table = np.load(os.path.join(directory, cls.TABLE_FILE), mmap_mode=mmap_mode)
+        flat_thresholds = np.load(os.path.join(directory, cls.THRESHOLDS_FILE))
+        offsets = np.load(os.path.join(directory, cls.OFFSETS_FILE))
+        classes = np.load(os.path.join(directory, cls.CLASSES_FILE))
+        thresholds = [
+            flat_thresholds[offsets[f]:offsets[f + 1]]
+            for f in range(len(offsets) - 1)
+        ]
+        return cls(thresholds, table, classes, header.get('source_sha256'))
+
+
+class NativeScaler:
+    """StandardScaler transform from stored means and scales"""
+    
+    def __init__(self, mean, scale):
+        self.mean_ = None if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale_ = None if scale is None else np.asarray(scale, dtype=np.float64)
+    
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        # Same operations and order as sklearn's StandardScaler.transform
+        X = np.array(X, dtype=np.float64)
+        if self.mean_ is not None:
+            X -= self.mean_
+        if self.scale_ is not None:
+            X /= self.scale_
+        return X
+
+
+def _to_builtin(value):
+    """Convert NumPy scalars/arrays so metadata can be written as JSON"""
+    if isinstance(value, dict):
+        return {str(k): _to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_native_artifact(model, scaler, metadata: Dict[str, Any], directory: str,
+                           source_path: str = None):
+    """
+    Write a trained forest in the native memory-mappable format
+    
+    Layout::
+    
+        <directory>/header.json        scaler, labels, features, metadata
+        <directory>/<array>.npy        flat tree arrays (see FlatForest)
+    
+    Args:
+        model: Fitted RandomForestClassifier
+        scaler: Fitted StandardScaler
+        metadata (dict): Model metadata as saved next to the pickle
+        directory (str): Output directory
+        source_path (str): Pickle the artifact was converted from; its
+            hash is recorded so stale artifacts can be detected
+    """
+    forest = FlatForest.from_sklearn(model)
+    forest.save(directory)
+    
+    label_mapping = metadata.get('label_mapping', {0: 'Baik', 1: 'Normal', 2: 'Perlu Perhatian'})
+    header = {
+        'format_version': NATIVE_FORMAT_VERSION,
+        'model_type': type(model).__name__,
+        'n_trees': forest.n_trees,
+        'n_nodes': forest.n_nodes,
+        'max_depth': forest.max_depth,
+        'classes': _to_builtin(forest.classes_),
+        'feature_names': list(metadata.get('feature_names', DEFAULT_FEATURE_NAMES)),
+        'label_mapping': {str(k): v for k, v in label_mapping.items()},
+        'scaler': {
+            'mean': _to_builtin(getattr(scaler, 'mean_', None)),
+            'scale': _to_builtin(getattr(scaler, 'scale_', None)),
+        },
+        'source_sha256': file_sha256(source_path) if source_path else None,
+        'metadata': _to_builtin(metadata),
+    }
+    
+    with open(os.path.join(directory, NATIVE_HEADER_FILE), 'w') as f:
+        json.dump(header, f, indent=2)
+
 
 class WaterQualityModel:
     """Class for managing water quality prediction model"""
     
-    def __init__(self, model_dir='models/trained'):
+    def __init__(self, model_dir='models/trained', backend='sklearn',
+                 flat_max_rows=256, model_format='auto', name='default',
+                 variant='auto'):
         """
         Initialize the water quality model
         
         Args:
             model_dir (str): Directory containing trained model files
+            backend (str): Inference backend, 'sklearn', 'flat' or 'lookup'
+            flat_max_rows (int): Largest batch served by the flat backend;
+                bigger batches use sklearn's multi-threaded trees
+            model_format (str): 'native' (memory-mapped arrays), 'pickle'
+                (joblib files) or 'auto' (native when present and current)
+            name (str): Registry name used for routing and statistics
+            variant (str): 'distilled' (the small student model in
+                ``distilled/``), 'full' (the teacher forest) or 'auto'
+                (distilled when present and trained from this teacher)
         """
+        self.name = name
         self.model_dir = model_dir
+        self.variant = variant
+        self.artifact_dir = model_dir
+        self.backend = backend
+        self.flat_max_rows = flat_max_rows
+        self.model_format = model_format
+        self.artifact_format = None
+        self.served_variant = None
+        self.version = None
+        self.loaded_at = None
+        self.generation = 0
+        self.footprint_bytes = 0
+        self.latency = None
+        self.engine = None
+        self.forest = None
+        self.classes_ = None
         self.model = None
         self.scaler = None
         self.metadata = None
@@ -34,26 +529,12 @@ class WaterQualityModel:
     def load_model(self):
         """Load the trained model, scaler, and metadata"""
         try:
-            # Load model
-            model_path = os.path.join(self.model_dir, 'water_quality_rf_model.pkl')
-            if not os.path.exists(model_path):
-                raise FileNotFoundError(f"Model file not found: {model_path}")
-            self.model = joblib.load(model_path)
-            
-            # Load scaler
-            scaler_path = os.path.join(self.model_dir, 'scaler.pkl')
-            if not os.path.exists(scaler_path):
-                raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
-            self.scaler = joblib.load(scaler_path)
-            
-            # Load metadata with fallback defaults
-            metadata_path = os.path.join(self.model_dir, 'model_metadata.pkl')
-            if os.path.exists(metadata_path):
-                self.metadata = joblib.load(metadata_path)
+            self.artifact_dir = self._resolve_artifact_dir()
+            native_dir = os.path.join(self.artifact_dir, NATIVE_ARTIFACT_DIR)
+            if self._use_native(native_dir):
+                self._load_native(native_dir)
             else:
-                # Create default metadata if file doesn't exist
-                print(f"[WARNING] Metadata file not found, using defaults")
-                self.metadata = {}
+                self._load_pickles()
             
             # Extract important info with defaults
             self.label_mapping = self.metadata.get('label_mapping', {0: 'Baik', 1: 'Normal', 2: 'Perlu Perhatian'})
@@ -91,11 +572,21 @@ class WaterQualityModel:
             if 'feature_importance' not in self.metadata:
                 self.metadata['feature_importance'] = {}
             
+            self._init_backend()
+            self.footprint_bytes = self._estimate_footprint()
+            self.loaded_at = datetime.utcnow().isoformat() + 'Z'
+            # Later loads are newer; lets caches ignore requests still in
+            # flight on a replaced model
+            self.generation = next(_load_sequence)
+            
             print(f"[OK] Model loaded successfully!")
             print(f"   Model type: {self.metadata['model_type']}")
             if self.metadata['accuracy'] > 0:
                 print(f"   Accuracy: {self.metadata['accuracy']*100:.2f}%")
             print(f"   Training date: {self.metadata['training_date']}")
+            print(f"   Artifact format: {self.artifact_format}")
+            print(f"   Variant: {self.served_variant}")
+            print(f"   Inference backend: {self.active_backend}")
             
             return True
             
@@ -110,6 +601,156 @@ class WaterQualityModel:
             traceback.print_exc()
             return False
     
+    def _resolve_artifact_dir(self) -> str:
+        """Directory to load from, the distilled student or the teacher"""
+        distilled_dir = os.path.join(self.model_dir, DISTILLED_DIR)
+        self.served_variant = 'full'
+        if self.variant == 'full':
+            return self.model_dir
+        if self.variant == 'distilled':
+            if not os.path.isdir(distilled_dir):
+                raise FileNotFoundError(f"Distilled model not found: {distilled_dir}")
+            self.served_variant = 'distilled'
+            return distilled_dir
+        if self.variant != 'auto':
+            print(f"[WARNING] Unknown model variant '{self.variant}', using auto")
+        
+        # auto: skip a student distilled from a different teacher
+        metadata_path = os.path.join(distilled_dir, METADATA_FILE)
+        if not os.path.exists(metadata_path):
+            return self.model_dir
+        teacher_sha256 = joblib.load(metadata_path).get('distillation', {}).get('teacher_sha256')
+        teacher_path = os.path.join(self.model_dir, MODEL_FILE)
+        if teacher_sha256 and os.path.exists(teacher_path) and file_sha256(teacher_path) != teacher_sha256:
+            print(f"[WARNING] Distilled model in {distilled_dir} is stale, serving the full model")
+            return self.model_dir
+        self.served_variant = 'distilled'
+        return distilled_dir
+    
+    def _use_native(self, native_dir: str) -> bool:
+        """Decide whether to load the native artifact instead of the pickles"""
+        header_path = os.path.join(native_dir, NATIVE_HEADER_FILE)
+        if self.model_format == 'pickle':
+            return False
+        if not os.path.exists(header_path):
+            if self.model_format == 'native':
+                raise FileNotFoundError(f"Native model artifact not found: {header_path}")
+            return False
+        if self.model_format == 'native':
+            return True
+        
+        # auto: skip artifacts converted from a different pickle
+        model_path = os.path.join(self.artifact_dir, MODEL_FILE)
+        with open(header_path) as f:
+            source_sha256 = json.load(f).get('source_sha256')
+        if source_sha256 and os.path.exists(model_path) and file_sha256(model_path) != source_sha256:
+            print(f"[WARNING] Native artifact in {native_dir} is stale, loading pickles")
+            print(f"   Regenerate it with: python models/training/convert_to_native.py")
+            return False
+        return True
+    
+    def _load_pickles(self):
+        """Load the joblib model, scaler and metadata files"""
+        # Load model
+        model_path = os.path.join(self.artifact_dir, MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found: {model_path}")
+        self.model = joblib.load(model_path)
+        self.classes_ = self.model.classes_
+        
+        # Load scaler
+        scaler_path = os.path.join(self.artifact_dir, SCALER_FILE)
+        if not os.path.exists(scaler_path):
+            raise FileNotFoundError(f"Scaler file not found: {scaler_path}")
+        self.scaler = joblib.load(scaler_path)
+        
+        # Load metadata with fallback defaults
+        metadata_path = os.path.join(self.artifact_dir, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            self.metadata = joblib.load(metadata_path)
+        else:
+            # Create default metadata if file doesn't exist
+            print(f"[WARNING] Metadata file not found, using defaults")
+            self.metadata = {}
+        
+        self.artifact_format = 'pickle'
+        self.version = file_sha256(model_path)
+    
+    def _load_native(self, native_dir: str):
+        """Load the native artifact with memory-mapped tree arrays"""
+        with open(os.path.join(native_dir, NATIVE_HEADER_FILE)) as f:
+            header = json.load(f)
+        
+        if header.get('format_version') != NATIVE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported native artifact version: {header.get('format_version')}")
+        
+        self.forest = FlatForest.load(native_dir, header['max_depth'], header['classes'])
+        self.classes_ = self.forest.classes_
+        self.scaler = NativeScaler(header['scaler']['mean'], header['scaler']['scale'])
+        
+        self.metadata = header.get('metadata', {})
+        self.metadata['feature_names'] = header['feature_names']
+        self.metadata['label_mapping'] = {int(k): v for k, v in header['label_mapping'].items()}
+        
+        self.artifact_format = 'native'
+        self.version = header.get('source_sha256') or file_sha256(
+            os.path.join(native_dir, NATIVE_HEADER_FILE)
+        )
+    
+    def _estimate_footprint(self) -> int:
+        """Approximate resident size: artifact files plus in-memory engine arrays"""
+        if self.artifact_format == 'native':
+            native_dir = os.path.join(self.artifact_dir, NATIVE_ARTIFACT_DIR)
+            paths = [os.path.join(native_dir, name) for name in os.listdir(native_dir)]
+        else:
+            paths = [os.path.join(self.artifact_dir, name) for name in (MODEL_FILE, SCALER_FILE)]
+        footprint = sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+        
+        if self.artifact_format != 'native' and self.forest is not None:
+            footprint += sum(getattr(self.forest, name).nbytes for name in FlatForest.ARRAY_FILES)
+        return footprint
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether a model (pickled estimator or native forest) is loaded"""
+        return self.model is not None or self.forest is not None
+    
+    def _init_backend(self):
+        """Build the configured inference engine, falling back to sklearn"""
+        self.engine = None
+        if self.backend == 'flat':
+            try:
+                self.engine = self.forest or FlatForest.from_sklearn(self.model)
+            except Exception as e:
+                print(f"[WARNING] Flat inference backend unavailable, using sklearn: {e}")
+        elif self.backend == 'lookup':
+            lookup_dir = os.path.join(self.artifact_dir, LOOKUP_TABLE_DIR)
+            try:
+                lookup = LookupTableModel.load(lookup_dir)
+                if lookup.source_sha256 != self.version:
+                    raise ValueError(
+                        f"stale table built from model {str(lookup.source_sha256)[:12]}, "
+                        f"serving {self.version[:12]}"
+                    )
+                self.engine = lookup
+            except Exception as e:
+                fallback = 'sklearn' if self.model is not None else 'flat'
+                print(f"[WARNING] Lookup table not available in {lookup_dir}, using {fallback}: {e}")
+                print(f"   Build it with: python models/training/build_lookup_table.py")
+        elif self.backend != 'sklearn':
+            print(f"[WARNING] Unknown inference backend '{self.backend}', using sklearn")
+        
+        if self.engine is None and self.model is None:
+            # Native artifacts carry no sklearn estimator; serve the flat forest
+            self.engine = self.forest
+    
+    @property
+    def active_backend(self) -> str:
+        """Name of the inference backend actually in use"""
+        if isinstance(self.engine, LookupTableModel):
+            return 'lookup'
+        return 'flat' if self.engine is not None else 'sklearn'
+    
     def predict(self, ph: float, temperature: float, turbidity: float, 
                 dissolved_oxygen: float) -> Dict[str, Any]:
         """
@@ -124,61 +765,145 @@ class WaterQualityModel:
         Returns:
             dict: Prediction results with description
         """
-        if self.model is None:
+        if not self.is_loaded:
             raise RuntimeError("Model not loaded. Call load_model() first.")
         
-        # Prepare input respecting the trained feature order from metadata
-        input_features_by_name = {
+        # One predict_proba pass; the class is derived from its argmax
+        return self.predict_many([{
             'ph': float(ph),
             'temperature': float(temperature),
             'turbidity': float(turbidity),
             'dissolved_oxygen': float(dissolved_oxygen),
-        }
-
-        # Some notebooks/datasets might use alternate keys; map if present in metadata
-        alias_map = {
-            'pH': 'ph',
-            'temp': 'temperature',
-            'do': 'dissolved_oxygen',
-            'd_o': 'dissolved_oxygen',
-        }
-
-        ordered_values = []
-        feature_names = self.feature_names or ['ph', 'temperature', 'turbidity', 'dissolved_oxygen']
-        for name in feature_names:
-            key = alias_map.get(name, name)
-            if key not in input_features_by_name:
-                raise ValueError(f"Missing required feature '{name}' for prediction input")
-            ordered_values.append(input_features_by_name[key])
-
-        input_data = np.array([ordered_values])
-
-        # Scale input (scaler was fitted using the same feature order as metadata)
-        input_scaled = self.scaler.transform(input_data)
+        }])[0]
+    
+    def predict_many(self, readings: List[Dict[str, float]]) -> List[Dict[str, Any]]:
+        """
+        Predict water quality for many readings with a single forest pass
+        
+        The readings are assembled into one N x 4 matrix, scaled once and
+        evaluated with one ``predict_proba`` call. Descriptions and
+        recommendations are then generated per row from the results.
         
-        # Predict
-        prediction = self.model.predict(input_scaled)[0]
-        prediction_proba = self.model.predict_proba(input_scaled)[0]
+        Args:
+            readings: list of dicts with numeric ph, temperature, turbidity
+                and dissolved_oxygen values
+            
+        Returns:
+            list: Prediction results in the same order as ``readings``
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
         
-        # Get quality class
-        quality_class = self.label_mapping[prediction]
-        confidence = prediction_proba[prediction]
+        if not readings:
+            return []
         
-        # Generate description
-        description_result = self._generate_description(
-            quality_class, ph, temperature, turbidity, dissolved_oxygen
-        )
+        probabilities = self.predict_proba_array(self.build_feature_matrix(readings))
+        return self.build_results(readings, probabilities)
+    
+    def build_results(self, readings: List[Dict[str, float]],
+                      probabilities: np.ndarray,
+                      fields=water_rules.ALL_FIELDS) -> List[Dict[str, Any]]:
+        """
+        Turn class probabilities into prediction results
         
-        # Add prediction info
-        description_result['prediction_numeric'] = int(prediction)
-        description_result['confidence'] = float(confidence)
-        description_result['probabilities'] = {
-            self.label_mapping[i]: float(prob) 
-            for i, prob in enumerate(prediction_proba)
-        }
-        description_result['timestamp'] = None  # Will be set by API
+        Issue rules are evaluated once for the whole batch; the text fields
+        are rendered per row from the rule templates.
+        
+        Args:
+            readings: list of dicts with numeric sensor values
+            probabilities: N x n_classes output of ``predict_proba_array``
+            fields: Text fields to render ('description', 'issues',
+                'recommendations'); pass an empty tuple to skip text
+            
+        Returns:
+            list: Prediction results with description and recommendations
+        """
+        with metrics.stage('describe'):
+            return self._build_results(readings, probabilities, fields)
+    
+    def _build_results(self, readings, probabilities, fields):
+        class_indices = probabilities.argmax(axis=1)
+        issue_codes = water_rules.evaluate_issue_codes(water_rules.readings_to_features(readings))
+        
+        results = []
+        for reading, prediction_proba, class_index, code in zip(
+                readings, probabilities, class_indices, issue_codes):
+            prediction = self.classes_[class_index]
+            quality = self.label_mapping[prediction]
+            description_result = {'quality': quality}
+            description_result.update(water_rules.render(code, quality, reading, fields))
+            description_result['parameters'] = {
+                'ph': reading['ph'],
+                'temperature': reading['temperature'],
+                'turbidity': reading['turbidity'],
+                'dissolved_oxygen': reading['dissolved_oxygen']
+            }
+            description_result['prediction_numeric'] = int(prediction)
+            description_result['confidence'] = float(prediction_proba[class_index])
+            description_result['probabilities'] = {
+                self.label_mapping[i]: float(prob)
+                for i, prob in enumerate(prediction_proba)
+            }
+            description_result['timestamp'] = None  # Will be set by API
+            results.append(description_result)
+        
+        return results
+    
+    def predict_proba_array(self, input_data: np.ndarray) -> np.ndarray:
+        """
+        Scale an N x 4 feature matrix and return the class probabilities
+        
+        Args:
+            input_data: float array ordered like ``self.feature_names``
+            
+        Returns:
+            np.ndarray: N x n_classes probability matrix
+        """
+        if not self.is_loaded:
+            raise RuntimeError("Model not loaded. Call load_model() first.")
+        
+        started_at = time.perf_counter()
+        input_scaled = self.scaler.transform(input_data)
+        scaled_at = time.perf_counter()
+        if isinstance(self.engine, LookupTableModel):
+            probabilities = self.engine.predict_proba(input_scaled)
+        elif self.engine is not None and (self.model is None or len(input_scaled) <= self.flat_max_rows):
+            probabilities = self.engine.predict_proba(input_scaled)
+        else:
+            probabilities = self.model.predict_proba(input_scaled)
         
-        return description_result
+        finished_at = time.perf_counter()
+        if self.latency is not None:
+            self.latency.record(finished_at - started_at, len(input_data))
+        metrics.observe_stage('scale', scaled_at - started_at)
+        metrics.observe_stage('inference', finished_at - scaled_at)
+        return probabilities
+    
+    def build_feature_matrix(self, readings: List[Dict[str, float]]) -> np.ndarray:
+        """
+        Assemble readings into an N x 4 float array in the trained feature order
+        
+        Args:
+            readings: list of dicts keyed by ph, temperature, turbidity
+                and dissolved_oxygen
+            
+        Returns:
+            np.ndarray: float64 feature matrix
+        """
+        feature_names = self.feature_names or DEFAULT_FEATURE_NAMES
+        keys = []
+        for name in feature_names:
+            # Some notebooks/datasets might use alternate keys; map if present in metadata
+            key = FEATURE_ALIASES.get(name, name)
+            if key not in DEFAULT_FEATURE_NAMES:
+                raise ValueError(f"Missing required feature '{name}' for prediction input")
+            keys.append(key)
+        
+        input_data = np.empty((len(readings), len(keys)), dtype=np.float64)
+        for row, reading in enumerate(readings):
+            input_data[row] = [reading[key] for key in keys]
+        
+        return input_data
     
     def _generate_description(self, quality_class: str, ph: float, 
                             temperature: float, turbidity: float, 
@@ -193,115 +918,18 @@ class WaterQualityModel:
         Returns:
             dict: Description and recommendations
         """
-        # Ideal ranges for Tilapia (Ikan Nila)
-        IDEAL_PH_MIN, IDEAL_PH_MAX = 6.5, 8.5
-        IDEAL_TEMP_MIN, IDEAL_TEMP_MAX = 25, 30
-        IDEAL_TURBIDITY_MAX = 25  # NTU
-        IDEAL_DO_MIN = 5.0  # mg/L
-        
-        # Initialize description components
-        issues = []
-        recommendations = []
-        
-        # Check pH
-        if ph < 6.0:
-            issues.append("pH terlalu rendah (asam)")
-            recommendations.append("Tambahkan kapur pertanian untuk menaikkan pH")
-        elif ph > 9.0:
-            issues.append("pH terlalu tinggi (basa)")
-            recommendations.append("Lakukan pergantian air secara bertahap")
-        elif ph < IDEAL_PH_MIN or ph > IDEAL_PH_MAX:
-            issues.append("pH di luar rentang optimal")
-            recommendations.append("Monitor pH secara rutin dan lakukan penyesuaian bertahap")
-        
-        # Check Temperature
-        if temperature < 20:
-            issues.append("suhu terlalu rendah")
-            recommendations.append("Pertimbangkan penggunaan pemanas air atau greenhouse")
-        elif temperature > 32:
-            issues.append("suhu terlalu tinggi")
-            recommendations.append("Tingkatkan aerasi dan pertimbangkan peneduh kolam")
-        elif temperature < IDEAL_TEMP_MIN or temperature > IDEAL_TEMP_MAX:
-            issues.append("suhu di luar rentang optimal")
-            recommendations.append("Monitor suhu dan sesuaikan dengan kondisi lingkungan")
-        
-        # Check Turbidity
-        if turbidity > 50:
-            issues.append("kekeruhan sangat tinggi")
-            recommendations.append("Kurangi pemberian pakan dan tingkatkan filtrasi air")
-        elif turbidity > IDEAL_TURBIDITY_MAX:
-            issues.append("kekeruhan cukup tinggi")
-            recommendations.append("Lakukan penggantian air parsial dan periksa sistem filtrasi")
-        
-        # Check Dissolved Oxygen
-        if dissolved_oxygen < 3.0:
-            issues.append("oksigen terlarut sangat rendah (berbahaya)")
-            recommendations.append("SEGERA tingkatkan aerasi dan kurangi kepadatan ikan")
-        elif dissolved_oxygen < IDEAL_DO_MIN:
-            issues.append("oksigen terlarut di bawah ideal")
-            recommendations.append("Tingkatkan aerasi dengan aerator atau kincir air")
-        
-        # Generate description based on quality class
-        if quality_class == 'Baik':
-            description = (
-                f"Kualitas air dalam kondisi OPTIMAL untuk budidaya ikan nila. "
-                f"Parameter pH ({ph:.2f}), suhu ({temperature:.1f}°C), kekeruhan ({turbidity:.1f} NTU), "
-                f"dan oksigen terlarut ({dissolved_oxygen:.2f} mg/L) berada dalam rentang ideal. "
-                f"Ikan nila dapat tumbuh dengan sehat, memiliki nafsu makan yang baik, dan sistem imun yang kuat. "
-                f"Pertumbuhan ikan optimal dengan tingkat stres minimal."
-            )
-            if not recommendations:
-                recommendations.extend([
-                    "Pertahankan kualitas air saat ini",
-                    "Lakukan monitoring rutin setiap hari",
-                    "Berikan pakan berkualitas sesuai jadwal"
-                ])
-        
-        elif quality_class == 'Normal':
-            description = (
-                f"Kualitas air dalam kondisi CUKUP BAIK untuk budidaya ikan nila. "
-                f"Terdapat beberapa parameter yang perlu diperhatikan: {', '.join(issues) if issues else 'parameter masih dalam batas toleransi'}. "
-                f"Ikan nila masih dapat bertahan dan tumbuh, namun mungkin mengalami sedikit stres. "
-                f"Nafsu makan ikan bisa menurun dan pertumbuhan tidak seoptimal kondisi ideal. "
-                f"Sistem kekebalan tubuh ikan mulai menurun, sehingga lebih rentan terhadap penyakit."
-            )
-            if not recommendations:
-                recommendations.extend([
-                    "Monitor parameter air lebih sering (2-3x sehari)",
-                    "Siapkan rencana perbaikan kualitas air",
-                    "Kurangi pemberian pakan jika ikan terlihat lemas"
-                ])
-        
-        else:  # Perlu Perhatian
-            description = (
-                f"Kualitas air dalam kondisi BURUK dan MEMERLUKAN TINDAKAN SEGERA! "
-                f"Masalah yang terdeteksi: {', '.join(issues)}. "
-                f"Dalam kondisi air seperti ini, ikan nila mengalami STRES BERAT dan kesehatan mereka terancam. "
-                f"Ikan akan menunjukkan gejala: nafsu makan menurun drastis atau tidak mau makan, "
-                f"bergerak lemah di permukaan air (gasping), warna tubuh memucat, "
-                f"sangat rentan terhadap penyakit dan infeksi, pertumbuhan terhenti, "
-                f"dan dapat menyebabkan KEMATIAN MASSAL jika tidak segera ditangani."
-            )
-            if not recommendations:
-                recommendations.extend([
-                    "SEGERA lakukan pergantian air 30-50%",
-                    "Hentikan pemberian pakan sementara",
-                    "Tingkatkan aerasi secara maksimal"
-                ])
-            recommendations.append("Konsultasi dengan ahli budidaya ikan jika kondisi tidak membaik")
-        
-        return {
-            'quality': quality_class,
-            'description': description,
-            'issues': issues if issues else ['Tidak ada masalah signifikan'],
-            'recommendations': recommendations,
-            'parameters': {
-                'ph': ph,
-                'temperature': temperature,
-                'turbidity': turbidity,
-                'dissolved_oxygen': dissolved_oxygen
-            }
+        reading = {
+            'ph': ph,
+            'temperature': temperature,
+            'turbidity': turbidity,
+            'dissolved_oxygen': dissolved_oxygen
         }
+        code = water_rules.evaluate_issue_codes(water_rules.readings_to_features([reading]))[0]
+        
+        result = {'quality': quality_class}
+        result.update(water_rules.render(code, quality_class, reading))
+        result['parameters'] = reading
+        return result
     
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the loaded model"""
@@ -309,6 +937,7 @@ class WaterQualityModel:
             return {"error": "Model not loaded"}
         
         return {
+            'name': self.name,
             'model_type': self.metadata.get('model_type', 'RandomForestClassifier'),
             'features': self.metadata.get('feature_names', self.feature_names or ['ph', 'temperature', 'turbidity', 'dissolved_oxygen']),
             'classes': list(self.metadata.get('label_mapping', self.label_mapping or {0: 'Baik', 1: 'Normal', 2: 'Perlu Perhatian'}).values()),
@@ -317,23 +946,439 @@ class WaterQualityModel:
             'recall': self.metadata.get('recall', 0.0),
             'f1_score': self.metadata.get('f1_score', 0.0),
             'training_date': self.metadata.get('training_date', 'Unknown'),
-            'feature_importance': self.metadata.get('feature_importance', {})
+            'feature_importance': self.metadata.get('feature_importance', {}),
+            'inference_backend': self.active_backend,
+            'version': self.version,
+            'artifact_format': self.artifact_format,
+            'variant': self.served_variant,
+            'loaded_at': self.loaded_at,
+            'footprint_bytes': self.footprint_bytes
+        }
+
+
+DEFAULT_MODEL = 'default'
+MODEL_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+# Upper bounds (ms) of the per-model inference latency histogram
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when no loaded model is available to serve predictions"""
+
+
+class UnknownModelError(ValueError):
+    """Raised when a request names a model that has no artifact directory"""
+
+
+class LatencyStats:
+    """Call count, row count and latency histogram of one named model"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rows = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    
+    def record(self, seconds: float, rows: int):
+        elapsed_ms = seconds * 1000
+        bucket = next((i for i, upper in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= upper),
+                      len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            self.calls += 1
+            self.rows += rows
+            self._sum_ms += elapsed_ms
+            self._max_ms = max(self._max_ms, elapsed_ms)
+            self._counts[bucket] += 1
+    
+    def _quantile(self, q):
+        # Upper bound of the bucket holding the q-th call
+        target = q * self.calls
+        seen = 0
+        for upper, count in zip(LATENCY_BUCKETS_MS + (self._max_ms,), self._counts):
+            seen += count
+            if seen >= target:
+                return upper
+        return self._max_ms
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            labels = [str(upper) for upper in LATENCY_BUCKETS_MS] + ['+Inf']
+            return {
+                'calls': self.calls,
+                'rows': self.rows,
+                'mean_ms': round(self._sum_ms / self.calls, 4) if self.calls else 0.0,
+                'p50_ms': self._quantile(0.5) if self.calls else 0.0,
+                'p99_ms': self._quantile(0.99) if self.calls else 0.0,
+                'max_ms': round(self._max_ms, 4),
+                'histogram': dict(zip(labels, self._counts)),
+            }
+
+
+# Reading scored by every freshly loaded model before it is swapped in
+CANARY_READING = {'ph': 7.2, 'temperature': 28.5, 'turbidity': 15.3, 'dissolved_oxygen': 6.8}
+
+
+def _create_model(model_dir='models/trained', name=DEFAULT_MODEL) -> WaterQualityModel:
+    return WaterQualityModel(
+        model_dir=model_dir,
+        backend=Config.INFERENCE_BACKEND,
+        flat_max_rows=Config.FLAT_BACKEND_MAX_ROWS,
+        model_format=Config.MODEL_FORMAT,
+        name=name,
+        variant=Config.MODEL_VARIANT
+    )
+
+
+def warm_up(model: WaterQualityModel):
+    """
+    Run a canary prediction through a loaded model
+    
+    Args:
+        model: Model to check
+        
+    Raises:
+        RuntimeError: If the model is not loaded or returns invalid output
+    """
+    if not model.is_loaded:
+        raise RuntimeError(f"Model in {model.model_dir} failed to load")
+    
+    probabilities = model.predict_proba_array(model.build_feature_matrix([CANARY_READING]))
+    if probabilities.shape != (1, len(model.classes_)) or not np.isfinite(probabilities).all() \
+            or not np.isclose(probabilities.sum(), 1.0):
+        raise RuntimeError(f"Canary prediction returned invalid probabilities: {probabilities}")
+    model.build_results([CANARY_READING], probabilities)
+
+
+class ModelRegistry:
+    """
+    Holds the serving model and loads it exactly once
+    
+    Readers get the current model with a single attribute read and no
+    lock. A published model is never mutated; reloads build a new instance
+    and replace the reference. Loading is serialized by a lock, so
+    concurrent first requests load the files once. A failed load is not
+    cached: it is retried on a later request after an exponential backoff,
+    and requests in between fail fast with ModelUnavailableError.
+    """
+    
+    def __init__(self, model_dir='models/trained', retry_base_seconds=1.0,
+                 retry_max_seconds=60.0, name=DEFAULT_MODEL):
+        """
+        Initialize the registry
+        
+        Args:
+            model_dir (str): Directory containing trained model files
+            retry_base_seconds (float): Backoff after the first failed load
+            retry_max_seconds (float): Upper bound of the backoff
+            name (str): Name the model is served under
+        """
+        self.name = name
+        self.model_dir = model_dir
+        self.retry_base = retry_base_seconds
+        self.retry_max = retry_max_seconds
+        self._current = None
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.last_error = None
+        self._retry_at = 0.0
+        self.latency = LatencyStats()
+        self.last_used = 0.0
+    
+    def get(self) -> WaterQualityModel:
+        """
+        Current model, loading it on first use
+        
+        Raises:
+            ModelUnavailableError: If the model cannot be loaded (yet)
+        """
+        self.last_used = time.monotonic()
+        model = self._current
+        if model is not None:
+            return model
+        
+        with self._lock:
+            if self._current is not None:
+                return self._current
+            
+            wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                raise ModelUnavailableError(
+                    f"Model unavailable ({self.last_error}); next load attempt in {wait:.1f}s"
+                )
+            
+            try:
+                model = _create_model(self.model_dir, self.name)
+                if not model.load_model():
+                    raise RuntimeError(f"Model files in {self.model_dir} could not be loaded")
+            except Exception as e:
+                self._record_failure(e)
+                raise ModelUnavailableError(f"Model unavailable: {e}") from e
+            
+            self._publish(model)
+            return model
+    
+    def peek(self):
+        """Current model or None, without loading"""
+        return self._current
+    
+    def reload(self, model_dir=None) -> WaterQualityModel:
+        """
+        Load the current model artifact and atomically swap it in
+        
+        The new model is loaded and warmed with a canary prediction while the
+        old one keeps serving. Requests that already hold the old instance
+        finish on it; later calls to ``get`` return the new one. If anything
+        fails, the old model stays active.
+        
+        Args:
+            model_dir: Directory with the model files (default: the
+                registry's directory)
+            
+        Returns:
+            WaterQualityModel: The newly active model
+            
+        Raises:
+            RuntimeError: If the new model fails to load or its canary fails
+        """
+        with self._lock:
+            if model_dir is not None:
+                self.model_dir = model_dir
+            current = self._current
+            
+            candidate = _create_model(self.model_dir, self.name)
+            candidate.load_model()
+            warm_up(candidate)
+            
+            self._publish(candidate)
+        
+        previous = current.version if current is not None else None
+        print(f"[OK] Model '{self.name}' reloaded: {previous} -> {candidate.version}")
+        return candidate
+    
+    def unload(self) -> int:
+        """
+        Drop the loaded model; the next ``get`` loads it again
+        
+        Returns:
+            int: Footprint of the dropped model in bytes
+        """
+        with self._lock:
+            model, self._current = self._current, None
+        return model.footprint_bytes if model is not None else 0
+    
+    def _publish(self, model):
+        model.latency = self.latency
+        # Single reference assignment: readers see the old or the new model
+        self._current = model
+        self.failures = 0
+        self.last_error = None
+        self._retry_at = 0.0
+    
+    def _record_failure(self, error):
+        self.failures += 1
+        self.last_error = str(error)
+        backoff = min(self.retry_base * 2 ** (self.failures - 1), self.retry_max)
+        self._retry_at = time.monotonic() + backoff
+        print(f"[WARNING] Model load attempt {self.failures} failed, retrying in {backoff:.0f}s")
+    
+    def stats(self) -> Dict[str, Any]:
+        model = self._current
+        return {
+            'loaded': model is not None,
+            'version': model.version if model is not None else None,
+            'footprint_bytes': model.footprint_bytes if model is not None else 0,
+            'idle_seconds': round(time.monotonic() - self.last_used, 1) if self.last_used else None,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'latency': self.latency.stats()
         }
 
 
-# Global model instance (singleton)
-_model_instance = None
+class MultiModelRegistry:
+    """
+    Named models loaded lazily, routed by model name or pond id
+    
+    The 'default' model lives in ``default_dir``; any other name refers to
+    a directory of the same files under ``variants_dir`` (e.g.
+    ``models/variants/tarpaulin``). Each name has its own ModelRegistry, so
+    loading, retry and reload work per model. When a newly loaded model
+    pushes the total footprint over ``max_bytes``, the least recently used
+    other models are unloaded. The 'default' model is never unloaded: it
+    serves every unrouted request and readiness is judged on it.
+    """
+    
+    def __init__(self, default_dir='models/trained', variants_dir='models/variants',
+                 max_bytes=512 * 1024 * 1024, pond_routes=None,
+                 retry_base_seconds=1.0, retry_max_seconds=60.0):
+        """
+        Initialize the registry
+        
+        Args:
+            default_dir (str): Directory of the 'default' model
+            variants_dir (str): Directory holding one subdirectory per named model
+            max_bytes (int): Footprint budget of all loaded models
+            pond_routes (dict): pond id (str) -> model name
+            retry_base_seconds (float): Backoff after a failed load
+            retry_max_seconds (float): Upper bound of the backoff
+        """
+        self.default_dir = default_dir
+        self.variants_dir = variants_dir
+        self.max_bytes = max_bytes
+        self.pond_routes = {str(pond): name for pond, name in (pond_routes or {}).items()}
+        self.retry_base = retry_base_seconds
+        self.retry_max = retry_max_seconds
+        self._registries = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    def resolve(self, model=None, pond_id=None) -> str:
+        """
+        Name of the model serving a request
+        
+        Args:
+            model: Explicit model name from the request (wins over pond_id)
+            pond_id: Pond id looked up in the pond routes
+            
+        Returns:
+            str: Model name ('default' when nothing matches)
+        """
+        if model:
+            return str(model)
+        if pond_id is not None:
+            return self.pond_routes.get(str(pond_id), DEFAULT_MODEL)
+        return DEFAULT_MODEL
+    
+    def model_dir(self, name: str) -> str:
+        if name == DEFAULT_MODEL:
+            return self.default_dir
+        if not MODEL_NAME_PATTERN.match(name):
+            raise UnknownModelError(f"Invalid model name: {name!r}")
+        return os.path.join(self.variants_dir, name)
+    
+    def registry(self, name=None) -> ModelRegistry:
+        """
+        Per-model registry, created on first use
+        
+        Raises:
+            UnknownModelError: If no artifact directory exists for ``name``
+        """
+        name = name or DEFAULT_MODEL
+        registry = self._registries.get(name)
+        if registry is not None:
+            return registry
+        
+        model_dir = self.model_dir(name)
+        if name != DEFAULT_MODEL and not os.path.isdir(model_dir):
+            raise UnknownModelError(f"Unknown model: {name!r}")
+        
+        with self._lock:
+            registry = self._registries.get(name)
+            if registry is None:
+                registry = ModelRegistry(model_dir, self.retry_base, self.retry_max, name=name)
+                self._registries[name] = registry
+        return registry
+    
+    def get(self, name=None) -> WaterQualityModel:
+        """
+        Loaded model for ``name``, loading (and evicting) as needed
+        
+        Raises:
+            UnknownModelError: If ``name`` has no artifact directory
+            ModelUnavailableError: If the model cannot be loaded
+        """
+        registry = self.registry(name)
+        model = registry.peek()
+        if model is not None:
+            registry.last_used = time.monotonic()
+            return model
+        
+        model = registry.get()
+        self._enforce_memory_cap(keep=registry)
+        return model
+    
+    def _enforce_memory_cap(self, keep: ModelRegistry):
+        with self._lock:
+            loaded = [r for r in self._registries.values() if r.peek() is not None]
+            total = sum(r.peek().footprint_bytes for r in loaded)
+            candidates = sorted(
+                (r for r in loaded if r is not keep and r.name != DEFAULT_MODEL),
+                key=lambda r: r.last_used
+            )
+            
+            for victim in candidates:
+                if total <= self.max_bytes:
+                    break
+                freed = victim.unload()
+                total -= freed
+                self.evictions += 1
+                print(f"[OK] Unloaded model '{victim.name}' ({freed / 1e6:.1f} MB) to stay under "
+                      f"the {self.max_bytes / 1e6:.0f} MB model memory cap")
+    
+    def registries(self) -> List[ModelRegistry]:
+        """Registries created so far (loaded or not)"""
+        with self._lock:
+            return list(self._registries.values())
+    
+    def available(self) -> List[str]:
+        """Names of all models with an artifact directory"""
+        names = [DEFAULT_MODEL]
+        if os.path.isdir(self.variants_dir):
+            names += sorted(
+                name for name in os.listdir(self.variants_dir)
+                if MODEL_NAME_PATTERN.match(name)
+                and os.path.isdir(os.path.join(self.variants_dir, name))
+            )
+        return names
+    
+    def stats(self) -> Dict[str, Any]:
+        models = {name: registry.stats() for name, registry in list(self._registries.items())}
+        return {
+            'available': self.available(),
+            'loaded_bytes': sum(m['footprint_bytes'] for m in models.values()),
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+            'pond_routes': self.pond_routes,
+            'models': models
+        }
+
 
-def get_model_instance() -> WaterQualityModel:
-    """Get or create the global model instance"""
-    global _model_instance
-    if _model_instance is None:
-        _model_instance = WaterQualityModel()
-        _model_instance.load_model()
-    return _model_instance
+# Process-wide registry of the serving models
+_models = MultiModelRegistry(
+    variants_dir=Config.MODEL_VARIANTS_DIR,
+    max_bytes=int(Config.MODEL_MEMORY_CAP_MB * 1024 * 1024),
+    pond_routes=Config.POND_MODEL_ROUTES,
+    retry_base_seconds=Config.MODEL_LOAD_RETRY_BASE_SECONDS,
+    retry_max_seconds=Config.MODEL_LOAD_RETRY_MAX_SECONDS
+)
 
 
+def get_models() -> MultiModelRegistry:
+    """Process-wide multi-model registry"""
+    return _models
 
 
+def get_model_registry(name=None) -> ModelRegistry:
+    """Registry of one named model (default: 'default')"""
+    return _models.registry(name)
+
+
+def get_model_instance(name=None) -> WaterQualityModel:
+    """
+    Get the serving model, loading it on first use
+    
+    Args:
+        name: Model name (default: 'default')
+        
+    Raises:
+        UnknownModelError: If ``name`` has no artifact directory
+        ModelUnavailableError: If no model could be loaded
+    """
+    return _models.get(name)
 
 
+def reload_model(model_dir=None, name=None) -> WaterQualityModel:
+    """Reload a served model (see ModelRegistry.reload)"""
+    return _models.registry(name).reload(model_dir)
@@ -0,0 +1,171 @@
+"""
+Watch the trained model files and hot-reload on change
+"""
+import os
+import threading
+from typing import Optional, Tuple
+
+from config.config import Config
+from utils import model_utils
+from utils.model_utils import (
+    DISTILLED_DIR, LOOKUP_TABLE_DIR, METADATA_FILE, MODEL_FILE, NATIVE_ARTIFACT_DIR,
+    NATIVE_HEADER_FILE, SCALER_FILE, LookupTableModel
+)
+
+# Files whose replacement signals a new model artifact, relative to a
+# model's directory. The scaler and metadata are loaded with the model, so
+# replacing only them must reload it as well
+WATCHED_FILES = (
+    MODEL_FILE,
+    SCALER_FILE,
+    METADATA_FILE,
+    os.path.join(NATIVE_ARTIFACT_DIR, NATIVE_HEADER_FILE),
+    os.path.join(LOOKUP_TABLE_DIR, LookupTableModel.HEADER_FILE),
+    os.path.join(DISTILLED_DIR, MODEL_FILE),
+    os.path.join(DISTILLED_DIR, SCALER_FILE),
+    os.path.join(DISTILLED_DIR, METADATA_FILE),
+    os.path.join(DISTILLED_DIR, NATIVE_ARTIFACT_DIR, NATIVE_HEADER_FILE),
+    os.path.join(DISTILLED_DIR, LOOKUP_TABLE_DIR, LookupTableModel.HEADER_FILE),
+)
+
+
+def file_signature(model_dir: str) -> Tuple[Optional[Tuple[int, int]], ...]:
+    """(mtime_ns, size) of each watched file in ``model_dir``, None when missing"""
+    signature = []
+    for name in WATCHED_FILES:
+        try:
+            stat = os.stat(os.path.join(model_dir, name))
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class _Watched:
+    """Watcher state of one registry"""
+    
+    def __init__(self, model, signature):
+        self.model = model
+        self.loaded = signature
+        self.pending = None
+
+
+class ModelFileWatcher:
+    """
+    Poll the directories of all loaded models and reload on change
+    
+    Every model currently loaded in the multi-model registry is watched
+    (the default model and any named variant); a model that was unloaded
+    is not, since its next load reads the files anyway. A change is only
+    acted on once the files have looked the same for two polls in a row,
+    so a model that is still being copied is never loaded. A failed reload
+    keeps the old model; it is retried on the next change.
+    """
+    
+    def __init__(self, models=None, interval_seconds=5.0):
+        """
+        Initialize the watcher
+        
+        Args:
+            models: MultiModelRegistry to watch (default: the process-wide
+                registry, looked up on every poll)
+            interval_seconds (float): Seconds between polls
+        """
+        self.models = models
+        self.interval = interval_seconds
+        self.pid = os.getpid()
+        self.reloads = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._watched = {}
+        # Models already loaded are watched from their current files on
+        self.poll()
+    
+    def start(self):
+        """Start polling in a daemon thread"""
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+    
+    def poll(self) -> int:
+        """
+        Check the files of every loaded model once
+        
+        Returns:
+            int: Number of models reloaded by this poll
+        """
+        models = self.models if self.models is not None else model_utils.get_models()
+        reloaded = 0
+        watched = {}
+        for registry in models.registries():
+            model = registry.peek()
+            if model is None:
+                continue
+            state = self._watched.get(registry.name)
+            if state is None or state.model is not model:
+                # Newly loaded (or reloaded elsewhere): its files are the baseline
+                state = _Watched(model, file_signature(registry.model_dir))
+            elif self._check(registry, state):
+                reloaded += 1
+            watched[registry.name] = state
+        self._watched = watched
+        return reloaded
+    
+    def _check(self, registry, state) -> bool:
+        """Advance one registry's state; True if it was reloaded"""
+        current = file_signature(registry.model_dir)
+        if current == state.loaded:
+            state.pending = None
+            return False
+        if current != state.pending:
+            # Still changing (or first sighting); wait for it to settle
+            state.pending = current
+            return False
+        
+        state.loaded = current
+        state.pending = None
+        try:
+            state.model = registry.reload()
+        except Exception as e:
+            self.failures += 1
+            print(f"[WARNING] Reload of model '{registry.name}' after file change failed: {e}")
+            return False
+        self.reloads += 1
+        return True
+
+
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def start_model_watcher() -> Optional[ModelFileWatcher]:
+    """
+    Start the watcher for this process if MODEL_WATCH_ENABLED is set
+    
+    Must not be called in a gunicorn master that preloads the app: a
+    reload running there while a worker forks can leave the child with a
+    registry lock that is held forever. gunicorn workers call it after
+    forking, other servers on the first request; each process gets
+    exactly one watcher.
+    
+    Returns:
+        ModelFileWatcher or None when watching is disabled
+    """
+    global _watcher
+    if not Config.MODEL_WATCH_ENABLED:
+        return None
+    watcher = _watcher
+    if watcher is not None and watcher.pid == os.getpid():
+        return watcher
+    with _watcher_lock:
+        if _watcher is None or _watcher.pid != os.getpid():
+            _watcher = ModelFileWatcher(interval_seconds=Config.MODEL_WATCH_INTERVAL_SECONDS)
+            _watcher.start()
+    return _watcher
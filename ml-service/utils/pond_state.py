@@ -0,0 +1,367 @@
+"""
+Per-pond rolling state for streamed sensor readings
+"""
+import math
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from config.config import Config
+from utils.forecast import FORECAST_PARAMETERS, HoltForecaster, forecast_alerts
+
+PARAMETERS = ('ph', 'temperature', 'turbidity', 'dissolved_oxygen')
+
+# Accepted reading times in epoch seconds; the upper bound leaves room for
+# forecast horizons below datetime's year 9999 limit
+MIN_TIMESTAMP = 0.0
+MAX_TIMESTAMP = datetime(9999, 1, 1, tzinfo=timezone.utc).timestamp()
+# Numbers at or above this are epoch milliseconds (as sent by JS Date.now());
+# in seconds they would lie past the year 5000
+EPOCH_MS_THRESHOLD = 1e11
+
+
+class InvalidTimestampError(ValueError):
+    """A reading timestamp that cannot be parsed or is out of range"""
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer of (time, value) with O(1) rolling statistics
+    
+    Mean and least-squares slope come from running sums that are updated
+    when a value enters and when the oldest value leaves. Min and max are
+    the fronts of monotonic deques (amortized O(1)). Every ``capacity``
+    pushes the sums are recomputed from the buffer, which bounds float
+    drift and re-centers the time axis.
+    """
+    
+    __slots__ = ('capacity', '_times', '_values', '_count', '_origin',
+                 '_sum_x', '_sum_t', '_sum_tt', '_sum_tx', '_min', '_max')
+    
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity (int): Number of most recent values kept
+        """
+        self.capacity = capacity
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._count = 0
+        self._origin = None
+        self._sum_x = self._sum_t = self._sum_tt = self._sum_tx = 0.0
+        # (sequence number, value); values increasing / decreasing
+        self._min = deque()
+        self._max = deque()
+    
+    def __len__(self):
+        return min(self._count, self.capacity)
+    
+    def push(self, t: float, x: float):
+        """
+        Append a value
+        
+        Args:
+            t (float): Time in hours, not earlier than the previous push
+            x (float): Value
+        """
+        if self._origin is None:
+            self._origin = t
+        seq = self._count
+        slot = seq % self.capacity
+        
+        if seq >= self.capacity:
+            # Oldest value leaves the window
+            old_t = self._times[slot] - self._origin
+            old_x = self._values[slot]
+            self._sum_x -= old_x
+            self._sum_t -= old_t
+            self._sum_tt -= old_t * old_t
+            self._sum_tx -= old_t * old_x
+            evicted = seq - self.capacity
+            if self._min[0][0] == evicted:
+                self._min.popleft()
+            if self._max[0][0] == evicted:
+                self._max.popleft()
+        
+        self._times[slot] = t
+        self._values[slot] = x
+        rel_t = t - self._origin
+        self._sum_x += x
+        self._sum_t += rel_t
+        self._sum_tt += rel_t * rel_t
+        self._sum_tx += rel_t * x
+        
+        while self._min and self._min[-1][1] >= x:
+            self._min.pop()
+        self._min.append((seq, x))
+        while self._max and self._max[-1][1] <= x:
+            self._max.pop()
+        self._max.append((seq, x))
+        
+        self._count += 1
+        if self._count % self.capacity == 0:
+            self._resum()
+    
+    def _resum(self):
+        n = len(self)
+        times = self._times[:n]
+        values = self._values[:n]
+        self._origin = float(times.min())
+        rel_t = times - self._origin
+        self._sum_x = float(values.sum())
+        self._sum_t = float(rel_t.sum())
+        self._sum_tt = float(rel_t @ rel_t)
+        self._sum_tx = float(rel_t @ values)
+    
+    @property
+    def last(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return float(self._values[(self._count - 1) % self.capacity])
+    
+    @property
+    def mean(self) -> Optional[float]:
+        n = len(self)
+        return self._sum_x / n if n else None
+    
+    @property
+    def slope(self) -> Optional[float]:
+        """Least-squares slope in units per hour (None with <2 distinct times)"""
+        n = len(self)
+        if n < 2:
+            return None
+        denominator = n * self._sum_tt - self._sum_t * self._sum_t
+        if denominator <= 1e-12 * max(1.0, n * self._sum_tt):
+            return None
+        return (n * self._sum_tx - self._sum_t * self._sum_x) / denominator
+    
+    @property
+    def minimum(self) -> Optional[float]:
+        return float(self._min[0][1]) if self._min else None
+    
+    @property
+    def maximum(self) -> Optional[float]:
+        return float(self._max[0][1]) if self._max else None
+    
+    def features(self) -> Dict[str, Any]:
+        """Rolling statistics of the window"""
+        slope = self.slope
+        return {
+            'count': len(self),
+            'last': self.last,
+            'mean': self.mean,
+            'min': self.minimum,
+            'max': self.maximum,
+            'slope_per_hour': slope,
+        }
+
+
+def parse_timestamp(value) -> float:
+    """
+    Reading timestamp as epoch seconds
+    
+    Args:
+        value: epoch seconds or milliseconds (number) or ISO 8601 string;
+            naive times are UTC
+        
+    Raises:
+        InvalidTimestampError: If the value cannot be parsed, is not
+            finite or lies outside 1970..9999
+    """
+    if isinstance(value, bool):
+        raise InvalidTimestampError(f"Invalid timestamp: {value!r}")
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+        if math.isfinite(seconds) and seconds >= EPOCH_MS_THRESHOLD:
+            seconds /= 1000.0
+    elif isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            seconds = parsed.timestamp()
+        except (ValueError, OverflowError):
+            raise InvalidTimestampError(f"Invalid timestamp: {value!r}") from None
+    else:
+        raise InvalidTimestampError(f"Invalid timestamp: {value!r}")
+    
+    if not MIN_TIMESTAMP <= seconds <= MAX_TIMESTAMP:  # Also rejects NaN
+        raise InvalidTimestampError(f"Timestamp out of range: {value!r}")
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None).isoformat() + 'Z'
+
+
+class PondState:
+    """Rolling windows and forecasters of the sensor parameters of one pond"""
+    
+    __slots__ = ('pond_id', 'windows', 'forecasters', 'readings', 'first_at', 'last_at')
+    
+    def __init__(self, pond_id: str, window_size: int, forecast_options=None):
+        self.pond_id = pond_id
+        self.windows = {name: RollingWindow(window_size) for name in PARAMETERS}
+        self.forecasters = {
+            name: HoltForecaster(**(forecast_options or {})) for name in FORECAST_PARAMETERS
+        }
+        self.readings = 0
+        self.first_at = None
+        self.last_at = None
+    
+    def append(self, reading: Dict[str, float], timestamp: float):
+        """Add one validated reading (timestamp in epoch seconds)"""
+        hours = timestamp / 3600.0
+        for name, window in self.windows.items():
+            window.push(hours, reading[name])
+        for name, forecaster in self.forecasters.items():
+            forecaster.update(hours, reading[name])
+        self.readings += 1
+        if self.first_at is None:
+            self.first_at = timestamp
+        self.last_at = timestamp
+    
+    def trend(self) -> Dict[str, Any]:
+        """JSON-ready rolling statistics of the pond"""
+        return {
+            'pond_id': self.pond_id,
+            'readings': self.readings,
+            'first_at': format_timestamp(self.first_at) if self.first_at is not None else None,
+            'last_at': format_timestamp(self.last_at) if self.last_at is not None else None,
+            'parameters': {name: window.features() for name, window in self.windows.items()},
+        }
+    
+    def forecast(self, horizon_hours: float) -> Dict[str, Any]:
+        """JSON-ready forecasts ``horizon_hours`` after the latest reading, with alerts"""
+        parameters = {}
+        for name, forecaster in self.forecasters.items():
+            value = forecaster.forecast(horizon_hours)
+            parameters[name] = {
+                'ready': forecaster.ready,
+                'level': forecaster.level,
+                'trend_per_hour': forecaster.trend,
+                'forecast': value,
+                'mean_abs_error': forecaster.mae,
+            }
+        return {
+            'pond_id': self.pond_id,
+            'last_at': format_timestamp(self.last_at) if self.last_at is not None else None,
+            'horizon_hours': horizon_hours,
+            'forecast_at': (format_timestamp(self.last_at + horizon_hours * 3600)
+                            if self.last_at is not None else None),
+            'parameters': parameters,
+            'alerts': forecast_alerts(self.forecasters, horizon_hours),
+        }
+
+
+class PondStore:
+    """
+    In-memory rolling state of many ponds
+    
+    Readings are append-only per pond: a reading older than the pond's
+    latest one is rejected. The least recently updated pond is dropped
+    once ``max_ponds`` is exceeded.
+    """
+    
+    def __init__(self, window_size=288, max_ponds=10000, forecast_options=None):
+        """
+        Args:
+            window_size (int): Readings kept per pond and parameter
+            max_ponds (int): Ponds kept in memory
+            forecast_options (dict): HoltForecaster keyword arguments
+        """
+        self.window_size = window_size
+        self.max_ponds = max_ponds
+        self.forecast_options = forecast_options or {}
+        self._ponds = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    def append(self, pond_id, rows: List[Tuple[Dict[str, float], float]]) -> Tuple[PondState, List[Dict[str, Any]]]:
+        """
+        Append readings to a pond
+        
+        Args:
+            pond_id: Pond identifier
+            rows: (validated reading, epoch seconds) pairs in arrival order
+            
+        Returns:
+            tuple: (pond state or None when the pond has no readings,
+                    list of {'position', 'error'} for rejected rows)
+        """
+        pond_id = str(pond_id)
+        rejected = []
+        with self._lock:
+            state = self._ponds.get(pond_id)
+            is_new = state is None
+            if is_new:
+                state = PondState(pond_id, self.window_size, self.forecast_options)
+            
+            for position, (reading, timestamp) in enumerate(rows):
+                if state.last_at is not None and timestamp < state.last_at:
+                    rejected.append({
+                        'position': position,
+                        'error': 'Reading is older than the latest reading of this pond'
+                    })
+                    continue
+                state.append(reading, timestamp)
+            
+            accepted = len(rows) - len(rejected)
+            if is_new and not accepted:
+                # A pond only takes a slot once it has a reading
+                return None, rejected
+            if is_new:
+                self._ponds[pond_id] = state
+                while len(self._ponds) > self.max_ponds:
+                    self._ponds.popitem(last=False)
+                    self.evictions += 1
+            elif accepted:
+                self._ponds.move_to_end(pond_id)
+        
+        return state, rejected
+    
+    def trend(self, pond_id) -> Optional[Dict[str, Any]]:
+        """Rolling statistics of a pond, or None if it has no readings"""
+        with self._lock:
+            state = self._ponds.get(str(pond_id))
+            return state.trend() if state is not None else None
+    
+    def forecast(self, pond_id, horizon_hours: float) -> Optional[Dict[str, Any]]:
+        """Forecast and alerts of a pond, or None if it has no readings"""
+        with self._lock:
+            state = self._ponds.get(str(pond_id))
+            return state.forecast(horizon_hours) if state is not None else None
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'ponds': len(self._ponds),
+                'max_ponds': self.max_ponds,
+                'window_size': self.window_size,
+                'evictions': self.evictions,
+            }
+
+
+# Global store (one per process)
+_pond_store = None
+_pond_store_lock = threading.Lock()
+
+
+def get_pond_store() -> PondStore:
+    """Get or create the process-wide pond store from Config"""
+    global _pond_store
+    if _pond_store is None:
+        with _pond_store_lock:
+            if _pond_store is None:
+                _pond_store = PondStore(
+                    window_size=Config.POND_WINDOW_SIZE,
+                    max_ponds=Config.POND_MAX_PONDS,
+                    forecast_options={
+                        'level_half_life': Config.FORECAST_LEVEL_HALF_LIFE_HOURS,
+                        'trend_half_life': Config.FORECAST_TREND_HALF_LIFE_HOURS,
+                        'damping': Config.FORECAST_TREND_DAMPING,
+                    }
+                )
+    return _pond_store
@@ -0,0 +1,185 @@
+"""
+LRU/TTL cache of model probabilities keyed on quantized sensor readings
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+import numpy as np
+from config.config import Config
+from utils import metrics
+from utils.model_utils import DEFAULT_FEATURE_NAMES, FEATURE_ALIASES
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache with TTL for class probabilities
+    
+    Readings are rounded to sensor precision before both the lookup and the
+    model call, so a cached answer is exactly what the model returns for the
+    rounded reading. Entries are keyed by model version as well; when a
+    named model is reloaded with a different artifact, the entries of its
+    previous version are dropped. Only a newer load (higher
+    ``model.generation``) moves a name to another version, so requests
+    still running on the replaced model neither flip it back nor store
+    entries.
+    """
+    
+    def __init__(self, max_entries=10000, ttl_seconds=3600, decimals=None):
+        """
+        Initialize the cache
+        
+        Args:
+            max_entries (int): Entries kept before the least recently used
+                one is evicted
+            ttl_seconds (float): Lifetime of an entry (0 disables expiry)
+            decimals (dict): Rounding per feature name (sensor precision)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.decimals = decimals or {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Model name -> version currently served under that name, and the
+        # generation of the model instance that set it
+        self._versions = {}
+        self._generations = {}
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def quantize(self, model, features: np.ndarray) -> np.ndarray:
+        """Round each column of ``features`` to its sensor precision"""
+        quantized = np.array(features, dtype=np.float64)
+        feature_names = model.feature_names or DEFAULT_FEATURE_NAMES
+        for column, name in enumerate(feature_names):
+            decimals = self.decimals.get(FEATURE_ALIASES.get(name, name))
+            if decimals is not None:
+                quantized[:, column] = np.round(quantized[:, column], decimals)
+        return quantized
+    
+    def predict_proba(self, model, features: np.ndarray,
+                      compute: Callable[[np.ndarray], np.ndarray] = None) -> np.ndarray:
+        """
+        Probabilities for ``features``, computing only the cache misses
+        
+        Args:
+            model: Loaded WaterQualityModel
+            features: N x n_features raw feature matrix
+            compute: Scores a matrix of quantized rows; defaults to
+                ``model.predict_proba_array``
+            
+        Returns:
+            np.ndarray: N x n_classes probabilities
+        """
+        compute = compute or model.predict_proba_array
+        quantized = self.quantize(model, features)
+        name = getattr(model, 'name', 'default')
+        keys = [(model.version, tuple(row)) for row in quantized.tolist()]
+        
+        cached = [None] * len(keys)
+        now = time.monotonic()
+        generation = getattr(model, 'generation', 0)
+        with self._lock:
+            if generation > self._generations.get(name, -1):
+                self._advance(name, model.version, generation)
+            for i, key in enumerate(keys):
+                cached[i] = self._get(key, now)
+        
+        missing = [i for i, value in enumerate(cached) if value is None]
+        metrics.record_cache(len(keys) - len(missing), len(missing))
+        if missing:
+            computed = compute(quantized[missing])
+            with self._lock:
+                # Skip storing if the model changed while we were computing
+                if self._versions.get(name) == model.version:
+                    for row, i in enumerate(missing):
+                        self._put(keys[i], computed[row], now)
+            for row, i in enumerate(missing):
+                cached[i] = computed[row]
+        
+        return np.vstack(cached)
+    
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        probabilities, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return probabilities
+    
+    def _put(self, key, probabilities, now):
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (np.array(probabilities), expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def _advance(self, name, version, generation):
+        """Record a newer model instance for ``name``, dropping its old version's entries"""
+        previous = self._versions.get(name)
+        self._versions[name] = version
+        self._generations[name] = generation
+        if previous is None or previous == version or previous in self._versions.values():
+            return  # nothing cached yet, same artifact, or still served under another name
+        stale = [key for key in self._entries if key[0] == previous]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self.invalidations += 1
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'model_version': self._versions.get('default'),
+                'model_versions': dict(self._versions),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+# Global cache (one per process)
+_prediction_cache = None
+_prediction_cache_lock = threading.Lock()
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Get or create the process-wide prediction cache from Config"""
+    global _prediction_cache
+    if _prediction_cache is None:
+        with _prediction_cache_lock:
+            if _prediction_cache is None:
+                _prediction_cache = PredictionCache(
+                    max_entries=Config.PREDICTION_CACHE_MAX_ENTRIES,
+                    ttl_seconds=Config.PREDICTION_CACHE_TTL_SECONDS,
+                    decimals=Config.PREDICTION_CACHE_DECIMALS
+                )
+    return _prediction_cache
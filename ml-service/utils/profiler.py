@@ -0,0 +1,125 @@
+"""
+On-demand sampling profiler
+
+Samples the stacks of every thread in the current process with
+``sys._current_frames()`` at a fixed interval and aggregates them in the
+collapsed ("folded") format read by flamegraph.pl and speedscope::
+
+    MainThread;run.py:<module>;app.py:run;predict.py:predict_water_quality 42
+
+Nothing is installed or traced while no profile is running, so the
+serving path pays no cost outside a profiling window.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+_profile_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def collapse_stack(frame, thread_name: str) -> str:
+    """Root-first ``thread;file:function;...`` line for one sampled frame"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ';'.join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Collect collapsed stacks of all threads for a fixed duration
+
+    The sampling runs in the calling thread, which is left out of the
+    samples; the other threads (request handlers, batcher, watcher) keep
+    running and are sampled every ``interval`` seconds.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Initialize the profiler
+
+        Args:
+            interval (float): Seconds between samples
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+
+    def run(self, seconds: float) -> 'SamplingProfiler':
+        """Sample for ``seconds`` and return self"""
+        own_id = threading.get_ident()
+        deadline = time.perf_counter() + seconds
+        next_sample = time.perf_counter()
+
+        while next_sample < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                self.stacks[collapse_stack(frame, names.get(thread_id, f'thread-{thread_id}'))] += 1
+            self.samples += 1
+
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return self
+
+    def collapsed(self) -> str:
+        """Folded stacks, one ``stack count`` line each, most frequent first"""
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, directory: str) -> str:
+        """
+        Write the folded stacks to ``<directory>/profile-<pid>-<time>.folded``
+
+        Returns:
+            str: Path of the written file
+        """
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        path = os.path.join(directory, f"profile-{os.getpid()}-{stamp}.folded")
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+        return path
+
+
+def profile(seconds: float, interval: float, directory: str) -> Optional[Dict[str, Any]]:
+    """
+    Profile this process once; one profile at a time per process
+
+    Args:
+        seconds (float): Profiling window
+        interval (float): Seconds between samples
+        directory (str): Where the collapsed-stack file is written
+
+    Returns:
+        dict: pid, samples, stack count, file path and collapsed text, or
+              None if another profile is already running
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        profiler = SamplingProfiler(interval).run(seconds)
+        return {
+            'pid': os.getpid(),
+            'seconds': seconds,
+            'interval_ms': interval * 1000,
+            'samples': profiler.samples,
+            'stacks': len(profiler.stacks),
+            'path': profiler.write(directory),
+            'collapsed': profiler.collapsed(),
+        }
+    finally:
+        _profile_lock.release()
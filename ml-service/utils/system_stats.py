@@ -0,0 +1,61 @@
+"""
+Process resource statistics
+"""
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _read_kb_fields(path, fields):
+    """Read 'Name:   123 kB' style fields from a /proc file"""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in fields:
+                values[fields[name]] = int(rest.split()[0]) * 1024
+    return values
+
+
+def get_memory_usage():
+    """
+    Memory usage of the current process
+    
+    On Linux, shared vs private pages are reported from /proc/self/smaps_rollup,
+    which shows how much of a worker is still shared with the gunicorn master
+    after fork (copy-on-write).
+    
+    Returns:
+        dict: Memory figures in bytes (None where unavailable)
+    """
+    usage = {
+        'pid': os.getpid(),
+        'rss_bytes': None,
+        'pss_bytes': None,
+        'shared_bytes': None,
+        'private_bytes': None,
+    }
+    
+    try:
+        usage.update(_read_kb_fields('/proc/self/status', {'VmRSS': 'rss_bytes'}))
+        rollup = _read_kb_fields('/proc/self/smaps_rollup', {
+            'Pss': 'pss_bytes',
+            'Shared_Clean': 'shared_clean',
+            'Shared_Dirty': 'shared_dirty',
+            'Private_Clean': 'private_clean',
+            'Private_Dirty': 'private_dirty',
+        })
+        usage['pss_bytes'] = rollup.get('pss_bytes')
+        usage['shared_bytes'] = rollup.get('shared_clean', 0) + rollup.get('shared_dirty', 0)
+        usage['private_bytes'] = rollup.get('private_clean', 0) + rollup.get('private_dirty', 0)
+    except OSError:
+        if resource is not None and usage['rss_bytes'] is None:
+            # Peak RSS; reported in bytes on macOS and kilobytes elsewhere
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            usage['rss_bytes'] = max_rss if sys.platform == 'darwin' else max_rss * 1024
+    
+    return usage
@@ -0,0 +1,338 @@
+"""
+Declarative water quality rules for Tilapia (Ikan Nila)
+
+The threshold bands that produce issues and recommendations are kept in one
+table. They are evaluated with NumPy masks over whole batches into a
+bitset of issue codes per row; Indonesian text is only rendered from
+interned templates for the rows and fields a caller asks for.
+"""
+import sys
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Ideal ranges for Tilapia (Ikan Nila)
+IDEAL_PH_MIN, IDEAL_PH_MAX = 6.5, 8.5
+IDEAL_TEMP_MIN, IDEAL_TEMP_MAX = 25, 30
+IDEAL_TURBIDITY_MAX = 25  # NTU
+IDEAL_DO_MIN = 5.0  # mg/L
+
+# Limits beyond the ideal ranges that mark a dangerous condition
+TEMP_LOW_LIMIT, TEMP_HIGH_LIMIT = 20, 32  # °C
+DO_CRITICAL_MIN = 3.0  # mg/L
+
+# Canonical column order of feature matrices passed to this module
+FEATURES = ('ph', 'temperature', 'turbidity', 'dissolved_oxygen')
+
+# Quality classes in the order of the fallback probability columns
+QUALITY_LABELS = ('Baik', 'Normal', 'Perlu Perhatian')
+
+# Issue rules: (code, feature, below, above, issue, recommendation).
+# A rule fires when value < below or value > above (None = no bound).
+# Within one feature the first matching rule wins, like an if/elif chain.
+ISSUE_RULES = (
+    ('PH_ACID', 'ph', 6.0, None,
+     "pH terlalu rendah (asam)",
+     "Tambahkan kapur pertanian untuk menaikkan pH"),
+    ('PH_ALKALINE', 'ph', None, 9.0,
+     "pH terlalu tinggi (basa)",
+     "Lakukan pergantian air secara bertahap"),
+    ('PH_SUBOPTIMAL', 'ph', IDEAL_PH_MIN, IDEAL_PH_MAX,
+     "pH di luar rentang optimal",
+     "Monitor pH secara rutin dan lakukan penyesuaian bertahap"),
+    
+    ('TEMP_LOW', 'temperature', TEMP_LOW_LIMIT, None,
+     "suhu terlalu rendah",
+     "Pertimbangkan penggunaan pemanas air atau greenhouse"),
+    ('TEMP_HIGH', 'temperature', None, TEMP_HIGH_LIMIT,
+     "suhu terlalu tinggi",
+     "Tingkatkan aerasi dan pertimbangkan peneduh kolam"),
+    ('TEMP_SUBOPTIMAL', 'temperature', IDEAL_TEMP_MIN, IDEAL_TEMP_MAX,
+     "suhu di luar rentang optimal",
+     "Monitor suhu dan sesuaikan dengan kondisi lingkungan"),
+    
+    ('TURBIDITY_VERY_HIGH', 'turbidity', None, 50,
+     "kekeruhan sangat tinggi",
+     "Kurangi pemberian pakan dan tingkatkan filtrasi air"),
+    ('TURBIDITY_HIGH', 'turbidity', None, IDEAL_TURBIDITY_MAX,
+     "kekeruhan cukup tinggi",
+     "Lakukan penggantian air parsial dan periksa sistem filtrasi"),
+    
+    ('DO_CRITICAL', 'dissolved_oxygen', DO_CRITICAL_MIN, None,
+     "oksigen terlarut sangat rendah (berbahaya)",
+     "SEGERA tingkatkan aerasi dan kurangi kepadatan ikan"),
+    ('DO_LOW', 'dissolved_oxygen', IDEAL_DO_MIN, None,
+     "oksigen terlarut di bawah ideal",
+     "Tingkatkan aerasi dengan aerator atau kincir air"),
+)
+
+# Fallback score bands: (feature, points, lower, upper, upper_inclusive).
+# Lower bounds are inclusive, None = unbounded. Within one feature the
+# first matching band wins; values outside every band score 0.
+SCORE_BANDS = (
+    ('ph', 25, IDEAL_PH_MIN, IDEAL_PH_MAX, True),
+    ('ph', 15, 6.0, 9.0, True),
+    ('temperature', 25, IDEAL_TEMP_MIN, IDEAL_TEMP_MAX, True),
+    ('temperature', 15, 22, 32, True),
+    ('turbidity', 25, None, IDEAL_TURBIDITY_MAX, False),
+    ('turbidity', 15, None, 40, False),
+    ('dissolved_oxygen', 25, IDEAL_DO_MIN, None, True),
+    ('dissolved_oxygen', 15, 4, None, True),
+)
+
+# Minimum score for 'Baik' and 'Normal'
+SCORE_BAIK_MIN = 80
+SCORE_NORMAL_MIN = 60
+
+# Share of the remaining probability mass given to the other two classes
+_FALLBACK_SHARES = {
+    0: (None, 0.6, 0.4),   # Baik
+    1: (0.3, None, 0.7),   # Normal
+    2: (0.2, 0.8, None),   # Perlu Perhatian
+}
+
+# Bit position of each issue code
+ISSUE_CODES = {rule[0]: bit for bit, rule in enumerate(ISSUE_RULES)}
+
+_ISSUE_TEXT = tuple(sys.intern(rule[4]) for rule in ISSUE_RULES)
+_RECOMMENDATION_TEXT = tuple(sys.intern(rule[5]) for rule in ISSUE_RULES)
+
+NO_ISSUES = sys.intern('Tidak ada masalah signifikan')
+
+# Recommendations used when no rule fired, per quality class
+DEFAULT_RECOMMENDATIONS = {
+    'Baik': (
+        "Pertahankan kualitas air saat ini",
+        "Lakukan monitoring rutin setiap hari",
+        "Berikan pakan berkualitas sesuai jadwal",
+    ),
+    'Normal': (
+        "Monitor parameter air lebih sering (2-3x sehari)",
+        "Siapkan rencana perbaikan kualitas air",
+        "Kurangi pemberian pakan jika ikan terlihat lemas",
+    ),
+    'Perlu Perhatian': (
+        "SEGERA lakukan pergantian air 30-50%",
+        "Hentikan pemberian pakan sementara",
+        "Tingkatkan aerasi secara maksimal",
+    ),
+}
+URGENT_FOLLOW_UP = sys.intern("Konsultasi dengan ahli budidaya ikan jika kondisi tidak membaik")
+
+DESCRIPTION_TEMPLATES = {
+    'Baik': (
+        "Kualitas air dalam kondisi OPTIMAL untuk budidaya ikan nila. "
+        "Parameter pH ({ph:.2f}), suhu ({temperature:.1f}°C), kekeruhan ({turbidity:.1f} NTU), "
+        "dan oksigen terlarut ({dissolved_oxygen:.2f} mg/L) berada dalam rentang ideal. "
+        "Ikan nila dapat tumbuh dengan sehat, memiliki nafsu makan yang baik, dan sistem imun yang kuat. "
+        "Pertumbuhan ikan optimal dengan tingkat stres minimal."
+    ),
+    'Normal': (
+        "Kualitas air dalam kondisi CUKUP BAIK untuk budidaya ikan nila. "
+        "Terdapat beberapa parameter yang perlu diperhatikan: {issues}. "
+        "Ikan nila masih dapat bertahan dan tumbuh, namun mungkin mengalami sedikit stres. "
+        "Nafsu makan ikan bisa menurun dan pertumbuhan tidak seoptimal kondisi ideal. "
+        "Sistem kekebalan tubuh ikan mulai menurun, sehingga lebih rentan terhadap penyakit."
+    ),
+    'Perlu Perhatian': (
+        "Kualitas air dalam kondisi BURUK dan MEMERLUKAN TINDAKAN SEGERA! "
+        "Masalah yang terdeteksi: {issues}. "
+        "Dalam kondisi air seperti ini, ikan nila mengalami STRES BERAT dan kesehatan mereka terancam. "
+        "Ikan akan menunjukkan gejala: nafsu makan menurun drastis atau tidak mau makan, "
+        "bergerak lemah di permukaan air (gasping), warna tubuh memucat, "
+        "sangat rentan terhadap penyakit dan infeksi, pertumbuhan terhenti, "
+        "dan dapat menyebabkan KEMATIAN MASSAL jika tidak segera ditangani."
+    ),
+}
+
+# Wording used in the description when no rule fired
+EMPTY_ISSUES_TEXT = {
+    'Normal': 'parameter masih dalam batas toleransi',
+    'Perlu Perhatian': 'beberapa parameter di luar batas toleransi',
+}
+
+ALL_FIELDS = ('description', 'issues', 'recommendations')
+
+
+def _normalize_quality(quality):
+    # Unknown labels are treated like 'Perlu Perhatian', as before
+    return quality if quality in DESCRIPTION_TEMPLATES else 'Perlu Perhatian'
+
+
+def evaluate_issue_codes(features: np.ndarray) -> np.ndarray:
+    """
+    Evaluate every issue rule over a batch
+    
+    Args:
+        features: N x 4 float array in FEATURES column order
+        
+    Returns:
+        np.ndarray: uint16 bitset of fired rules per row (see ISSUE_CODES)
+    """
+    features = np.asarray(features, dtype=np.float64)
+    codes = np.zeros(features.shape[0], dtype=np.uint16)
+    matched = {}
+    
+    for bit, (_, feature, below, above, _, _) in enumerate(ISSUE_RULES):
+        values = features[:, FEATURES.index(feature)]
+        fired = np.zeros(values.shape, dtype=bool)
+        if below is not None:
+            fired |= values < below
+        if above is not None:
+            fired |= values > above
+        
+        # First matching rule per feature wins
+        already = matched.setdefault(feature, np.zeros(values.shape, dtype=bool))
+        fired &= ~already
+        already |= fired
+        codes |= fired.astype(np.uint16) << np.uint16(bit)
+    
+    return codes
+
+
+def score_features(features: np.ndarray) -> np.ndarray:
+    """
+    Rule-based water quality score (0-100) for a batch
+    
+    Args:
+        features: N x 4 float array in FEATURES column order
+        
+    Returns:
+        np.ndarray: int64 score per row
+    """
+    features = np.asarray(features, dtype=np.float64)
+    scores = np.zeros(features.shape[0], dtype=np.int64)
+    matched = {}
+    
+    for feature, points, lower, upper, upper_inclusive in SCORE_BANDS:
+        values = features[:, FEATURES.index(feature)]
+        # NaN compares False everywhere, so it never lands in a band
+        inside = ~np.isnan(values)
+        if lower is not None:
+            inside &= values >= lower
+        if upper is not None:
+            inside &= values <= upper if upper_inclusive else values < upper
+        
+        already = matched.setdefault(feature, np.zeros(values.shape, dtype=bool))
+        inside &= ~already
+        already |= inside
+        scores += inside * points
+    
+    return scores
+
+
+def classify_scores(scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turn fallback scores into classes, confidences and probabilities
+    
+    Args:
+        scores: score per row from ``score_features``
+        
+    Returns:
+        tuple: (class indices into QUALITY_LABELS, confidence per row,
+                N x 3 probability matrix)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    class_indices = np.where(scores >= SCORE_BAIK_MIN, 0,
+                             np.where(scores >= SCORE_NORMAL_MIN, 1, 2))
+    
+    confidence = np.select(
+        [class_indices == 0, class_indices == 1],
+        [np.minimum(0.95 + (scores - 80) / 20 * 0.05, 0.99),  # 0.95-0.99
+         0.75 + (scores - 60) / 20 * 0.10],                    # 0.75-0.85
+        0.85 + (scores / 60) * 0.05                            # 0.85-0.90
+    )
+    
+    remainder = 1 - confidence
+    probabilities = np.empty((len(scores), len(QUALITY_LABELS)), dtype=np.float64)
+    for class_index, shares in _FALLBACK_SHARES.items():
+        rows = class_indices == class_index
+        for column, share in enumerate(shares):
+            probabilities[rows, column] = confidence[rows] if share is None else remainder[rows] * share
+    
+    # Normalize; summed left to right to match the scalar implementation
+    total = (probabilities[:, 0] + probabilities[:, 1]) + probabilities[:, 2]
+    probabilities /= total[:, None]
+    
+    return class_indices, confidence, probabilities
+
+
+def readings_to_features(readings: Sequence[Dict[str, float]]) -> np.ndarray:
+    """Assemble reading dicts into an N x 4 array in FEATURES order"""
+    features = np.empty((len(readings), len(FEATURES)), dtype=np.float64)
+    for row, reading in enumerate(readings):
+        features[row] = [reading[name] for name in FEATURES]
+    return features
+
+
+@lru_cache(maxsize=None)
+def issues_for(code: int) -> Tuple[str, ...]:
+    """Issue texts for a bitset (empty tuple when nothing fired)"""
+    return tuple(_ISSUE_TEXT[bit] for bit in range(len(ISSUE_RULES)) if code >> bit & 1)
+
+
+@lru_cache(maxsize=None)
+def recommendations_for(code: int, quality: str) -> Tuple[str, ...]:
+    """Recommendation texts for a bitset and quality class"""
+    quality = _normalize_quality(quality)
+    recommendations = tuple(
+        _RECOMMENDATION_TEXT[bit] for bit in range(len(ISSUE_RULES)) if code >> bit & 1
+    )
+    if not recommendations:
+        recommendations = DEFAULT_RECOMMENDATIONS[quality]
+    if quality == 'Perlu Perhatian':
+        recommendations += (URGENT_FOLLOW_UP,)
+    return recommendations
+
+
+@lru_cache(maxsize=4096)
+def _issue_description(code: int, quality: str) -> str:
+    issues = issues_for(code)
+    text = ', '.join(issues) if issues else EMPTY_ISSUES_TEXT[quality]
+    return DESCRIPTION_TEMPLATES[quality].format(issues=text)
+
+
+def describe(code: int, quality: str, ph: float, temperature: float,
+             turbidity: float, dissolved_oxygen: float) -> str:
+    """Description paragraph for one row"""
+    quality = _normalize_quality(quality)
+    if quality == 'Baik':
+        return DESCRIPTION_TEMPLATES['Baik'].format(
+            ph=ph, temperature=temperature, turbidity=turbidity,
+            dissolved_oxygen=dissolved_oxygen
+        )
+    return _issue_description(code, quality)
+
+
+def render(code: int, quality: str, reading: Dict[str, float],
+           fields: Sequence[str] = ALL_FIELDS) -> Dict[str, object]:
+    """
+    Render the requested text fields for one row
+    
+    Args:
+        code: Issue bitset from ``evaluate_issue_codes``
+        quality: Quality class label
+        reading: dict with ph, temperature, turbidity, dissolved_oxygen
+        fields: any of 'description', 'issues', 'recommendations'
+        
+    Returns:
+        dict: Only the requested fields
+    """
+    code = int(code)
+    rendered = {}
+    if 'description' in fields:
+        rendered['description'] = describe(
+            code, quality, reading['ph'], reading['temperature'],
+            reading['turbidity'], reading['dissolved_oxygen']
+        )
+    if 'issues' in fields:
+        rendered['issues'] = list(issues_for(code)) or [NO_ISSUES]
+    if 'recommendations' in fields:
+        rendered['recommendations'] = list(recommendations_for(code, quality))
+    return rendered
+
+
+def issue_code_names(code: int) -> List[str]:
+    """Names of the rules set in a bitset"""
+    return [rule[0] for bit, rule in enumerate(ISSUE_RULES) if int(code) >> bit & 1]